@@ -44,6 +44,7 @@ CRLF = b'\r\n'
 COLON = b':'
 WHITESPACE = b' '
 COMMA = b','
+SEMI = b';'
 DOT = b'.'
 SLASH = b'/'
 AT = b'@'
@@ -73,8 +74,12 @@ PROXY_AGENT_HEADER = PROXY_AGENT_HEADER_KEY + \
 
 # Defaults
 DEFAULT_BACKLOG = 100
+DEFAULT_ENABLE_REUSEPORT = False
+DEFAULT_MAX_ACCEPTS_PER_WAKEUP = 32
 DEFAULT_BASIC_AUTH = None
 DEFAULT_MAX_SEND_SIZE = 64 * 1024
+# Maximum number of buffers gathered into a single sendmsg call
+DEFAULT_MAX_SEND_BUFFERS = 64
 DEFAULT_BUFFER_SIZE = 128 * 1024
 DEFAULT_CA_CERT_DIR = None
 DEFAULT_CA_CERT_FILE = None
@@ -126,19 +131,40 @@ DEFAULT_PORT = 8899
 DEFAULT_SERVER_RECVBUF_SIZE = DEFAULT_BUFFER_SIZE
 DEFAULT_STATIC_SERVER_DIR = os.path.join(PROXY_PY_DIR, "public")
 DEFAULT_MIN_COMPRESSION_LENGTH = 20  # In bytes
+DEFAULT_COMPRESSION_LEVEL = 6
+DEFAULT_STATIC_COMPRESSION_CACHE_SIZE = 16 * 1024 * 1024   # In bytes
+# Static files are compressed on the event loop, keep it cheap.
+# Serve precompressed .br/.gz siblings for best compression.
+DEFAULT_STATIC_COMPRESSION_LEVEL = 1
 DEFAULT_THREADLESS = _env_threadless_compliant()
 DEFAULT_LOCAL_EXECUTOR = True
+DEFAULT_DISPATCH_STRATEGY = 'round-robin'
 DEFAULT_TIMEOUT = 10.0
+DEFAULT_SSL_CONTEXT_CACHE_SIZE = 1024
 DEFAULT_VERSION = False
 DEFAULT_HTTP_PORT = 80
 DEFAULT_HTTPS_PORT = 443
 DEFAULT_WORK_KLASS = 'proxy.http.HttpProtocolHandler'
 DEFAULT_ENABLE_PROXY_PROTOCOL = False
+DEFAULT_MAX_HEADER_SIZE = 64 * 1024     # In bytes
+DEFAULT_MAX_HEADERS = 256
+DEFAULT_ENABLE_ASYNC_CONNECT = False
+DEFAULT_ENABLE_SPLICE = False
+DEFAULT_ENABLE_ASYNC_HANDSHAKE = False
+DEFAULT_INTERCEPTION_CONTEXT_CACHE_SIZE = 1024
+DEFAULT_INTERCEPTION_CONTEXT_CACHE_MEMORY = 16 * 1024 * 1024   # In bytes
+DEFAULT_CERTIFICATE_GENERATION_WORKERS = 4
+DEFAULT_CONNECT_TIMEOUT = None
+DEFAULT_HEADER_READ_TIMEOUT = None
+DEFAULT_KEEP_ALIVE_TIMEOUT = None
+DEFAULT_TUNNEL_IDLE_TIMEOUT = None
 # 25 milliseconds to keep the loops hot
 # Will consume ~0.3-0.6% CPU when idle.
 DEFAULT_SELECTOR_SELECT_TIMEOUT = 25 / 1000
 DEFAULT_WAIT_FOR_TASKS_TIMEOUT = 1 / 1000
 DEFAULT_INACTIVE_CONN_CLEANUP_TIMEOUT = 1   # in seconds
+DEFAULT_TIMER_RESOLUTION = 0.1   # in seconds
+DEFAULT_EVENT_LOOP = 'selector'
 
 DEFAULT_DEVTOOLS_DOC_URL = 'http://proxy'
 DEFAULT_DEVTOOLS_FRAME_ID = secrets.token_hex(8)
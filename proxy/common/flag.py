@@ -31,6 +31,7 @@ from .constants import (
     DEFAULT_DISABLE_HEADERS, PY2_DEPRECATION_MESSAGE, DEFAULT_DEVTOOLS_WS_PATH,
     PLUGIN_DEVTOOLS_PROTOCOL, PLUGIN_WEBSOCKET_TRANSPORT,
     DEFAULT_DATA_DIRECTORY_PATH, DEFAULT_MIN_COMPRESSION_LENGTH,
+    DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
 )
 
 
@@ -310,6 +311,14 @@ class FlagParser:
             )
         ]
         args.backlog = cast(int, opts.get('backlog', args.backlog))
+        args.max_accepts_per_wakeup = max(
+            1, cast(
+                int, opts.get(
+                    'max_accepts_per_wakeup',
+                    args.max_accepts_per_wakeup,
+                ),
+            ),
+        )
         num_workers = opts.get('num_workers', args.num_workers)
         args.num_workers = cast(
             int, num_workers if num_workers > 0 else multiprocessing.cpu_count(),
@@ -345,6 +354,16 @@ class FlagParser:
                 ),
             ),
         )
+        args.static_compression_cache_size = cast(
+            int,
+            opts.get(
+                'static_compression_cache_size',
+                getattr(
+                    args, 'static_compression_cache_size',
+                    DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
+                ),
+            ),
+        )
         args.devtools_ws_path = cast(
             bytes,
             opts.get(
@@ -369,6 +388,13 @@ class FlagParser:
         # evaluates to False.
         args.threadless = cast(bool, opts.get('threadless', args.threadless))
         args.threadless = is_threadless(args.threadless, args.threaded)
+        # SO_REUSEPORT listeners are only used by remote executors
+        # which accept directly.  See ``--enable-reuseport``.
+        args.enable_reuseport = cast(
+            bool, opts.get('enable_reuseport', args.enable_reuseport),
+        ) and args.threadless and not args.local_executor \
+            and not args.unix_socket_path \
+            and hasattr(socket, 'SO_REUSEPORT')
 
         args.pid_file = cast(
             Optional[str], opts.get(
@@ -17,17 +17,29 @@ import sys
 import time
 import uuid
 import logging
+import datetime
 import argparse
 import tempfile
 import contextlib
 import subprocess
-from typing import List, Tuple, Optional, Generator
+from typing import Any, Dict, List, Tuple, Optional, Generator
 
 from .utils import bytes_
 from .version import __version__
 from .constants import COMMA
 
 
+# Whether leaf certificates can be signed in-process,
+# without spawning ``openssl`` subprocesses.
+try:
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    HAS_CRYPTOGRAPHY = True
+except ImportError:     # pragma: no cover
+    HAS_CRYPTOGRAPHY = False
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -159,6 +171,96 @@ def sign_csr(
         return run_openssl_command(command, timeout)
 
 
+# Keys and certificates loaded for in-process signing,
+# keyed by path and revalidated by modification time.
+_loaded: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+
+
+def _load(path: str, password: str, kind: str) -> Any:
+    st = os.stat(path)
+    identity = (st.st_mtime_ns, st.st_size)
+    cached = _loaded.get((path, kind))
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+    if kind == 'key':
+        loaded = serialization.load_pem_private_key(
+            data, password=bytes_(password) if password else None,
+        )
+    else:
+        loaded = x509.load_pem_x509_certificate(data)
+    _loaded[(path, kind)] = (identity, loaded)
+    return loaded
+
+
+def gen_leaf_certificate(
+        crt_path: str,
+        key_path: str,
+        password: str,
+        ca_key_path: str,
+        ca_key_password: str,
+        ca_crt_path: str,
+        subject: Dict[str, str],
+        serial: str,
+        alt_subj_names: Optional[List[str]] = None,
+        validity_in_days: int = 365,
+) -> bool:
+    """Signs a certificate for the public half of given key using CA key and
+    certificate, in-process.  Equivalent of ``gen_public_key``, ``gen_csr``
+    and ``sign_csr`` without any intermediate files.
+
+    Subject is a mapping of short attribute names e.g. ``CN`` to values.
+    Loaded keys and certificates are reused across calls.  Requires
+    ``cryptography`` package."""
+    assert HAS_CRYPTOGRAPHY
+    names = {
+        'CN': NameOID.COMMON_NAME,
+        'C': NameOID.COUNTRY_NAME,
+        'ST': NameOID.STATE_OR_PROVINCE_NAME,
+        'L': NameOID.LOCALITY_NAME,
+        'O': NameOID.ORGANIZATION_NAME,
+        'OU': NameOID.ORGANIZATIONAL_UNIT_NAME,
+    }
+    key = _load(key_path, password, 'key')
+    ca_key = _load(ca_key_path, ca_key_password, 'key')
+    ca_crt = _load(ca_crt_path, '', 'crt')
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = x509.CertificateBuilder().subject_name(
+        x509.Name([
+            x509.NameAttribute(names[name], value)
+            for name, value in subject.items()
+        ]),
+    ).issuer_name(
+        ca_crt.subject,
+    ).public_key(
+        key.public_key(),
+    ).serial_number(
+        int(serial),
+    ).not_valid_before(
+        now,
+    ).not_valid_after(
+        now + datetime.timedelta(days=validity_in_days),
+    ).add_extension(
+        x509.SubjectKeyIdentifier.from_public_key(key.public_key()),
+        critical=False,
+    ).add_extension(
+        x509.AuthorityKeyIdentifier.from_issuer_public_key(ca_key.public_key()),
+        critical=False,
+    )
+    if alt_subj_names is not None and len(alt_subj_names) > 0:
+        builder = builder.add_extension(
+            x509.SubjectAlternativeName([
+                x509.DNSName(cname) for cname in alt_subj_names
+            ]),
+            critical=False,
+        )
+    crt = builder.sign(ca_key, hashes.SHA256())
+    with open(crt_path, 'wb') as f:
+        f.write(crt.public_bytes(serialization.Encoding.PEM))
+    return True
+
+
 def get_ext_config(
         alt_subj_names: Optional[List[str]] = None,
         extended_key_usage: Optional[str] = None,
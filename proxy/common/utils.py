@@ -12,21 +12,25 @@
 
        utils
 """
+import os
 import ssl
 import sys
+import errno
 import socket
 import logging
 import argparse
 import functools
 import ipaddress
+import threading
 import contextlib
+import collections
 from types import TracebackType
 from typing import Any, Dict, List, Type, Tuple, Callable, Optional
 
 from .types import HostPort
 from .constants import (
     CRLF, COLON, HTTP_1_1, IS_WINDOWS, WHITESPACE, DEFAULT_TIMEOUT,
-    DEFAULT_THREADLESS, PROXY_AGENT_HEADER_VALUE,
+    DEFAULT_THREADLESS, PROXY_AGENT_HEADER_VALUE, DEFAULT_SSL_CONTEXT_CACHE_SIZE,
 )
 
 
@@ -212,6 +216,75 @@ def find_http_line(raw: bytes) -> Tuple[Optional[bytes], bytes]:
         else (parts[0], parts[1])
 
 
+# (purpose, cafile, certfile, keyfile, verify mode, check hostname) ->
+# (identity of files context was loaded from, context), least recently
+# used first.  Guarded by lock as contexts are shared across threads.
+_ssl_contexts: 'collections.OrderedDict[Tuple[Any, ...], Tuple[Tuple[Any, ...], ssl.SSLContext]]' = \
+    collections.OrderedDict()
+_ssl_contexts_lock = threading.Lock()
+
+
+def _file_identity(path: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def new_ssl_context(
+        purpose: ssl.Purpose,
+        cafile: Optional[str] = None,
+        verify_mode: ssl.VerifyMode = ssl.VerifyMode.CERT_REQUIRED,     # pylint: disable=E1101
+        check_hostname: bool = False,
+) -> ssl.SSLContext:
+    """Returns a new SSLContext which only allows TLS v1.2 and above."""
+    ctx = ssl.create_default_context(purpose, cafile=cafile)
+    ctx.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3 | ssl.OP_NO_TLSv1 | ssl.OP_NO_TLSv1_1
+    ctx.check_hostname = check_hostname
+    ctx.verify_mode = verify_mode
+    return ctx
+
+
+def ssl_context(
+        purpose: ssl.Purpose,
+        cafile: Optional[str] = None,
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+        verify_mode: ssl.VerifyMode = ssl.VerifyMode.CERT_REQUIRED,     # pylint: disable=E1101
+        check_hostname: bool = False,
+) -> ssl.SSLContext:
+    """Returns a cached SSLContext.
+
+    Contexts are shared by all connections within a process.  A context
+    is rebuilt once any of the files it was loaded from has changed,
+    which costs a ``stat`` per file instead of parsing them for every
+    connection."""
+    key = (purpose, cafile, certfile, keyfile, verify_mode, check_hostname)
+    identity = (
+        _file_identity(cafile),
+        _file_identity(certfile),
+        _file_identity(keyfile),
+    )
+    with _ssl_contexts_lock:
+        cached = _ssl_contexts.get(key)
+        if cached is not None and cached[0] == identity:
+            _ssl_contexts.move_to_end(key)
+            return cached[1]
+    ctx = new_ssl_context(purpose, cafile, verify_mode, check_hostname)
+    if certfile is not None:
+        ctx.load_cert_chain(certfile=certfile, keyfile=keyfile)
+    with _ssl_contexts_lock:
+        _ssl_contexts[key] = (identity, ctx)
+        _ssl_contexts.move_to_end(key)
+        # Evict least recently used contexts e.g. for per host certificates
+        while len(_ssl_contexts) > DEFAULT_SSL_CONTEXT_CACHE_SIZE:
+            _ssl_contexts.popitem(last=False)
+    return ctx
+
+
 def wrap_socket(
         conn: socket.socket,
         keyfile: str,
@@ -219,15 +292,12 @@ def wrap_socket(
         cafile: Optional[str] = None,
 ) -> ssl.SSLSocket:
     """Use this to upgrade server_side socket to TLS."""
-    ctx = ssl.create_default_context(
+    ctx = ssl_context(
         ssl.Purpose.CLIENT_AUTH,
         cafile=cafile,
-    )
-    ctx.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3 | ssl.OP_NO_TLSv1 | ssl.OP_NO_TLSv1_1
-    ctx.verify_mode = ssl.CERT_NONE
-    ctx.load_cert_chain(
         certfile=certfile,
         keyfile=keyfile,
+        verify_mode=ssl.CERT_NONE,
     )
     return ctx.wrap_socket(
         conn,
@@ -265,6 +335,35 @@ def new_socket_connection(
     return socket.create_connection(addr, timeout=timeout, source_address=source_address)
 
 
+def start_socket_connection(
+        addr: HostPort,
+        source_address: Optional[HostPort] = None,
+) -> socket.socket:
+    """Same as new_socket_connection but returns a non-blocking socket
+    without waiting for the connection to be established.
+
+    Callers must wait for the returned socket to become write ready
+    and then inspect ``SO_ERROR`` to know the outcome of connection attempt.
+
+    NOTE: Hostname resolution (if any) is still performed synchronously.
+    """
+    family, _, _, _, sockaddr = socket.getaddrinfo(
+        addr[0], addr[1], 0, socket.SOCK_STREAM,
+    )[0]
+    conn = socket.socket(family, socket.SOCK_STREAM, 0)
+    try:
+        conn.setblocking(False)
+        if source_address:
+            conn.bind(source_address)
+        err = conn.connect_ex(sockaddr)
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            raise OSError(err, os.strerror(err))
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
 class socket_connection(contextlib.ContextDecorator):
     """Same as new_socket_connection but as a context manager and decorator."""
 
@@ -12,6 +12,8 @@
 
        pre
 """
+import zlib
+import random
 import socket
 import logging
 import argparse
@@ -19,18 +21,20 @@ import selectors
 import threading
 import multiprocessing
 import multiprocessing.synchronize
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from multiprocessing import connection
 from multiprocessing.reduction import recv_handle
 
-from ..work import start_threaded_work, delegate_work_to_pool
+from ..work import start_threaded_work, delegate_works_to_pool
 from ..event import EventQueue
 from ..work.fd import LocalFdExecutor
 from ...common.flag import flags
 from ...common.types import HostPort
 from ...common.logger import Logger
 from ...common.backports import NonBlockingQueue
-from ...common.constants import DEFAULT_LOCAL_EXECUTOR
+from ...common.constants import (
+    DEFAULT_LOCAL_EXECUTOR, DEFAULT_DISPATCH_STRATEGY,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -47,6 +51,22 @@ flags.add_argument(
     'acceptors and executors, instead of using underlying OS kernel scheduling algorithm.',
 )
 
+flags.add_argument(
+    '--dispatch-strategy',
+    type=str,
+    default=DEFAULT_DISPATCH_STRATEGY,
+    choices=(
+        'round-robin', 'least-connections',
+        'power-of-two', 'ip-hash',
+    ),
+    help='Default: ' + DEFAULT_DISPATCH_STRATEGY + '.  ' +
+    'Applicable only with --threadless and --local-executor 0.  ' +
+    'Strategy used by acceptors to choose an executor for accepted work.  ' +
+    '"least-connections" picks executor with fewest live connections, ' +
+    '"power-of-two" picks less loaded of two random executors, ' +
+    '"ip-hash" always picks same executor for a client IP.',
+)
+
 
 class Acceptor(multiprocessing.Process):
     """Work acceptor process.
@@ -76,6 +96,7 @@ class Acceptor(multiprocessing.Process):
             executor_pids: List[int],
             executor_locks: List['multiprocessing.synchronize.Lock'],
             event_queue: Optional[EventQueue] = None,
+            executor_loads: Any = None,
     ) -> None:
         super().__init__()
         self.flags = flags
@@ -92,6 +113,8 @@ class Acceptor(multiprocessing.Process):
         self.executor_queues = executor_queues
         self.executor_pids = executor_pids
         self.executor_locks = executor_locks
+        # Live works per executor, published by executors
+        self.executor_loads = executor_loads
         # Selector
         self.running = multiprocessing.Event()
         self.selector: Optional[selectors.DefaultSelector] = None
@@ -107,18 +130,25 @@ class Acceptor(multiprocessing.Process):
             self,
             events: List[Tuple[selectors.SelectorKey, int]],
     ) -> List[Tuple[socket.socket, Optional[HostPort]]]:
-        works = []
+        """Drains ready listening sockets until they would block.
+
+        At most ``--max-accepts-per-wakeup`` connections are accepted,
+        remaining connections are picked up on next wakeup."""
+        works: List[Tuple[socket.socket, Optional[HostPort]]] = []
         for key, mask in events:
-            if mask & selectors.EVENT_READ:
+            if not mask & selectors.EVENT_READ:
+                continue
+            sock = self.socks[key.data]
+            while len(works) < self.flags.max_accepts_per_wakeup:
                 try:
-                    conn, addr = self.socks[key.data].accept()
-                    logging.debug(
-                        'Accepting new work#{0}'.format(conn.fileno()),
-                    )
-                    works.append((conn, addr or None))
+                    conn, addr = sock.accept()
                 except BlockingIOError:
-                    # logger.info('blocking io error')
-                    pass
+                    # Drained, or accepted by another acceptor
+                    break
+                logging.debug(
+                    'Accepting new work#{0}'.format(conn.fileno()),
+                )
+                works.append((conn, addr or None))
         return works
 
     def run_once(self) -> None:
@@ -144,12 +174,18 @@ class Acceptor(multiprocessing.Process):
             finally:
                 if locked:
                     self.lock.release()
-            for work in works:
-                if self.flags.threadless and \
-                        self.flags.local_executor:
-                    assert self._local_work_queue
+            if not works:
+                return
+            if self.flags.threadless and \
+                    self.flags.local_executor:
+                assert self._local_work_queue and self._local
+                for work in works:
                     self._local_work_queue.put(work)
-                else:
+                self._local.wakeup()
+            elif self.flags.threadless:
+                self._delegate(works)
+            else:
+                for work in works:
                     self._work(*work)
 
     def run(self) -> None:
@@ -210,48 +246,82 @@ class Acceptor(multiprocessing.Process):
     def _stop_local(self) -> None:
         if self._lthread is not None and \
                 self._local_work_queue is not None:
+            assert self._local
             self._local_work_queue.put(False)
+            self._local.wakeup()
             self._lthread.join()
 
-    def _work(self, conn: socket.socket, addr: Optional[HostPort]) -> None:
+    def _delegate(
+            self,
+            works: List[Tuple[socket.socket, Optional[HostPort]]],
+    ) -> None:
+        """Dispatches accepted works to remote executors.
+
+        Works destined to the same executor are handed over in a batch."""
         self._total = self._total or 0
-        if self.flags.threadless:
-            # Index of worker to which this work should be dispatched
-            # Use round-robin strategy by default.
-            #
-            # By default all acceptors will start sending work to
-            # 1st workers.  To randomize, we offset index by idd.
-            index = (self._total + self.idd) % self.flags.num_workers
-            thread = threading.Thread(
-                target=delegate_work_to_pool,
-                args=(
-                    self.executor_pids[index],
-                    self.executor_queues[index],
-                    self.executor_locks[index],
-                    conn,
-                    addr,
-                    self.flags.unix_socket_path,
+        batches: Dict[int, List[Tuple[socket.socket, Optional[HostPort]]]] = {}
+        # Loads published by executors don't account for works
+        # dispatched within this batch, hence we track them locally.
+        loads = None
+        if self.executor_loads is not None and \
+                self.flags.dispatch_strategy in ('least-connections', 'power-of-two'):
+            loads = list(self.executor_loads)
+        for work in works:
+            index = self._choose_executor(work[1], loads)
+            if loads is not None:
+                loads[index] += 1
+            batches.setdefault(index, []).append(work)
+            self._total += 1
+        for index, batch in batches.items():
+            logger.debug(
+                'Dispatching {0} works from acceptor#{1} to worker#{2}'.format(
+                    len(batch), self.idd, index,
                 ),
             )
-            thread.start()
-            # TODO: Move me into target method
-            logger.debug(   # pragma: no cover
-                'Dispatched work#{0}.{1}.{2} to worker#{3}'.format(
-                    conn.fileno(), self.idd, self._total, index,
-                ),
-            )
-        else:
-            _, thread = start_threaded_work(
-                self.flags,
-                conn,
-                addr,
-                event_queue=self.event_queue,
-                publisher_id=self.__class__.__name__,
-            )
-            # TODO: Move me into target method
-            logger.debug(   # pragma: no cover
-                'Started work#{0}.{1}.{2} in thread#{3}'.format(
-                    conn.fileno(), self.idd, self._total, thread.ident,
-                ),
+            delegate_works_to_pool(
+                self.executor_pids[index],
+                self.executor_queues[index],
+                self.executor_locks[index],
+                batch,
+                self.flags.unix_socket_path,
             )
+
+    def _choose_executor(
+            self,
+            addr: Optional[HostPort],
+            loads: Optional[List[int]],
+    ) -> int:
+        """Returns index of executor to which work must be dispatched."""
+        assert self._total is not None
+        num_workers: int = self.flags.num_workers
+        strategy = self.flags.dispatch_strategy
+        if loads is not None:
+            if strategy == 'least-connections':
+                return loads.index(min(loads))
+            if strategy == 'power-of-two' and num_workers > 1:
+                first, second = random.sample(range(num_workers), 2)
+                return first if loads[first] <= loads[second] else second
+        elif strategy == 'ip-hash' and addr:
+            return zlib.crc32(addr[0].encode()) % num_workers
+        # Use round-robin strategy by default.
+        #
+        # By default all acceptors will start sending work to
+        # 1st workers.  To randomize, we offset index by idd.
+        return (self._total + self.idd) % num_workers
+
+    def _work(self, conn: socket.socket, addr: Optional[HostPort]) -> None:
+        self._total = self._total or 0
+        _, thread = start_threaded_work(
+            self.flags,
+            conn,
+            addr,
+            event_queue=self.event_queue,
+            publisher_id=self.__class__.__name__,
+        )
+        # TODO: Move me into target method
+        logger.debug(   # pragma: no cover
+            'Started work#{0}.{1}.{2} in thread#{3}'.format(
+                conn.fileno(), self.idd, self._total, thread.ident,
+            ),
+        )
         self._total += 1
@@ -69,6 +69,7 @@ class AcceptorPool:
             executor_pids: List[int],
             executor_locks: List['multiprocessing.synchronize.Lock'],
             event_queue: Optional['EventQueue'] = None,
+            executor_loads: Any = None,
     ) -> None:
         self.flags = flags
         # File descriptor to use for accepting new work
@@ -77,6 +78,7 @@ class AcceptorPool:
         self.executor_queues: List[connection.Connection] = executor_queues
         self.executor_pids: List[int] = executor_pids
         self.executor_locks: List['multiprocessing.synchronize.Lock'] = executor_locks
+        self.executor_loads: Any = executor_loads
         # Eventing core queue
         self.event_queue: Optional['EventQueue'] = event_queue
         # Acceptor process instances
@@ -143,6 +145,7 @@ class AcceptorPool:
                 executor_queues=self.executor_queues,
                 executor_pids=self.executor_pids,
                 executor_locks=self.executor_locks,
+                executor_loads=self.executor_loads,
             )
             acceptor.start()
             logger.debug(
@@ -128,6 +128,8 @@ class BaseTcpServerHandler(Work[T]):
         HTTP protocol plugins."""
         conn = self._optionally_wrap_socket(self.work.connection)
         conn.setblocking(False)
+        # Data can be queued for client outside of handle_events
+        self.work.on_queued = self.events_changed
         logger.debug('Handling connection %s' % self.work.address)
 
     @abstractmethod
@@ -39,6 +39,8 @@ class BaseTcpTunnelHandler(BaseTcpServerHandler[TcpClientConnection]):
         self.request = HttpParser(
             httpParserTypes.REQUEST_PARSER,
             enable_proxy_protocol=self.flags.enable_proxy_protocol,
+            max_header_size=self.flags.max_header_size,
+            max_headers=self.flags.max_headers,
         )
         self.upstream: Optional[TcpServerConnection] = None
 
@@ -14,6 +14,7 @@ from typing import Optional
 from .types import tcpConnectionTypes
 from .connection import TcpConnection, TcpConnectionUninitializedException
 from ...common.types import HostPort, TcpOrTlsSocket
+from ...common.utils import ssl_context
 
 
 class TcpClientConnection(TcpConnection):
@@ -39,14 +40,48 @@ class TcpClientConnection(TcpConnection):
             raise TcpConnectionUninitializedException()
         return self._conn
 
-    def wrap(self, keyfile: str, certfile: str) -> None:
+    def wrap(
+            self,
+            keyfile: Optional[str] = None,
+            certfile: Optional[str] = None,
+            do_handshake: bool = True,
+            context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        """Wraps client connection with TLS.
+
+        Either keyfile and certfile or a ready made ``context``, with
+        certificate chain already loaded, must be provided.
+
+        When ``do_handshake`` is False, pending buffer must already be
+        flushed and callers must drive the handshake using ``handshake``."""
+        assert context is not None or (keyfile and certfile)
+        if not do_handshake:
+            assert not self.has_buffer()
+            ctx = context or ssl_context(
+                ssl.Purpose.CLIENT_AUTH,
+                certfile=certfile,
+                keyfile=keyfile,
+                verify_mode=ssl.CERT_NONE,
+            )
+            self._conn = ctx.wrap_socket(
+                self.connection,
+                server_side=True,
+                do_handshake_on_connect=False,
+            )
+            return
         self.connection.setblocking(True)
         self.flush()
-        self._conn = ssl.wrap_socket(
-            self.connection,
-            server_side=True,
-            certfile=certfile,
-            keyfile=keyfile,
-            ssl_version=ssl.PROTOCOL_TLS,
-        )
+        if context is not None:
+            self._conn = context.wrap_socket(
+                self.connection,
+                server_side=True,
+            )
+        else:
+            self._conn = ssl.wrap_socket(
+                self.connection,
+                server_side=True,
+                certfile=certfile,
+                keyfile=keyfile,
+                ssl_version=ssl.PROTOCOL_TLS,
+            )
         self.connection.setblocking(False)
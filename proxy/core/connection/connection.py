@@ -8,18 +8,39 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import ssl
+import socket
 import logging
+import selectors
+import threading
+import collections
 from abc import ABC, abstractmethod
-from typing import List, Union, Optional
+from typing import List, Deque, Union, Callable, Optional
 
 from .types import tcpConnectionTypes
 from ...common.types import TcpOrTlsSocket
-from ...common.constants import DEFAULT_BUFFER_SIZE, DEFAULT_MAX_SEND_SIZE
+from ...common.constants import (
+    DEFAULT_BUFFER_SIZE, DEFAULT_MAX_SEND_SIZE, DEFAULT_MAX_SEND_BUFFERS,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+# Per thread scratch buffer used for receiving data.  Executors
+# run one event loop per thread, hence a single buffer per thread
+# can be shared across all of its connections.
+_scratch = threading.local()
+
+
+def _scratch_buffer(size: int) -> memoryview:
+    buffer: Optional[memoryview] = getattr(_scratch, 'buffer', None)
+    if buffer is None or len(buffer) < size:
+        buffer = memoryview(bytearray(size))
+        _scratch.buffer = buffer
+    return buffer
+
+
 class TcpConnectionUninitializedException(Exception):
     pass
 
@@ -36,10 +57,12 @@ class TcpConnection(ABC):
 
     def __init__(self, tag: int) -> None:
         self.tag: str = 'server' if tag == tcpConnectionTypes.SERVER else 'client'
-        self.buffer: List[memoryview] = []
+        self.buffer: Deque[memoryview] = collections.deque()
         self.closed: bool = False
         self._reusable: bool = False
         self._num_buffer = 0
+        # Invoked when data is queued into an empty buffer
+        self.on_queued: Optional[Callable[[], None]] = None
 
     @property
     @abstractmethod
@@ -56,9 +79,20 @@ class TcpConnection(ABC):
             self, buffer_size: int = DEFAULT_BUFFER_SIZE,
     ) -> Optional[memoryview]:
         """Users must handle socket.error exceptions"""
-        data: bytes = self.connection.recv(buffer_size)
-        if len(data) == 0:
-            return None
+        conn = self.connection
+        if isinstance(conn, socket.socket):
+            # Receive into the scratch buffer and only copy out
+            # what was received, instead of allocating buffer_size
+            # bytes for every read.
+            scratch = _scratch_buffer(buffer_size)
+            size = conn.recv_into(scratch, buffer_size)
+            if size == 0:
+                return None
+            data = scratch[:size].tobytes()
+        else:
+            data = conn.recv(buffer_size)
+            if len(data) == 0:
+                return None
         logger.debug(
             'received %d bytes from %s' %
             (len(data), self.tag),
@@ -66,6 +100,22 @@ class TcpConnection(ABC):
         # logger.info(data)
         return memoryview(data)
 
+    def handshake(self) -> Optional[int]:
+        """Performs next step of a non-blocking TLS handshake.
+
+        Returns selector event the handshake is waiting for, or None
+        once handshake has completed.  Raises ``ssl.SSLError`` and
+        ``OSError`` when handshake fails."""
+        conn = self.connection
+        assert isinstance(conn, ssl.SSLSocket)
+        try:
+            conn.do_handshake()
+        except ssl.SSLWantReadError:
+            return selectors.EVENT_READ
+        except ssl.SSLWantWriteError:
+            return selectors.EVENT_WRITE
+        return None
+
     def close(self) -> bool:
         if not self.closed:
             self.connection.close()
@@ -78,25 +128,64 @@ class TcpConnection(ABC):
     def queue(self, mv: memoryview) -> None:
         self.buffer.append(mv)
         self._num_buffer += 1
+        if self._num_buffer == 1 and self.on_queued is not None:
+            self.on_queued()
 
     def flush(self, max_send_size: Optional[int] = None) -> int:
         """Users must handle BrokenPipeError exceptions"""
         if not self.has_buffer():
             return 0
-        mv = self.buffer[0]
-        # TODO: Assemble multiple packets if total
-        # size remains below max send size.
         max_send_size = max_send_size or DEFAULT_MAX_SEND_SIZE
-        sent: int = self.send(mv[:max_send_size])
-        if sent == len(mv):
-            self.buffer.pop(0)
-            self._num_buffer -= 1
+        if self._num_buffer == 1 or not self._can_sendmsg():
+            mv = self.buffer[0]
+            sent: int = self.send(mv[:max_send_size])
+            if sent == len(mv):
+                self.buffer.popleft()
+                self._num_buffer -= 1
+            else:
+                self.buffer[0] = mv[sent:]
+            del mv
         else:
-            self.buffer[0] = mv[sent:]
-        del mv
+            # Gather as many queued buffers as fit within
+            # max_send_size into a single syscall.
+            sent = self.connection.sendmsg(self._gather(max_send_size))
+            self._consume(sent)
         logger.debug('flushed %d bytes to %s' % (sent, self.tag))
         return sent
 
+    def _can_sendmsg(self) -> bool:
+        # SSLSocket doesn't support sendmsg, neither
+        # do sockets on all platforms e.g. Windows.
+        return hasattr(socket.socket, 'sendmsg') and \
+            not isinstance(self.connection, ssl.SSLSocket)
+
+    def _gather(self, max_send_size: int) -> List[memoryview]:
+        """Returns queued buffers which fit within max_send_size."""
+        views: List[memoryview] = []
+        size = 0
+        for mv in self.buffer:
+            if size + len(mv) > max_send_size:
+                if not views:
+                    views.append(mv[:max_send_size])
+                break
+            views.append(mv)
+            size += len(mv)
+            if len(views) == DEFAULT_MAX_SEND_BUFFERS:
+                break
+        return views
+
+    def _consume(self, sent: int) -> None:
+        """Drops sent bytes from the buffer."""
+        while self._num_buffer:
+            mv = self.buffer[0]
+            if sent < len(mv):
+                if sent:
+                    self.buffer[0] = mv[sent:]
+                return
+            self.buffer.popleft()
+            self._num_buffer -= 1
+            sent -= len(mv)
+
     def is_reusable(self) -> bool:
         return self._reusable
 
@@ -106,5 +195,5 @@ class TcpConnection(ABC):
     def reset(self) -> None:
         assert not self.closed
         self._reusable = True
-        self.buffer = []
+        self.buffer.clear()
         self._num_buffer = 0
@@ -8,13 +8,18 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import os
 import ssl
+import socket
 from typing import Optional
 
 from .types import tcpConnectionTypes
 from .connection import TcpConnection, TcpConnectionUninitializedException
 from ...common.types import HostPort, TcpOrTlsSocket
-from ...common.utils import new_socket_connection
+from ...common.utils import (
+    ssl_context, new_socket_connection, start_socket_connection,
+)
+from ...common.constants import DEFAULT_TIMEOUT
 
 
 class TcpServerConnection(TcpConnection):
@@ -25,6 +30,8 @@ class TcpServerConnection(TcpConnection):
         self._conn: Optional[TcpOrTlsSocket] = None
         self.addr: HostPort = (host, port)
         self.closed = True
+        # True while a non-blocking connection attempt is in progress
+        self.connecting = False
 
     @property
     def connection(self) -> TcpOrTlsSocket:
@@ -36,13 +43,37 @@ class TcpServerConnection(TcpConnection):
             self,
             addr: Optional[HostPort] = None,
             source_address: Optional[HostPort] = None,
+            non_blocking: bool = False,
+            timeout: float = DEFAULT_TIMEOUT,
     ) -> None:
+        """Connects to the upstream server.
+
+        When ``non_blocking`` is True, connection attempt is only initiated.
+        Callers must then wait for the connection to become write ready
+        and call ``finish_connect`` to know the outcome.  ``timeout``
+        only applies to blocking connection attempts."""
         assert self._conn is None
-        self._conn = new_socket_connection(
-            addr or self.addr, source_address=source_address,
-        )
+        if non_blocking:
+            self._conn = start_socket_connection(
+                addr or self.addr, source_address=source_address,
+            )
+            self.connecting = True
+        else:
+            self._conn = new_socket_connection(
+                addr or self.addr, timeout=timeout,
+                source_address=source_address,
+            )
         self.closed = False
 
+    def finish_connect(self) -> None:
+        """Completes a non-blocking connection attempt.
+
+        Raises OSError if connection attempt has failed."""
+        err = self.connection.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err != 0:
+            raise OSError(err, os.strerror(err))
+        self.connecting = False
+
     def wrap(
             self,
             hostname: Optional[str] = None,
@@ -50,14 +81,26 @@ class TcpServerConnection(TcpConnection):
             as_non_blocking: bool = False,
             # Ref https://github.com/PyCQA/pylint/issues/3691
             verify_mode: ssl.VerifyMode = ssl.VerifyMode.CERT_REQUIRED,     # pylint: disable=E1101
+            do_handshake: bool = True,
     ) -> None:
-        ctx = ssl.create_default_context(
+        """Wraps upstream connection with TLS.
+
+        When ``do_handshake`` is False, socket is left non-blocking and
+        callers must drive the handshake using ``handshake``."""
+        ctx = ssl_context(
             ssl.Purpose.SERVER_AUTH,
             cafile=ca_file,
+            verify_mode=verify_mode,
+            check_hostname=hostname is not None,
         )
-        ctx.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3 | ssl.OP_NO_TLSv1 | ssl.OP_NO_TLSv1_1
-        ctx.check_hostname = hostname is not None
-        ctx.verify_mode = verify_mode
+        if not do_handshake:
+            self.connection.setblocking(False)
+            self._conn = ctx.wrap_socket(
+                self.connection,
+                server_hostname=hostname,
+                do_handshake_on_connect=False,
+            )
+            return
         self.connection.setblocking(True)
         self._conn = ctx.wrap_socket(
             self.connection,
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import logging
+from typing import List, Tuple
+
+from ...common.types import Readables, Writables
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Direction:
+    """Moves bytes from src to dst through a kernel pipe."""
+
+    def __init__(self, src: int, dst: int, max_size: int) -> None:
+        self.src = src
+        self.dst = dst
+        self.max_size = max_size
+        self.read_end, self.write_end = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        # Number of bytes sitting in the pipe
+        self.pending = 0
+        self.total = 0
+        # Number of bytes moved out of the pipe
+        self.sent = 0
+        self.eof = False
+
+    def fill(self) -> None:
+        try:
+            size = os.splice(
+                self.src, self.write_end, self.max_size,
+                flags=os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK,
+            )
+        except BlockingIOError:
+            return
+        if size == 0:
+            self.eof = True
+        self.pending += size
+        self.total += size
+
+    def drain(self) -> None:
+        while self.pending > 0:
+            try:
+                size = os.splice(
+                    self.read_end, self.dst, self.pending,
+                    flags=os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK,
+                )
+            except BlockingIOError:
+                return
+            self.pending -= size
+            self.sent += size
+
+    def close(self) -> None:
+        os.close(self.read_end)
+        os.close(self.write_end)
+
+
+class SpliceRelay:
+    """Relays bytes between two connected sockets using ``splice(2)``.
+
+    Bytes are moved from one socket into a kernel pipe and from
+    the pipe into the other socket, without ever being copied into
+    userspace.  Only byte counts are available to the caller.
+
+    Linux only, requires Python 3.10+.  Sockets must be non-blocking.
+    """
+
+    def __init__(self, client: int, upstream: int, max_size: int) -> None:
+        self.upstream = _Direction(client, upstream, max_size)
+        self.downstream = _Direction(upstream, client, max_size)
+
+    @staticmethod
+    def is_available() -> bool:
+        return hasattr(os, 'splice')
+
+    @property
+    def client_bytes(self) -> int:
+        """Bytes relayed from client to upstream."""
+        return self.upstream.total
+
+    @property
+    def upstream_bytes(self) -> int:
+        """Bytes relayed from upstream to client."""
+        return self.downstream.total
+
+    @property
+    def spliced_bytes(self) -> int:
+        """Bytes spliced into and out of pipes in either direction.
+
+        Grows whenever relay makes progress, even when one side
+        only drains bytes received earlier."""
+        return sum(
+            d.total + d.sent
+            for d in (self.upstream, self.downstream)
+        )
+
+    def get_descriptors(self) -> Tuple[List[int], List[int]]:
+        r: List[int] = []
+        w: List[int] = []
+        for direction in (self.upstream, self.downstream):
+            # Don't read more until pipe has been drained
+            if direction.pending > 0:
+                w.append(direction.dst)
+            elif not direction.eof:
+                r.append(direction.src)
+        return r, w
+
+    def write_to_descriptors(self, w: Writables) -> None:
+        for direction in (self.upstream, self.downstream):
+            if direction.pending > 0 and direction.dst in w:
+                direction.drain()
+
+    def read_from_descriptors(self, r: Readables) -> bool:
+        """Returns True once either side has closed and
+        all bytes received from it have been relayed."""
+        for direction in (self.upstream, self.downstream):
+            if direction.pending == 0 and direction.src in r:
+                direction.fill()
+                # Most of the time destination is write ready
+                direction.drain()
+        return any(
+            d.eof and d.pending == 0
+            for d in (self.upstream, self.downstream)
+        )
+
+    def close(self) -> None:
+        self.upstream.close()
+        self.downstream.close()
@@ -12,10 +12,10 @@ import socket
 import logging
 import argparse
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, Tuple, Optional
 
 from ...common.flag import flags
-from ...common.constants import DEFAULT_BACKLOG
+from ...common.constants import DEFAULT_BACKLOG, DEFAULT_MAX_ACCEPTS_PER_WAKEUP
 
 
 flags.add_argument(
@@ -25,6 +25,15 @@ flags.add_argument(
     help='Default: 100. Maximum number of pending connections to proxy server.',
 )
 
+flags.add_argument(
+    '--max-accepts-per-wakeup',
+    type=int,
+    default=DEFAULT_MAX_ACCEPTS_PER_WAKEUP,
+    help='Default: ' + str(DEFAULT_MAX_ACCEPTS_PER_WAKEUP) + '.  ' +
+    'Maximum number of connections accepted each time listening sockets '
+    'are ready.  Accepted connections are dispatched as a batch.',
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,6 +65,10 @@ class BaseListener(ABC):
     def setup(self) -> None:
         self._socket = self.listen()
 
+    def accept(self) -> Tuple[socket.socket, Any]:
+        assert self._socket
+        return self._socket.accept()
+
     def shutdown(self) -> None:
         assert self._socket
         self._socket.close()
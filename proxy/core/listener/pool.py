@@ -21,10 +21,14 @@ if TYPE_CHECKING:   # pragma: no cover
 
 class ListenerPool:
     """Provides abstraction around starting multiple listeners
-    based upon flags."""
+    based upon flags.
 
-    def __init__(self, flags: argparse.Namespace) -> None:
+    When ``bind_only`` is True, tcp listeners only reserve their
+    ports.  See ``--enable-reuseport``."""
+
+    def __init__(self, flags: argparse.Namespace, bind_only: bool = False) -> None:
         self.flags = flags
+        self.bind_only = bind_only
         self.pool: List['BaseListener'] = []
 
     def __enter__(self) -> 'ListenerPool':
@@ -38,9 +42,9 @@ class ListenerPool:
         if self.flags.unix_socket_path:
             self.add(UnixSocketListener)
         else:
-            self.add(TcpSocketListener)
+            self.add(TcpSocketListener, bind_only=self.bind_only)
         for port in self.flags.ports:
-            self.add(TcpSocketListener, port=port)
+            self.add(TcpSocketListener, port=port, bind_only=self.bind_only)
 
     def shutdown(self) -> None:
         for listener in self.pool:
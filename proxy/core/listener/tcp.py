@@ -16,6 +16,7 @@ from .base import BaseListener
 from ...common.flag import flags
 from ...common.constants import (
     DEFAULT_PORT, DEFAULT_PORT_FILE, DEFAULT_IPV4_HOSTNAME,
+    DEFAULT_ENABLE_REUSEPORT,
 )
 
 
@@ -48,16 +49,37 @@ flags.add_argument(
     help='Default: None. Save server port numbers. Useful when using --port=0 ephemeral mode.',
 )
 
+flags.add_argument(
+    '--enable-reuseport',
+    action='store_true',
+    default=DEFAULT_ENABLE_REUSEPORT,
+    help='Default: ' + ('True' if DEFAULT_ENABLE_REUSEPORT else 'False') + '.  ' +
+    'Linux only.  Applicable only with --threadless and --local-executor 0.  ' +
+    'Each executor listens upon its own SO_REUSEPORT socket and accepts ' +
+    'connections directly, letting the kernel balance new connections.  ' +
+    'Acceptors are not started in this mode.',
+)
+
 logger = logging.getLogger(__name__)
 
 
 class TcpSocketListener(BaseListener):
     """Tcp listener."""
 
-    def __init__(self, *args: Any, port: Optional[int] = None, **kwargs: Any) -> None:
+    def __init__(
+            self,
+            *args: Any,
+            port: Optional[int] = None,
+            bind_only: bool = False,
+            **kwargs: Any,
+    ) -> None:
         # Port if passed will be used, otherwise
         # flag port value will be used.
         self.port = port
+        # When True, socket is only bound to reserve the port.
+        # Used with --enable-reuseport where executors
+        # listen upon the same port using their own socket.
+        self.bind_only = bind_only
         # Set after binding to a port.
         #
         # Stored here separately for ephemeral port discovery.
@@ -70,13 +92,21 @@ class TcpSocketListener(BaseListener):
             socket.SOCK_STREAM,
         )
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.flags.enable_reuseport:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         # s.setsockopt(socket.SOL_TCP, socket.TCP_FASTOPEN, 5)
         port = self.port if self.port is not None else self.flags.port
         sock.bind((str(self.flags.hostname), port))
-        sock.listen(self.flags.backlog)
         sock.setblocking(False)
         self._port = sock.getsockname()[1]
+        if self.bind_only:
+            logger.debug(
+                'Reserved %s:%s' %
+                (self.flags.hostname, self._port),
+            )
+            return sock
+        sock.listen(self.flags.backlog)
         logger.info(
             'Listening on %s:%s' %
             (self.flags.hostname, self._port),
@@ -11,7 +11,7 @@
 import os
 import struct
 import logging
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 
 from .pretty import pretty_hexlify
 
@@ -43,6 +43,9 @@ class TlsClientHello:
         self.cipher_suite: Optional[bytes] = None
         self.compression_method: Optional[bytes] = None
         self.extension: Optional[bytes] = None
+        # Parsed out of extension
+        self.server_name: Optional[str] = None
+        self.alpn_protocols: List[bytes] = []
 
     def parse(self, raw: bytes) -> Tuple[bool, bytes]:
         try:
@@ -71,11 +74,42 @@ class TlsClientHello:
                 extension_length, = struct.unpack('!H', raw[idx: idx + 2])
                 self.extension = raw[idx: idx + 2 + extension_length]
                 idx += 2 + extension_length
+                self.parse_extension(self.extension[2:])
             return True, raw[idx:]
         except Exception as e:
             logger.exception(e)
             return False, raw
 
+    def parse_extension(self, raw: bytes) -> None:
+        """Parses server name (SNI) and ALPN extensions.
+
+        References
+
+        https://datatracker.ietf.org/doc/html/rfc6066#section-3
+        https://datatracker.ietf.org/doc/html/rfc7301#section-3.1
+        """
+        idx = 0
+        while idx + 4 <= len(raw):
+            ext_type, ext_length = struct.unpack('!HH', raw[idx: idx + 4])
+            data = raw[idx + 4: idx + 4 + ext_length]
+            idx += 4 + ext_length
+            if ext_type == 0:
+                # server_name_list of (name_type, host_name) entries
+                pos = 2
+                while pos + 3 <= len(data):
+                    name_type = data[pos]
+                    name_length, = struct.unpack('!H', data[pos + 1: pos + 3])
+                    if name_type == 0:
+                        self.server_name = data[pos + 3: pos + 3 + name_length].decode('ascii')
+                        break
+                    pos += 3 + name_length
+            elif ext_type == 16:
+                # protocol_name_list of length prefixed names
+                pos = 2
+                while pos < len(data):
+                    self.alpn_protocols.append(data[pos + 1: pos + 1 + data[pos]])
+                    pos += 1 + data[pos]
+
     def build(self) -> bytes:
         # calculate length
         return b''.join([
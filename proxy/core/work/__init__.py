@@ -16,9 +16,10 @@ from .pool import ThreadlessPool
 from .work import Work
 from .local import BaseLocalExecutor
 from .remote import BaseRemoteExecutor
-from .delegate import delegate_work_to_pool
+from .delegate import delegate_work_to_pool, delegate_works_to_pool
 from .threaded import start_threaded_work
 from .threadless import Threadless
+from .selector import EventLoopSelector
 
 
 __all__ = [
@@ -26,7 +27,9 @@ __all__ = [
     'Threadless',
     'ThreadlessPool',
     'delegate_work_to_pool',
+    'delegate_works_to_pool',
     'start_threaded_work',
     'BaseLocalExecutor',
     'BaseRemoteExecutor',
+    'EventLoopSelector',
 ]
@@ -8,18 +8,23 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
-from typing import TYPE_CHECKING, Optional
-from multiprocessing.reduction import send_handle
+import socket
+from typing import TYPE_CHECKING, List, Tuple, Optional
+from multiprocessing.reduction import sendfds
 
 
 if TYPE_CHECKING:   # pragma: no cover
-    import socket
     import multiprocessing
     from multiprocessing import connection
 
     from ...common.types import HostPort
 
 
+# Maximum number of descriptors which can be passed
+# in a single SCM_RIGHTS message (SCM_MAX_FD on Linux).
+MAX_FDS_PER_MESSAGE = 253
+
+
 def delegate_work_to_pool(
         worker_pid: int,
         work_queue: 'connection.Connection',
@@ -29,15 +34,40 @@ def delegate_work_to_pool(
         unix_socket_path: Optional[str] = None,
 ) -> None:
     """Utility method to delegate a work to threadless executor pool."""
-    with work_lock:
-        # Accepted client address is empty string for
-        # unix socket domain, avoid sending empty string
-        # for optimization.
-        if not unix_socket_path:
-            work_queue.send(addr)
-        send_handle(
-            work_queue,
-            conn.fileno(),
-            worker_pid,
-        )
+    delegate_works_to_pool(
+        worker_pid,
+        work_queue,
+        work_lock,
+        [(conn, addr)],
+        unix_socket_path=unix_socket_path,
+    )
+
+
+def delegate_works_to_pool(
+        worker_pid: int,
+        work_queue: 'connection.Connection',
+        work_lock: 'multiprocessing.synchronize.Lock',
+        works: List[Tuple['socket.socket', Optional['HostPort']]],
+        unix_socket_path: Optional[str] = None,
+) -> None:
+    """Utility method to delegate a batch of works to threadless executor pool.
+
+    Each message consists of a header followed by all the descriptors
+    passed using a single ``sendmsg`` call.  Header contains accepted
+    client addresses.  For unix socket domain, header only contains
+    the number of descriptors that follow."""
+    with work_lock, socket.fromfd(
+            work_queue.fileno(), socket.AF_UNIX, socket.SOCK_STREAM,
+    ) as sock:
+        for i in range(0, len(works), MAX_FDS_PER_MESSAGE):
+            batch = works[i:i + MAX_FDS_PER_MESSAGE]
+            # Accepted client address is empty string for
+            # unix socket domain, avoid sending empty string
+            # for optimization.
+            if not unix_socket_path:
+                work_queue.send([addr for _, addr in batch])
+            else:
+                work_queue.send(len(batch))
+            sendfds(sock, [conn.fileno() for conn, _ in batch])
+    for conn, _ in works:
         conn.close()
@@ -10,13 +10,16 @@
 """
 import socket
 import logging
-from typing import Any, TypeVar, Optional
+from typing import TYPE_CHECKING, Any, TypeVar, Optional
 
 from ...event import eventNames
 from ..threadless import Threadless
 from ....common.types import HostPort, TcpOrTlsSocket
 
 
+if TYPE_CHECKING:   # pragma: no cover
+    from ...listener.base import BaseListener
+
 T = TypeVar('T')
 
 logger = logging.getLogger(__name__)
@@ -50,3 +53,15 @@ class ThreadlessFdExecutor(Threadless[T]):
                 exc_info=e,
             )
             self._cleanup(fileno)
+
+    def accept(self, listener: 'BaseListener') -> None:
+        for _ in range(self.flags.max_accepts_per_wakeup):
+            try:
+                conn, addr = listener.accept()
+            except BlockingIOError:
+                # Drained, or accepted by another executor
+                break
+            logger.debug('Accepting new work#{0}'.format(conn.fileno()))
+            # Accepted descriptor is owned by this executor,
+            # just like descriptors received over the work queue.
+            self.work(conn.detach(), addr or None, None)
@@ -9,8 +9,8 @@
     :license: BSD, see LICENSE for more details.
 """
 import queue
+import socket
 import asyncio
-import contextlib
 from typing import Any, Optional
 
 from .fd import ThreadlessFdExecutor
@@ -18,11 +18,19 @@ from ....common.backports import NonBlockingQueue
 
 
 class LocalFdExecutor(ThreadlessFdExecutor[NonBlockingQueue]):
-    """A threadless executor implementation which uses a queue to receive new work."""
+    """A threadless executor implementation which uses a queue to receive new work.
+
+    Producers must call ``wakeup`` after putting work into the queue.
+    Executor watches a wakeup descriptor for readability, hence new
+    work is picked up immediately instead of on next select timeout.
+    """
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
 
     @property
     def loop(self) -> Optional[asyncio.AbstractEventLoop]:
@@ -31,15 +39,39 @@ class LocalFdExecutor(ThreadlessFdExecutor[NonBlockingQueue]):
         return self._loop
 
     def work_queue_fileno(self) -> Optional[int]:
-        return None
+        return self._wakeup_r.fileno()
+
+    def close_work_queue(self) -> None:
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def wakeup(self) -> None:
+        """Signals executor that new work has been queued.
+
+        Call once after putting a batch of works into the queue."""
+        try:
+            self._wakeup_w.send(b'\x00')
+        except OSError:
+            # Either wakeup buffer is full i.e. executor is
+            # already signaled or executor has shutdown.
+            pass
 
     def receive_from_work_queue(self) -> bool:
-        with contextlib.suppress(queue.Empty):
-            work = self.work_queue.get()
+        # Drain wakeup signals before the queue, so that works
+        # queued after the queue is drained signal us again.
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                work = self.work_queue.get()
+            except queue.Empty:
+                return False
             if isinstance(work, bool) and work is False:
                 return True
             self.initialize(work)
-        return False
 
     def initialize(self, work: Any) -> None:
         assert isinstance(work, tuple)
@@ -8,20 +8,27 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import os
+import socket
 import asyncio
-from typing import Any, Optional
+from typing import Any, List, Optional
 from multiprocessing import connection
-from multiprocessing.reduction import recv_handle
+from multiprocessing.reduction import recvfds
 
 from .fd import ThreadlessFdExecutor
+from ...listener import ListenerPool
 
 
 class RemoteFdExecutor(ThreadlessFdExecutor[connection.Connection]):
     """A threadless executor implementation which receives work over a connection.
 
-    NOTE: RemoteExecutor uses ``recv_handle`` to accept file descriptors.
+    NOTE: RemoteExecutor uses ``recvfds`` to accept a batch of file descriptors
+    sent by :func:`~proxy.core.work.delegate.delegate_works_to_pool`.
 
-    TODO: Refactor and abstract ``recv_handle`` part so that a threaded
+    With ``--enable-reuseport``, RemoteExecutor also listens upon
+    its own ``SO_REUSEPORT`` sockets and accepts work directly.
+
+    TODO: Refactor and abstract ``recvfds`` part so that a threaded
     remote executor can also accept work over a connection.  Currently,
     remote executors must be running in a process.
     """
@@ -33,21 +40,35 @@ class RemoteFdExecutor(ThreadlessFdExecutor[connection.Connection]):
     @property
     def loop(self) -> Optional[asyncio.AbstractEventLoop]:
         if self._loop is None:
-            self._loop = asyncio.get_event_loop_policy().get_event_loop()
+            self._loop = asyncio.get_event_loop_policy().new_event_loop()
         return self._loop
 
     def receive_from_work_queue(self) -> bool:
-        # Acceptor will not send address for
-        # unix socket domain environments.
-        addr = None
-        if not self.flags.unix_socket_path:
-            addr = self.work_queue.recv()
-        fileno = recv_handle(self.work_queue)
-        self.work(fileno, addr, None)
+        # Acceptor will only send number of descriptors
+        # for unix socket domain environments.
+        header = self.work_queue.recv()
+        addrs: List[Any] = [None] * header \
+            if isinstance(header, int) else header
+        with socket.fromfd(
+                self.work_queue.fileno(), socket.AF_UNIX, socket.SOCK_STREAM,
+        ) as sock:
+            filenos = recvfds(sock, len(addrs))
+        for fileno, addr in zip(filenos, addrs):
+            self.work(fileno, addr, None)
         return False
 
+    def create_listeners(self) -> Optional['ListenerPool']:
+        if not self.flags.enable_reuseport:
+            return None
+        listeners = ListenerPool(flags=self.flags)
+        listeners.setup()
+        return listeners
+
     def work_queue_fileno(self) -> Optional[int]:
         return self.work_queue.fileno()
 
     def close_work_queue(self) -> None:
         self.work_queue.close()
+
+    def close_work(self, work_id: int) -> None:
+        os.close(work_id)
@@ -81,6 +81,11 @@ class ThreadlessPool:
         self.work_queues: List[connection.Connection] = []
         self.work_pids: List[int] = []
         self.work_locks: List['multiprocessing.synchronize.Lock'] = []
+        # Number of live works per threadless worker,
+        # published by workers in shared memory.
+        self.work_loads: Any = multiprocessing.Array(
+            'i', self.flags.num_workers, lock=False,
+        )
         # List of threadless workers
         self._executor_klass = executor_klass
         # FIXME: Instead of Any type must be the executor klass
@@ -125,6 +130,7 @@ class ThreadlessPool:
             work_queue=pipe[1],
             flags=self.flags,
             event_queue=self.event_queue,
+            work_loads=self.work_loads,
         )
         self._workers.append(w)
         p = multiprocessing.Process(target=w.run)
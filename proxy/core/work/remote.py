@@ -8,6 +8,7 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import os
 import asyncio
 from typing import Any, Optional
 from multiprocessing import connection
@@ -25,7 +26,7 @@ class BaseRemoteExecutor(Threadless[connection.Connection]):
     @property
     def loop(self) -> Optional[asyncio.AbstractEventLoop]:
         if self._loop is None:
-            self._loop = asyncio.get_event_loop_policy().get_event_loop()
+            self._loop = asyncio.get_event_loop_policy().new_event_loop()
         return self._loop
 
     def work_queue_fileno(self) -> Optional[int]:
@@ -34,6 +35,9 @@ class BaseRemoteExecutor(Threadless[connection.Connection]):
     def close_work_queue(self) -> None:
         self.work_queue.close()
 
+    def close_work(self, work_id: int) -> None:
+        os.close(work_id)
+
     def receive_from_work_queue(self) -> bool:
         self.work(self.work_queue.recv())
         return False
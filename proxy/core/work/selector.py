@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import types
+import asyncio
+import selectors
+from typing import Any, Set, Dict, List, Tuple, Mapping, Optional
+
+
+class EventLoopSelector(selectors.BaseSelector):
+    """A selector which delegates readiness notifications to the event loop.
+
+    Registered descriptors are watched using ``loop.add_reader`` and
+    ``loop.add_writer``.  Instead of polling ``select`` with a timeout,
+    callers ``await wait()`` which returns as soon as one of the
+    registered descriptors is ready.  This keeps the event loop free
+    to run other coroutines while there is no IO.
+
+    ``select`` never blocks and only returns events collected so far.
+
+    NOTE: Event loops watch descriptors in level-triggered mode and
+    a readiness callback can fire again before the work had a chance
+    to consume the data.  Hence, descriptors are watched in one-shot
+    mode i.e. a descriptor is disarmed once reported ready and re-armed
+    on the next ``wait`` call.  Readiness recorded before ``wait``
+    may already be consumed by the work, hence it is discarded.
+    Descriptors which are still ready get reported again.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._map: Dict[int, selectors.SelectorKey] = {}
+        self._ready: Dict[int, int] = {}
+        self._armed: Dict[int, int] = {}
+        self._disarmed: Set[int] = set()
+        self._waiter: Optional['asyncio.Future[None]'] = None
+        self._wakeup_pending = False
+
+    def register(
+            self,
+            fileobj: Any,
+            events: int,
+            data: Any = None,
+    ) -> selectors.SelectorKey:
+        if (not events) or (events & ~(selectors.EVENT_READ | selectors.EVENT_WRITE)):
+            raise ValueError('Invalid events: {0!r}'.format(events))
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        if fd in self._map:
+            raise KeyError('{0!r} (FD {1}) is already registered'.format(fileobj, fd))
+        key = selectors.SelectorKey(fileobj, fd, events, data)
+        self._map[fd] = key
+        self._arm(fd, events)
+        return key
+
+    def unregister(self, fileobj: Any) -> selectors.SelectorKey:
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        key = self._map.pop(fd)
+        self._ready.pop(fd, None)
+        self._disarmed.discard(fd)
+        self._arm(fd, 0)
+        return key
+
+    def modify(
+            self,
+            fileobj: Any,
+            events: int,
+            data: Any = None,
+    ) -> selectors.SelectorKey:
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        if fd not in self._map:
+            raise KeyError('{0!r} is not registered'.format(fileobj))
+        key = selectors.SelectorKey(fileobj, fd, events, data)
+        self._map[fd] = key
+        self._disarmed.discard(fd)
+        self._arm(fd, events)
+        return key
+
+    def select(
+            self,
+            timeout: Optional[float] = None,
+    ) -> List[Tuple[selectors.SelectorKey, int]]:
+        ready = []
+        for fd, mask in self._ready.items():
+            key = self._map.get(fd)
+            if key is not None and mask & key.events:
+                ready.append((key, mask & key.events))
+        self._ready.clear()
+        return ready
+
+    async def wait(
+            self,
+            timeout: Optional[float] = None,
+    ) -> List[Tuple[selectors.SelectorKey, int]]:
+        """Waits until a registered descriptor is ready,
+        ``wakeup`` is called or timeout has elapsed."""
+        self._ready.clear()
+        for fd in self._disarmed:
+            self._arm(fd, self._map[fd].events)
+        self._disarmed.clear()
+        if not self._wakeup_pending:
+            self._waiter = self._loop.create_future()
+            handle = None
+            if timeout is not None:
+                handle = self._loop.call_later(timeout, self._notify)
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+                if handle is not None:
+                    handle.cancel()
+        self._wakeup_pending = False
+        return self.select()
+
+    def wakeup(self, *_args: Any) -> None:
+        """Wakes up current or next ``wait`` call."""
+        if not self._notify():
+            self._wakeup_pending = True
+
+    def close(self) -> None:
+        for fd in list(self._map):
+            self.unregister(fd)
+
+    def get_map(self) -> Mapping[Any, selectors.SelectorKey]:
+        return types.MappingProxyType(self._map)
+
+    def _notify(self) -> bool:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+            return True
+        return False
+
+    def _on_ready(self, fd: int, mask: int) -> None:
+        self._ready[fd] = self._ready.get(fd, 0) | mask
+        # Disarming also cancels callbacks already
+        # scheduled by the event loop for this descriptor
+        self._arm(fd, self._armed.get(fd, 0) & ~mask)
+        self._disarmed.add(fd)
+        self._notify()
+
+    def _arm(self, fd: int, new: int) -> None:
+        old = self._armed.pop(fd, 0)
+        if new:
+            self._armed[fd] = new
+        if new & selectors.EVENT_READ and not old & selectors.EVENT_READ:
+            self._loop.add_reader(fd, self._on_ready, fd, selectors.EVENT_READ)
+        elif old & selectors.EVENT_READ and not new & selectors.EVENT_READ:
+            self._remove(self._loop.remove_reader, fd)
+        if new & selectors.EVENT_WRITE and not old & selectors.EVENT_WRITE:
+            self._loop.add_writer(fd, self._on_ready, fd, selectors.EVENT_WRITE)
+        elif old & selectors.EVENT_WRITE and not new & selectors.EVENT_WRITE:
+            self._remove(self._loop.remove_writer, fd)
+
+    @staticmethod
+    def _remove(remove: Any, fd: int) -> None:
+        # Descriptor may already be closed by the work
+        try:
+            remove(fd)
+        except (OSError, ValueError):     # pragma: no cover
+            pass
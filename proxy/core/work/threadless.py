@@ -8,35 +8,62 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
-import os
+import time
 import asyncio
 import logging
 import argparse
+import functools
 import selectors
+import collections
 import multiprocessing
 from abc import ABC, abstractmethod
 from typing import (
-    TYPE_CHECKING, Any, Set, Dict, List, Tuple, Generic, TypeVar, Optional,
-    cast,
+    TYPE_CHECKING, Any, Set, Dict, Deque, Tuple, Generic, TypeVar,
+    Optional, cast,
 )
 
+from .timer import TimerWheel
+from .selector import EventLoopSelector
+from ...common.flag import flags
 from ...common.types import Readables, Writables, SelectableEvents
 from ...common.logger import Logger
 from ...common.constants import (
+    DEFAULT_EVENT_LOOP, DEFAULT_TIMER_RESOLUTION,
     DEFAULT_WAIT_FOR_TASKS_TIMEOUT, DEFAULT_SELECTOR_SELECT_TIMEOUT,
     DEFAULT_INACTIVE_CONN_CLEANUP_TIMEOUT,
 )
 
 
+try:
+    import uvloop
+except ImportError:     # pragma: no cover
+    uvloop = None
+
+
 if TYPE_CHECKING:   # pragma: no cover
     from .work import Work
     from ..event import EventQueue
+    from ..listener import ListenerPool
+    from ..listener.base import BaseListener
 
 T = TypeVar('T')
 
 logger = logging.getLogger(__name__)
 
 
+flags.add_argument(
+    '--event-loop',
+    type=str,
+    default=DEFAULT_EVENT_LOOP,
+    choices=('selector', 'asyncio', 'uvloop'),
+    help='Default: ' + DEFAULT_EVENT_LOOP + '.  Applicable only in --threadless mode.  '
+    'With "selector", executors poll a selector every 25ms.  '
+    'With "asyncio", work descriptors are registered with the event loop via '
+    'add_reader/add_writer and readiness drives processing directly.  '
+    '"uvloop" is same as "asyncio" but runs on uvloop when installed.',
+)
+
+
 class Threadless(ABC, Generic[T]):
     """Work executor base class.
 
@@ -65,16 +92,21 @@ class Threadless(ABC, Generic[T]):
             work_queue: T,
             flags: argparse.Namespace,
             event_queue: Optional['EventQueue'] = None,
+            work_loads: Any = None,
     ) -> None:
         super().__init__()
         self.iid = iid
         self.work_queue = work_queue
         self.flags = flags
         self.event_queue = event_queue
+        # Shared array where executor publishes number of
+        # live works at index ``iid``.  Used by acceptors
+        # for load aware dispatching, see ``--dispatch-strategy``.
+        self.work_loads = work_loads
 
         self.running = multiprocessing.Event()
         self.works: Dict[int, 'Work[Any]'] = {}
-        self.selector: Optional[selectors.DefaultSelector] = None
+        self.selector: Optional[selectors.BaseSelector] = None
         # If we remove single quotes for typing hint below,
         # runtime exceptions will occur for < Python 3.9.
         #
@@ -86,6 +118,18 @@ class Threadless(ABC, Generic[T]):
             # fileno, mask
             SelectableEvents,
         ] = {}
+        # Works whose events of interest must be re-evaluated.
+        # Appended to by works from other threads too, hence a deque.
+        self._changed_work_ids: Deque[int] = collections.deque()
+        self._watched_work_ids: Set[int] = set()
+        # Deadlines of works keyed by work_id
+        self._timers = TimerWheel(
+            time.time(), resolution=DEFAULT_TIMER_RESOLUTION,
+        )
+        # Listeners of executors which accept new work directly,
+        # keyed by listening socket fileno.
+        self.listeners: Optional['ListenerPool'] = None
+        self._listeners: Dict[int, 'BaseListener'] = {}
         self.wait_timeout: float = DEFAULT_WAIT_FOR_TASKS_TIMEOUT
         self.cleanup_inactive_timeout: float = DEFAULT_INACTIVE_CONN_CLEANUP_TIMEOUT
         self._total: int = 0
@@ -135,25 +179,47 @@ class Threadless(ABC, Generic[T]):
             ),
         )
 
+    def create_listeners(self) -> Optional['ListenerPool']:
+        """Executors which accept new work directly must return
+        a pool of listeners here.  Called once the executor has started.
+
+        Ready listeners are passed to ``accept``."""
+        return None
+
+    def accept(self, listener: 'BaseListener') -> None:
+        """Listener is ready to accept new work."""
+        raise NotImplementedError()     # pragma: no cover
+
     def close_work_queue(self) -> None:
         """Only called if ``work_queue_fileno`` returns an integer.
         If an fd is select-able for work queue, make sure
         to close the work queue fd now."""
         pass    # pragma: no cover
 
+    def close_work(self, work_id: int) -> None:
+        """Called after work has been shutdown.
+
+        Executors which receive a descriptor per work
+        over the work queue must close it here."""
+        pass
+
     async def _update_work_events(self, work_id: int) -> None:
         assert self.selector is not None
         worker_events = await self.works[work_id].get_events()
         # NOTE: Current assumption is that multiple works will not
         # be interested in the same fd.  Descriptors of interests
         # returned by work must be unique.
-        #
-        # TODO: Ideally we must diff and unregister socks not
-        # returned of interest within current _select_events call
-        # but exists in the registered_socks_by_work_ids registry.
+        if work_id not in self.registered_events_by_work_ids:
+            self.registered_events_by_work_ids[work_id] = {}
+        # Unregister descriptors which work is no longer interested in
+        registered_events = self.registered_events_by_work_ids[work_id]
+        for fileno in [f for f in registered_events if f not in worker_events]:
+            self.selector.unregister(fileno)
+            del registered_events[fileno]
+            logger.debug(
+                'fd#{0} unregistered by work#{1}'.format(fileno, work_id),
+            )
         for fileno in worker_events:
-            if work_id not in self.registered_events_by_work_ids:
-                self.registered_events_by_work_ids[work_id] = {}
             mask = worker_events[fileno]
             if fileno in self.registered_events_by_work_ids[work_id]:
                 oldmask = self.registered_events_by_work_ids[work_id][fileno]
@@ -219,19 +285,53 @@ class Threadless(ABC, Generic[T]):
         for fileno in old_conn_pool_filenos:
             self.selector.unregister(fileno)
 
+    def _watch_new_works(self) -> None:
+        """Starts watching newly received works for changes in their events of interest."""
+        if len(self._watched_work_ids) == len(self.works):
+            return
+        for work_id in self.works.keys() - self._watched_work_ids:
+            self._watched_work_ids.add(work_id)
+            self.works[work_id].on_events_changed(
+                functools.partial(self._changed_work_ids.append, work_id),
+            )
+            self._changed_work_ids.append(work_id)
+
     async def _update_selector(self) -> None:
+        """Re-evaluates events of interest only for works which are
+        new, have handled events or have signaled a change.
+
+        Selector is only touched for descriptors whose mask has changed."""
         assert self.selector is not None
+        self._watch_new_works()
         unfinished_work_ids = set()
         for task in self.unfinished:
             unfinished_work_ids.add(task._work_id)   # type: ignore
-        for work_id in self.works:
+        updated_work_ids = set()
+        while self._changed_work_ids:
+            work_id = self._changed_work_ids.popleft()
             # We don't want to invoke work objects which haven't
-            # yet finished their previous task
-            if work_id in unfinished_work_ids:
+            # yet finished their previous task.  They are marked
+            # changed again once their task finishes.
+            if work_id not in self.works or \
+                    work_id in unfinished_work_ids or \
+                    work_id in updated_work_ids:
                 continue
+            updated_work_ids.add(work_id)
             await self._update_work_events(work_id)
+            self._schedule_deadline(work_id)
         await self._update_conn_pool_events()
 
+    def _schedule_deadline(self, work_id: int) -> None:
+        deadline = self.works[work_id].deadline()
+        if deadline is None:
+            self._timers.cancel(work_id)
+            return
+        # Deadlines moving further away are revalidated
+        # once due, see ``_expire_works``.
+        scheduled = self._timers.deadline(work_id)
+        if scheduled is None or deadline < scheduled:
+            self._timers.schedule(work_id, deadline)
+
     async def _selected_events(self) -> Tuple[
             Dict[int, Tuple[Readables, Writables]],
             bool,
@@ -262,11 +362,23 @@ class Threadless(ABC, Generic[T]):
             # always return True for the boolean value.
             new_work_available = True
 
-        events = self.selector.select(
-            timeout=DEFAULT_SELECTOR_SELECT_TIMEOUT,
-        )
+        if isinstance(self.selector, EventLoopSelector):
+            # Without a work queue fd, we must keep polling
+            # for new work from within the loop
+            events = await self.selector.wait(
+                timeout=DEFAULT_SELECTOR_SELECT_TIMEOUT
+                if wqfileno is None
+                else self.cleanup_inactive_timeout,
+            )
+        else:
+            events = self.selector.select(
+                timeout=DEFAULT_SELECTOR_SELECT_TIMEOUT,
+            )
 
         for key, mask in events:
+            if key.data in self._listeners:
+                self.accept(self._listeners[key.data])
+                continue
             if not new_work_available and wqfileno is not None and key.fileobj == wqfileno:
                 assert mask & selectors.EVENT_READ
                 new_work_available = True
@@ -287,12 +399,18 @@ class Threadless(ABC, Generic[T]):
         )
         return finished     # noqa: WPS331
 
-    def _cleanup_inactive(self) -> None:
-        inactive_works: List[int] = []
-        for work_id in self.works:
-            if self.works[work_id].is_inactive():
-                inactive_works.append(work_id)
-        for work_id in inactive_works:
+    def _expire_works(self, now: float) -> None:
+        """Shuts down works whose deadline has passed."""
+        for work_id in self._timers.expire(now):
+            if work_id not in self.works:
+                continue
+            deadline = self.works[work_id].deadline()
+            if deadline is None:
+                continue
+            if deadline > now:
+                self._timers.schedule(work_id, deadline)
+                continue
+            logger.debug('work#{0} deadline reached'.format(work_id))
             self._cleanup(work_id)
 
     # TODO: HttpProtocolHandler.shutdown can call flush which may block
@@ -310,8 +428,9 @@ class Threadless(ABC, Generic[T]):
             del self.registered_events_by_work_ids[work_id]
         self.works[work_id].shutdown()
         del self.works[work_id]
-        if self.work_queue_fileno() is not None:
-            os.close(work_id)
+        self._watched_work_ids.discard(work_id)
+        self._timers.cancel(work_id)
+        self.close_work(work_id)
 
     def _create_tasks(
             self,
@@ -332,10 +451,32 @@ class Threadless(ABC, Generic[T]):
                     self.works[work_id].handle_events(*work_by_ids[work_id]),
                 )
             task._work_id = work_id     # type: ignore[attr-defined]
+            if isinstance(self.selector, EventLoopSelector):
+                # Tasks which remain unfinished after _wait_for_tasks
+                # must wake up the loop once they are done.
+                task.add_done_callback(self.selector.wakeup)
             # task.set_name(work_id)
             tasks.add(task)
         return tasks
 
+    def _reap_tasks(self, finished: Set['asyncio.Task[bool]']) -> None:
+        for task in finished:
+            # Checking for result can raise exception e.g.
+            # CancelledError, InvalidStateError or an exception
+            # from underlying task e.g. TimeoutError.
+            teardown = False
+            work_id = task._work_id     # type: ignore
+            try:
+                teardown = task.result()
+            finally:
+                if teardown:
+                    self._cleanup(work_id)
+                    # self.cleanup(int(task.get_name()))
+                elif work_id != 0:
+                    # Events of interest may have changed
+                    # while work was handling events
+                    self._changed_work_ids.append(work_id)
+
     async def _run_once(self) -> bool:
         assert self.loop is not None
         work_by_ids, new_work_available = await self._selected_events()
@@ -349,23 +490,17 @@ class Threadless(ABC, Generic[T]):
             if teardown:
                 return teardown
         if len(work_by_ids) == 0:
+            # Tasks which finished after last _wait_for_tasks
+            # may have woken us up without any fd being ready.
+            finished = {task for task in self.unfinished if task.done()}
+            self.unfinished -= finished
+            self._reap_tasks(finished)
             return False
         # Invoke Threadless.handle_events
         self.unfinished.update(self._create_tasks(work_by_ids))
         # logger.debug('Executing {0} works'.format(len(self.unfinished)))
         # Cleanup finished tasks
-        for task in await self._wait_for_tasks():
-            # Checking for result can raise exception e.g.
-            # CancelledError, InvalidStateError or an exception
-            # from underlying task e.g. TimeoutError.
-            teardown = False
-            work_id = task._work_id     # type: ignore
-            try:
-                teardown = task.result()
-            finally:
-                if teardown:
-                    self._cleanup(work_id)
-                    # self.cleanup(int(task.get_name()))
+        self._reap_tasks(await self._wait_for_tasks())
         # logger.debug(
         #     'Done executing works, {0} pending, {1} registered'.format(
         #         len(self.unfinished), len(self.registered_events_by_work_ids),
@@ -374,26 +509,37 @@ class Threadless(ABC, Generic[T]):
         return False
 
     async def _run_forever(self) -> None:
-        tick = 0
+        last_checked_at = time.time()
         try:
             while True:
                 if await self._run_once():
                     break
-                # Check for inactive and shutdown signal
-                elapsed = tick * \
-                    (DEFAULT_SELECTOR_SELECT_TIMEOUT + self.wait_timeout)
-                if elapsed >= self.cleanup_inactive_timeout:
-                    self._cleanup_inactive()
+                now = time.time()
+                self._expire_works(now)
+                if self.work_loads is not None:
+                    self.work_loads[int(self.iid)] = len(self.works)
+                # Check for shutdown signal
+                if now - last_checked_at >= self.cleanup_inactive_timeout:
                     if self.running.is_set():
                         break
-                    tick = 0
-                tick += 1
+                    last_checked_at = now
         except KeyboardInterrupt:
             pass
         finally:
             if self.loop:
                 self.loop.stop()
 
+    def _create_selector(self) -> selectors.BaseSelector:
+        if self.flags.event_loop == 'selector':
+            return selectors.DefaultSelector()
+        if self.flags.event_loop == 'uvloop':
+            if uvloop is None:
+                logger.warning('uvloop not installed, using asyncio event loop')
+            else:
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        assert self.loop
+        return EventLoopSelector(self.loop)
+
     def run(self) -> None:
         Logger.setup(
             self.flags.log_file, self.flags.log_level,
@@ -401,13 +547,24 @@ class Threadless(ABC, Generic[T]):
         )
         wqfileno = self.work_queue_fileno()
         try:
-            self.selector = selectors.DefaultSelector()
+            self.selector = self._create_selector()
             if wqfileno is not None:
                 self.selector.register(
                     wqfileno,
                     selectors.EVENT_READ,
                     data=wqfileno,
                 )
+            self.listeners = self.create_listeners()
+            if self.listeners is not None:
+                for listener in self.listeners.pool:
+                    fileno = listener.fileno()
+                    assert fileno is not None
+                    self._listeners[fileno] = listener
+                    self.selector.register(
+                        fileno,
+                        selectors.EVENT_READ,
+                        data=fileno,
+                    )
             assert self.loop
             logger.debug('Working on {0} works'.format(len(self.works)))
             self.loop.create_task(self._run_forever())
@@ -419,6 +576,11 @@ class Threadless(ABC, Generic[T]):
             if wqfileno is not None:
                 self.selector.unregister(wqfileno)
                 self.close_work_queue()
+            for fileno in self._listeners:
+                self.selector.unregister(fileno)
+            self._listeners.clear()
+            if self.listeners is not None:
+                self.listeners.shutdown()
             self.selector.close()
             assert self.loop is not None
             self.loop.run_until_complete(self.loop.shutdown_asyncgens())
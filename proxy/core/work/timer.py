@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import math
+from typing import Set, Dict, List, Tuple, Optional
+
+
+class TimerWheel:
+    """Hierarchical timing wheel.
+
+    Tracks a deadline per key.  ``schedule`` and ``cancel`` are O(1).
+    ``expire`` only visits slots which are due, entries in far away
+    slots are cascaded down to lower levels as time advances.
+
+    Time is divided into ticks of ``resolution`` seconds.  Level 0
+    has ``slots`` slots of one tick each, every next level has
+    ``slots`` slots each spanning an entire revolution of the previous
+    level.  Deadlines beyond the last level are parked in the last
+    level and re-cascaded until they are in range.
+
+    Keys never expire before their deadline, but may expire up to
+    one ``resolution`` late.
+    """
+
+    def __init__(
+            self,
+            now: float,
+            resolution: float = 0.1,
+            slots: int = 64,
+            levels: int = 4,
+    ) -> None:
+        assert slots > 1 and slots & (slots - 1) == 0, 'slots must be a power of 2'
+        self.resolution = resolution
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._levels = levels
+        self._wheels: List[List[Set[int]]] = [
+            [set() for _ in range(slots)] for _ in range(levels)
+        ]
+        # key -> (level, slot, expiry tick, deadline)
+        #
+        # Level -1 represents keys which are already due.
+        self._entries: Dict[int, Tuple[int, int, int, float]] = {}
+        self._due: Set[int] = set()
+        self._tick = self._to_tick(now)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._entries
+
+    def deadline(self, key: int) -> Optional[float]:
+        """Returns currently scheduled deadline for key, if any."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[3]
+
+    def schedule(self, key: int, deadline: float) -> None:
+        """Schedules key to expire at deadline.
+
+        Replaces previously scheduled deadline for key, if any."""
+        self.cancel(key)
+        self._insert(key, int(math.ceil(deadline / self.resolution)), deadline)
+
+    def cancel(self, key: int) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        level, slot = entry[0], entry[1]
+        if level < 0:
+            self._due.discard(key)
+        else:
+            self._wheels[level][slot].discard(key)
+
+    def expire(self, now: float) -> List[int]:
+        """Advances the wheel until now and returns keys which are due.
+
+        Returned keys are no longer tracked by the wheel."""
+        target = self._to_tick(now)
+        if not self._entries:
+            self._tick = max(self._tick, target)
+            return []
+        while self._tick < target:
+            self._tick += 1
+            for level in range(1, self._levels):
+                if self._tick & ((1 << (level * self._bits)) - 1):
+                    break
+                self._cascade(level)
+            # Due keys in level 0 end up in _due.  Keys parked
+            # for a later revolution are re-inserted.
+            self._cascade(0)
+        expired = list(self._due)
+        for key in expired:
+            del self._entries[key]
+        self._due.clear()
+        return expired
+
+    def _to_tick(self, t: float) -> int:
+        return int(t / self.resolution)
+
+    def _cascade(self, level: int) -> None:
+        slot = self._wheels[level][
+            (self._tick >> (level * self._bits)) & self._mask
+        ]
+        if not slot:
+            return
+        keys = list(slot)
+        slot.clear()
+        for key in keys:
+            _, _, expiry, deadline = self._entries[key]
+            self._insert(key, expiry, deadline)
+
+    def _insert(self, key: int, expiry: int, deadline: float) -> None:
+        delta = expiry - self._tick
+        if delta <= 0:
+            self._due.add(key)
+            self._entries[key] = (-1, 0, expiry, deadline)
+            return
+        level = 0
+        while level < self._levels - 1 and delta >> ((level + 1) * self._bits):
+            level += 1
+        # Park far away deadlines in the last level, they are
+        # re-inserted when that slot is cascaded.
+        limit = (1 << (self._levels * self._bits)) - 1
+        at = self._tick + min(delta, limit)
+        slot = (at >> (level * self._bits)) & self._mask
+        self._wheels[level][slot].add(key)
+        self._entries[key] = (level, slot, expiry, deadline)
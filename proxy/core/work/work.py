@@ -15,7 +15,9 @@
 import argparse
 from abc import ABC, abstractmethod
 from uuid import uuid4
-from typing import TYPE_CHECKING, Any, Dict, Generic, TypeVar, Optional
+from typing import (
+    TYPE_CHECKING, Any, Dict, Generic, TypeVar, Callable, Optional,
+)
 
 from ..event import EventQueue, eventNames
 from ...common.types import Readables, Writables, SelectableEvents
@@ -46,6 +48,7 @@ class Work(ABC, Generic[T]):
         # Accept work
         self.work = work
         self.upstream_conn_pool = upstream_conn_pool
+        self._events_changed_callback: Optional[Callable[[], None]] = None
 
     @staticmethod
     @abstractmethod
@@ -56,9 +59,23 @@ class Work(ABC, Generic[T]):
         raise NotImplementedError()
 
     async def get_events(self) -> SelectableEvents:
-        """Return sockets and events (read or write) that we are interested in."""
+        """Return sockets and events (read or write) that we are interested in.
+
+        Executors only re-evaluate events of interest after work has handled
+        events.  If events of interest change outside of ``handle_events``,
+        e.g. data queued for client from another thread, implementations
+        must call ``events_changed``."""
         return {}   # pragma: no cover
 
+    def on_events_changed(self, callback: Callable[[], None]) -> None:
+        """Used by executors to get notified of ``events_changed`` calls."""
+        self._events_changed_callback = callback
+
+    def events_changed(self) -> None:
+        """Notify executor that events returned by ``get_events`` may have changed."""
+        if self._events_changed_callback is not None:
+            self._events_changed_callback()
+
     async def handle_events(
             self,
             _readables: Readables,
@@ -74,9 +91,22 @@ class Work(ABC, Generic[T]):
         pass    # pragma: no cover
 
     def is_inactive(self) -> bool:
-        """Return True if connection should be considered inactive."""
+        """Return True if connection should be considered inactive.
+
+        Only used in threaded mode.  Threadless executors use ``deadline``."""
         return False    # pragma: no cover
 
+    def deadline(self) -> Optional[float]:
+        """Return time after which work must be shutdown, None if work
+        has no deadline.
+
+        Executors ask for the deadline after work has handled events
+        and only re-schedule when deadline moves closer.  Deadlines
+        which move further away are revalidated once due, hence
+        implementations can simply update last activity timestamps
+        without notifying the executor."""
+        return None
+
     def shutdown(self) -> None:
         """Implementation must close any opened resources here
         and call super().shutdown()."""
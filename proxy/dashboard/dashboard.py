@@ -50,6 +50,9 @@ class ProxyDashboard(HttpWebServerBasePlugin):
                         'dashboard', 'proxy.html',
                     ),
                     self.flags.min_compression_length,
+                    request.header(b'accept-encoding')
+                    if request.has_header(b'accept-encoding')
+                    else None,
                 ),
             )
         elif request.path in (
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+
+    .. spelling::
+
+       brotli
+       compressibility
+"""
+import gzip
+import collections
+from typing import Dict, Tuple, Optional, Sequence, cast
+
+from ..common.constants import COMMA, SEMI
+
+
+try:
+    import brotli
+except ImportError:     # pragma: no cover
+    brotli = None
+
+
+GZIP = b'gzip'
+BROTLI = b'br'
+IDENTITY = b'identity'
+
+# Encodings we can compress into, in the order of preference
+ENCODINGS: Tuple[bytes, ...] = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+# File extension of precompressed siblings per encoding
+EXTENSIONS: Dict[bytes, str] = {
+    BROTLI: '.br',
+    GZIP: '.gz',
+}
+
+# Content types other than text/* worth compressing.  Rest of the
+# content types (images, audio, video, archives, woff2 fonts etc) are
+# either already compressed or binary and only cost CPU to compress.
+COMPRESSIBLE_CONTENT_TYPES = frozenset([
+    b'application/atom+xml',
+    b'application/javascript',
+    b'application/json',
+    b'application/ld+json',
+    b'application/manifest+json',
+    b'application/rss+xml',
+    b'application/vnd.ms-fontobject',
+    b'application/wasm',
+    b'application/x-javascript',
+    b'application/xhtml+xml',
+    b'application/xml',
+    b'font/otf',
+    b'font/ttf',
+    b'image/bmp',
+    b'image/svg+xml',
+    b'image/vnd.microsoft.icon',
+    b'image/x-icon',
+])
+
+
+def is_compressible(content_type: Optional[bytes]) -> bool:
+    if content_type is None:
+        return True
+    content_type = content_type.split(SEMI, 1)[0].strip().lower()
+    return content_type.startswith(b'text/') or \
+        content_type in COMPRESSIBLE_CONTENT_TYPES
+
+
+def negotiate(
+        accept_encoding: Optional[bytes],
+        available: Sequence[bytes] = ENCODINGS,
+) -> bytes:
+    """Returns most preferred of the available encodings acceptable to the
+    client as per ``Accept-Encoding``, otherwise ``identity``.
+
+    Ties in client quality values are broken using order of ``available``."""
+    if not accept_encoding or not available:
+        return IDENTITY
+    qvalues: Dict[bytes, float] = {}
+    for item in accept_encoding.split(COMMA):
+        coding, _, params = item.partition(SEMI)
+        q = 1.0
+        name, _, value = params.partition(b'=')
+        if name.strip().lower() == b'q':
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        qvalues[coding.strip().lower()] = q
+    wildcard = qvalues.get(b'*', 0.0)
+    best, best_q = IDENTITY, 0.0
+    for encoding in available:
+        q = qvalues.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(content: bytes, encoding: bytes, level: int) -> bytes:
+    """Compresses content at given level, 1 (fastest) to 9 (smallest).
+
+    Brotli quality is scaled to its range of 0 to 11."""
+    if encoding == BROTLI:
+        return cast(
+            bytes,
+            brotli.compress(content, quality=min(11, round(level * 11 / 9))),
+        )
+    assert encoding == GZIP
+    return gzip.compress(content, compresslevel=level)
+
+
+class CompressedCache:
+    """Bounded LRU cache of compressed variants of files.
+
+    Keyed by (path, mtime, encoding), hence, variants of modified files
+    are never served and eventually evicted.  Variants larger than
+    1/8th of ``max_size`` are not cached at all.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self._variants: 'collections.OrderedDict[Tuple[str, int, bytes], bytes]' = \
+            collections.OrderedDict()
+
+    def get(self, key: Tuple[str, int, bytes]) -> Optional[bytes]:
+        variant = self._variants.get(key)
+        if variant is not None:
+            self._variants.move_to_end(key)
+        return variant
+
+    def put(self, key: Tuple[str, int, bytes], variant: bytes) -> None:
+        if len(variant) > self.max_size // 8:
+            return
+        old = self._variants.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._variants[key] = variant
+        self.size += len(variant)
+        while self.size > self.max_size:
+            _, evicted = self._variants.popitem(last=False)
+            self.size -= len(evicted)
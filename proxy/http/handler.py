@@ -15,7 +15,7 @@ import socket
 import asyncio
 import logging
 import selectors
-from typing import Any, List, Type, Tuple, Optional
+from typing import Any, List, Type, Tuple, Optional, Sequence
 
 from .parser import HttpParser, httpParserTypes, httpParserStates
 from .plugin import HttpProtocolHandlerPlugin
@@ -24,13 +24,35 @@ from .protocols import httpProtocols
 from .responses import BAD_REQUEST_RESPONSE_PKT
 from ..core.base import BaseTcpServerHandler
 from .connection import HttpClientConnection
+from ..common.flag import flags
 from ..common.types import Readables, Writables, SelectableEvents
-from ..common.constants import DEFAULT_SELECTOR_SELECT_TIMEOUT
+from ..common.constants import (
+    DEFAULT_KEEP_ALIVE_TIMEOUT, DEFAULT_HEADER_READ_TIMEOUT,
+    DEFAULT_SELECTOR_SELECT_TIMEOUT,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+flags.add_argument(
+    '--header-read-timeout',
+    type=float,
+    default=DEFAULT_HEADER_READ_TIMEOUT,
+    help='Default: None.  Number of seconds within which client must '
+    'send complete request headers.  Defaults to --timeout when not set.',
+)
+
+flags.add_argument(
+    '--keep-alive-timeout',
+    type=float,
+    default=DEFAULT_KEEP_ALIVE_TIMEOUT,
+    help='Default: None.  Number of seconds after which an idle HTTP '
+    'connection must be dropped once response to the last request has '
+    'completed.  Defaults to --timeout when not set.',
+)
+
+
 class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
     """HTTP, HTTPS, HTTP2, WebSockets protocol handler.
 
@@ -44,6 +66,8 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
         self.request: HttpParser = HttpParser(
             httpParserTypes.REQUEST_PARSER,
             enable_proxy_protocol=self.flags.enable_proxy_protocol,
+            max_header_size=self.flags.max_header_size,
+            max_headers=self.flags.max_headers,
         )
         self.selector: Optional[selectors.DefaultSelector] = None
         if not self.flags.threadless:
@@ -66,12 +90,27 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
                 conn=self.work.connection,
                 addr=self.work.addr,
             )
+            self.work.on_queued = self.events_changed
 
     def is_inactive(self) -> bool:
-        if not self.work.has_buffer() and \
-                self._connection_inactive_for() > self.flags.timeout:
-            return True
-        return False
+        deadline = self.deadline()
+        return deadline is not None and time.time() > deadline
+
+    def deadline(self) -> Optional[float]:
+        # Never drop a connection with pending buffer for client
+        if self.work.has_buffer():
+            return None
+        if self.plugin is None:
+            if self.request.state < httpParserStates.HEADERS_COMPLETE:
+                # Guards against clients trickling request headers
+                return self.start_time + \
+                    self._timeout(self.flags.header_read_timeout)
+            return self.last_activity + float(self.flags.timeout)
+        deadline = self.plugin.deadline(self.last_activity)
+        if deadline is not None:
+            return deadline
+        return self.last_activity + \
+            self._timeout(self.flags.keep_alive_timeout)
 
     def shutdown(self) -> None:
         try:
@@ -112,8 +151,11 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
             super().shutdown()
 
     async def get_events(self) -> SelectableEvents:
-        # Get default client events
-        events: SelectableEvents = await super().get_events()
+        # Get default client events, unless plugin has taken over
+        # the client connection
+        events: SelectableEvents = {} \
+            if self.plugin and self.plugin.owns_client_connection() \
+            else await super().get_events()
         # HttpProtocolHandlerPlugin.get_descriptors
         if self.plugin:
             plugin_read_desc, plugin_write_desc = await self.plugin.get_descriptors()
@@ -136,13 +178,18 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
             writables: Writables,
     ) -> bool:
         """Returns True if proxy must tear down."""
+        if self.plugin and self.plugin.owns_client_connection():
+            return await self._handle_plugin_events(readables, writables)
         # Flush buffer for ready to write sockets
         teardown = await self.handle_writables(writables)
         if teardown:
             return True
         # Invoke plugin.write_to_descriptors
         if self.plugin:
-            teardown = await self.plugin.write_to_descriptors(writables)
+            try:
+                teardown = await self.plugin.write_to_descriptors(writables)
+            except HttpProtocolException as e:
+                return self._handle_protocol_exception(e)
             if teardown:
                 return True
         # Read from ready to read sockets
@@ -151,11 +198,32 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
             return True
         # Invoke plugin.read_from_descriptors
         if self.plugin:
-            teardown = await self.plugin.read_from_descriptors(readables)
+            try:
+                teardown = await self.plugin.read_from_descriptors(readables)
+            except HttpProtocolException as e:
+                return self._handle_protocol_exception(e)
             if teardown:
                 return True
         return False
 
+    async def _handle_plugin_events(
+            self,
+            readables: Readables,
+            writables: Writables,
+    ) -> bool:
+        """Handles events when plugin owns the client connection."""
+        assert self.plugin
+        fileno = self.work.connection.fileno()
+        if fileno in readables or fileno in writables:
+            self.last_activity = time.time()
+        try:
+            if await self.plugin.write_to_descriptors(writables) or \
+                    await self.plugin.read_from_descriptors(readables):
+                return True
+        except HttpProtocolException as e:
+            return self._handle_protocol_exception(e)
+        return False
+
     def handle_data(self, data: memoryview) -> Optional[bool]:
         """Handles incoming data from client."""
         if data is None:
@@ -191,7 +259,7 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
             # instead of invoking when flushed to client.
             #
             # Invoke plugin.on_response_chunk
-            chunk = self.work.buffer
+            chunk: Sequence[memoryview] = self.work.buffer
             if self.plugin:
                 chunk = self.plugin.on_response_chunk(chunk)
             try:
@@ -307,8 +375,22 @@ class HttpProtocolHandler(BaseTcpServerHandler[HttpClientConnection]):
         self.work._conn = output
         return False
 
-    def _connection_inactive_for(self) -> float:
-        return time.time() - self.last_activity
+    def _handle_protocol_exception(self, e: HttpProtocolException) -> bool:
+        """Queues response associated with the exception for client.
+
+        Returns True if work can be torn down right away.  Otherwise,
+        teardown is deferred until pending client buffer is flushed."""
+        logger.info('HttpProtocolException: %s' % e)
+        response: Optional[memoryview] = e.response(self.request)
+        if response:
+            self.work.queue(response)
+        if self.work.has_buffer():
+            self.must_flush_before_shutdown = True
+            return False
+        return True
+
+    def _timeout(self, timeout: Optional[float]) -> float:
+        return float(self.flags.timeout) if timeout is None else timeout
 
     ##
     # run() and _run_once() are here to maintain backward compatibility
@@ -8,10 +8,11 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
-from typing import List, Tuple, Optional, NamedTuple
+import re
+from typing import List, Callable, Optional, NamedTuple
 
-from ...common.utils import bytes_, find_http_line
-from ...common.constants import CRLF, DEFAULT_BUFFER_SIZE
+from ...common.utils import bytes_
+from ...common.constants import CRLF, SEMI, DEFAULT_BUFFER_SIZE
 
 
 ChunkParserStates = NamedTuple(
@@ -23,53 +24,100 @@ ChunkParserStates = NamedTuple(
 )
 chunkParserStates = ChunkParserStates(1, 2, 3)
 
+_CRLF = re.compile(CRLF)
+
 
 class ChunkParser:
-    """HTTP chunked encoding response parser."""
+    """HTTP chunked encoding response parser.
+
+    Decodes chunked body as it streams in, walking received bytes with
+    an offset cursor.  Partially received chunks aren't buffered,
+    decoded data is handed to ``on_chunk`` as soon as it is received,
+    as memoryview slices of received bytes.  Decoded data is also
+    accumulated into ``body`` when ``store_body`` is enabled.
 
-    def __init__(self) -> None:
+    With neither, parser only validates framing of chunked body to
+    find its end, while callers forward original bytes untouched.
+    """
+
+    def __init__(
+            self,
+            store_body: bool = True,
+            on_chunk: Optional[Callable[[memoryview], None]] = None,
+    ) -> None:
         self.state = chunkParserStates.WAITING_FOR_SIZE
-        self.body: bytes = b''  # Parsed chunks
-        self.chunk: bytes = b''  # Partial chunk received
+        self.store_body = store_body
+        self.on_chunk = on_chunk
+        self._body = bytearray()    # Parsed chunks
+        self.chunk: bytes = b''  # Partial chunk size line received
         # Expected size of next following chunk
         self.size: Optional[int] = None
+        # Bytes of next following chunk received so far
+        self.received: int = 0
+        # True once last chunk has been received,
+        # and until trailers section is complete.
+        self._trailers: bool = False
+
+    @property
+    def body(self) -> bytes:
+        return bytes(self._body)
 
     def parse(self, raw: memoryview) -> memoryview:
-        more = len(raw) > 0
-        while more and self.state != chunkParserStates.COMPLETE:
-            more, raw = self.process(raw.tobytes())
-        return raw
+        """Returns bytes left over after end of chunked body."""
+        offset = 0
+        while offset < len(raw) and self.state != chunkParserStates.COMPLETE:
+            if self.state == chunkParserStates.WAITING_FOR_DATA:
+                offset = self._process_data(raw, offset)
+            else:
+                offset = self._process_line(raw, offset)
+        return raw[offset:]
+
+    def _process_data(self, raw: memoryview, offset: int) -> int:
+        assert self.size is not None
+        end = min(offset + self.size - self.received, len(raw))
+        data = raw[offset:end]
+        if self.store_body:
+            self._body += data
+        if self.on_chunk is not None:
+            self.on_chunk(data)
+        self.received += end - offset
+        if self.received == self.size:
+            self.state = chunkParserStates.WAITING_FOR_SIZE
+            self.size = None
+            self.received = 0
+            # CRLF ending chunk data, when received
+            # across reads, is consumed as a blank line
+            if raw[end:end + len(CRLF)] == CRLF:
+                end += len(CRLF)
+        return end
 
-    def process(self, raw: bytes) -> Tuple[bool, memoryview]:
-        if self.state == chunkParserStates.WAITING_FOR_SIZE:
-            # Consume prior chunk in buffer
-            # in case chunk size without CRLF was received
-            raw = self.chunk + raw
-            self.chunk = b''
-            # Extract following chunk data size
-            line, raw = find_http_line(raw)
-            # CRLF not received or Blank line was received.
-            if line is None or line.strip() == b'':
-                self.chunk = raw
-                raw = b''
+    def _process_line(self, raw: memoryview, offset: int) -> int:
+        if self.chunk[-1:] == b'\r' and raw[offset] == 10:
+            # CRLF received across reads
+            line, offset = self.chunk[:-1], offset + 1
+        else:
+            match = _CRLF.search(raw, offset)
+            if match is None:
+                # Size line without CRLF received
+                self.chunk += raw[offset:].tobytes()
+                return len(raw)
+            line = self.chunk + raw[offset:match.start()].tobytes()
+            offset = match.end()
+        self.chunk = b''
+        line = line.strip()
+        if self._trailers:
+            # Trailer fields are ignored until the blank line
+            if line == b'':
+                self.state = chunkParserStates.COMPLETE
+        elif line != b'':
+            # Chunk extensions are ignored
+            self.size = int(line.split(SEMI, 1)[0], 16)
+            if self.size == 0:
+                self.size = None
+                self._trailers = True
             else:
-                self.size = int(line, 16)
                 self.state = chunkParserStates.WAITING_FOR_DATA
-        elif self.state == chunkParserStates.WAITING_FOR_DATA:
-            assert self.size is not None
-            remaining = self.size - len(self.chunk)
-            self.chunk += raw[:remaining]
-            raw = raw[remaining:]
-            if len(self.chunk) == self.size:
-                raw = raw[len(CRLF):]
-                self.body += self.chunk
-                if self.size == 0:
-                    self.state = chunkParserStates.COMPLETE
-                else:
-                    self.state = chunkParserStates.WAITING_FOR_SIZE
-                self.chunk = b''
-                self.size = None
-        return len(raw) > 0, memoryview(raw)
+        return offset
 
     @staticmethod
     def to_chunks(raw: bytes, chunk_size: int = DEFAULT_BUFFER_SIZE) -> bytes:
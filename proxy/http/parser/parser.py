@@ -12,6 +12,7 @@
 
        http
 """
+import re
 import gzip
 from typing import Dict, List, Type, Tuple, TypeVar, Optional
 
@@ -28,7 +29,8 @@ from ...common.utils import (
 )
 from ...common.constants import (
     CRLF, COLON, SLASH, HTTP_1_0, HTTP_1_1, WHITESPACE, DEFAULT_HTTP_PORT,
-    DEFAULT_DISABLE_HEADERS, DEFAULT_ENABLE_PROXY_PROTOCOL,
+    DEFAULT_MAX_HEADERS, DEFAULT_MAX_HEADER_SIZE, DEFAULT_DISABLE_HEADERS,
+    DEFAULT_ENABLE_PROXY_PROTOCOL,
 )
 
 
@@ -41,29 +43,73 @@ flags.add_argument(
     'Only version 1 is currently supported.',
 )
 
+flags.add_argument(
+    '--max-header-size',
+    type=int,
+    default=DEFAULT_MAX_HEADER_SIZE,
+    help='Default: ' + str(int(DEFAULT_MAX_HEADER_SIZE / 1024)) + ' KB.  ' +
+    'Maximum size of request line and headers.  Requests exceeding it ' +
+    'are rejected, even before their headers are completely received.',
+)
+
+flags.add_argument(
+    '--max-headers',
+    type=int,
+    default=DEFAULT_MAX_HEADERS,
+    help='Default: ' + str(DEFAULT_MAX_HEADERS) + '.  ' +
+    'Maximum number of header lines.  Requests exceeding it are rejected.',
+)
+
 
 T = TypeVar('T', bound='HttpParser')
 
+# Matched directly against buffered memoryview segments, which
+# unlike bytes, provide no find or split methods of their own.
+_CRLF = re.compile(CRLF)
+_HEADER = re.compile(b'([^:]*)(?::(.*))?', re.DOTALL)
+_END_OF_HEADERS = re.compile(CRLF * 2)
+
+# Lower cased names of commonly used headers, keyed by their usual
+# spelling too.  Parsed messages share these instead of lower casing
+# and allocating names of their own.
+_HEADER_NAMES: Dict[bytes, bytes] = {}
+for _name in (
+    b'Accept', b'Accept-Encoding', b'Accept-Language', b'Authorization',
+    b'Cache-Control', b'Connection', b'Content-Encoding', b'Content-Length',
+    b'Content-Type', b'Cookie', b'Date', b'ETag', b'Expires', b'Host',
+    b'If-Modified-Since', b'If-None-Match', b'Keep-Alive', b'Last-Modified',
+    b'Location', b'Origin', b'Pragma', b'Proxy-Authorization',
+    b'Proxy-Connection', b'Referer', b'Server', b'Set-Cookie',
+    b'Transfer-Encoding', b'Upgrade', b'User-Agent', b'Vary', b'Via',
+    b'X-Forwarded-For',
+):
+    _HEADER_NAMES[_name] = _HEADER_NAMES[_name.lower()] = _name.lower()
+
 
 class HttpParser:
     """HTTP request/response parser.
 
-    TODO: Make me zero-copy by using :class:`memoryview`.
-    Currently due to chunk/buffer handling we
-    are not able to utilize :class:`memoryview`
-    efficiently.
-
-    For this to happen we must store ``buffer``
-    as ``List[memoryview]`` instead of raw bytes and
-    update parser to work accordingly.
+    Unprocessed bytes are held as a ``List[memoryview]`` of received
+    segments.  Line ends are searched within segments in-place, and
+    bytes are only copied out for the request line and header names
+    and values that are stored.  Only lines spanning across segments
+    are joined.
     """
 
     def __init__(
             self, parser_type: int,
             enable_proxy_protocol: int = DEFAULT_ENABLE_PROXY_PROTOCOL,
+            max_header_size: int = DEFAULT_MAX_HEADER_SIZE,
+            max_headers: int = DEFAULT_MAX_HEADERS,
+            store_body: bool = True,
     ) -> None:
         self.state: int = httpParserStates.INITIALIZED
         self.type: int = parser_type
+        self.max_header_size = max_header_size
+        self.max_headers = max_headers
+        # When False, body is only tracked to find end of the message
+        # and never held in memory i.e. body remains None.
+        self.store_body = store_body
         self.protocol: Optional[ProxyProtocol] = None
         if enable_proxy_protocol:
             assert self.type == httpParserTypes.REQUEST_PARSER
@@ -79,14 +125,22 @@ class HttpParser:
         self.version: Optional[bytes] = None
         # Total size of raw bytes passed for parsing
         self.total_size: int = 0
-        # Buffer to hold unprocessed bytes
-        self.buffer: Optional[memoryview] = None
+        # Segments holding unprocessed bytes
+        self.buffer: List[memoryview] = []
+        # Bytes of first segment already consumed
+        self._offset: int = 0
+        # Segment index where search for next line end resumes
+        self._scanned: int = 0
+        # Number of header lines received
+        self._num_headers: int = 0
         # Internal headers data structure:
         # - Keys are lower case header names.
         # - Values are 2-tuple containing original
         #   header and it's value as received.
         self.headers: Optional[Dict[bytes, Tuple[bytes, bytes]]] = None
         self.body: Optional[bytes] = None
+        # Body bytes received, including chunk framing if any
+        self.body_size: int = 0
         self.chunk: Optional[ChunkParser] = None
         # Internal request line as a url structure
         self._url: Optional[Url] = None
@@ -246,35 +300,43 @@ class HttpParser:
         Check for `HttpParser.state` after `parse` has successfully returned."""
         size = len(raw)
         self.total_size += size
-        if self.buffer:
-            # TODO(abhinavsingh): Instead of tobytes our parser
-            # must be capable of working with arrays of memoryview
-            raw = memoryview(self.buffer.tobytes() + raw.tobytes())
-        self.buffer, more = None, size > 0
-        while more and self.state != httpParserStates.COMPLETE:
+        if size == 0:
+            return
+        self.buffer.append(raw)
+        while self.buffer and self.state != httpParserStates.COMPLETE:
             # gte with HEADERS_COMPLETE also encapsulated RCVING_BODY state
             if self.state >= httpParserStates.HEADERS_COMPLETE:
-                more, raw = self._process_body(raw)
-            elif self.state == httpParserStates.INITIALIZED:
-                more, raw = self._process_line(
-                    raw,
+                rest = self._process_body(self._pop_segment())
+                if len(rest) > 0:
+                    self.buffer.insert(0, rest)
+                continue
+            if self.state == httpParserStates.INITIALIZED:
+                line = self._next_line()
+                if line is None:
+                    break
+                segment, start, end = line
+                self._process_line(
+                    segment[start:end].tobytes(),
                     allowed_url_schemes=allowed_url_schemes,
                 )
-            else:
-                more, raw = self._process_headers(raw)
-            # When server sends a response line without any header or body e.g.
-            # HTTP/1.1 200 Connection established\r\n\r\n
-            if self.type == httpParserTypes.RESPONSE_PARSER and \
-                    self.state == httpParserStates.LINE_RCVD and \
-                    raw == CRLF:
-                self.state = httpParserStates.COMPLETE
+            elif not self._process_headers():
+                break
+            elif self.total_size - self._buffered() > self.max_header_size:
+                self._reject_header_size()
             # Mark request as complete if headers received and no incoming
-            # body indication received.
-            elif self.state == httpParserStates.HEADERS_COMPLETE and \
+            # body indication received.  This also covers server responses
+            # without any header or body e.g.
+            # HTTP/1.1 200 Connection established\r\n\r\n
+            if self.state == httpParserStates.HEADERS_COMPLETE and \
                     not (self._content_expected or self._is_chunked_encoded) and \
-                    raw == b'':
+                    not self.buffer:
                 self.state = httpParserStates.COMPLETE
-        self.buffer = None if raw == b'' else raw
+        if self._offset > 0:
+            self.buffer.insert(0, self._pop_segment())
+        # Bounds the work done for clients slowly sending huge headers
+        if self.state < httpParserStates.HEADERS_COMPLETE and \
+                self.total_size > self.max_header_size:
+            self._reject_header_size()
 
     def build(self, disable_headers: Optional[List[bytes]] = None, for_proxy: bool = False) -> bytes:
         """Rebuild the request object."""
@@ -316,7 +378,8 @@ class HttpParser:
             body=self._get_body_or_chunks(),
         )
 
-    def _process_body(self, raw: memoryview) -> Tuple[bool, memoryview]:
+    def _process_body(self, raw: memoryview) -> memoryview:
+        """Returns bytes left over after the body."""
         # Ref: http://www.ietf.org/rfc/rfc2616.txt
         # 3.If a Content-Length header field (section 14.13) is present, its
         #   decimal value in OCTETs represents both the entity-length and the
@@ -329,24 +392,26 @@ class HttpParser:
         # TL;DR -- Give transfer-encoding header preference over content-length.
         if self._is_chunked_encoded:
             if not self.chunk:
-                self.chunk = ChunkParser()
+                self.chunk = ChunkParser(store_body=self.store_body)
+            size = len(raw)
             raw = self.chunk.parse(raw)
+            self.body_size += size - len(raw)
             if self.chunk.state == chunkParserStates.COMPLETE:
-                self.body = self.chunk.body
+                if self.store_body:
+                    self.body = self.chunk.body
                 self.state = httpParserStates.COMPLETE
-            more = False
-            return more, raw
+            return raw
         if self._content_expected:
             self.state = httpParserStates.RCVING_BODY
-            if self.body is None:
-                self.body = b''
             total_size = int(self.header(b'content-length'))
-            received_size = len(self.body)
-            self.body += raw[:total_size - received_size]
-            if self.body and \
-                    len(self.body) == int(self.header(b'content-length')):
+            received_size = self.body_size
+            body = raw[:total_size - received_size]
+            self.body_size += len(body)
+            if self.store_body:
+                self.body = (self.body or b'') + body
+            if self.body_size == total_size:
                 self.state = httpParserStates.COMPLETE
-            return len(raw) > 0, raw[total_size - received_size:]
+            return raw[total_size - received_size:]
         # Received a packet without content-length header
         # and no transfer-encoding specified.
         #
@@ -357,84 +422,179 @@ class HttpParser:
         #
         # See TestHttpParser.test_issue_398 scenario
         self.state = httpParserStates.RCVING_BODY
-        self.body = raw
-        return False, memoryview(b'')
-
-    def _process_headers(self, raw: memoryview) -> Tuple[bool, memoryview]:
-        """Returns False when no CRLF could be found in received bytes.
-
-        TODO: We should not return until parser reaches headers complete
-        state or when there is no more data left to parse.
-
-        TODO: For protection against Slowloris attack, we must parse the
-        request line and headers only after receiving end of header marker.
-        This will also help make the parser even more stateless.
+        self.body_size += len(raw)
+        if self.store_body:
+            self.body = raw.tobytes()
+        return memoryview(b'')
+
+    def _pop_segment(self) -> memoryview:
+        segment = self.buffer.pop(0)[self._offset:]
+        self._offset = 0
+        return segment
+
+    def _next_line(self) -> Optional[Tuple[memoryview, int, int]]:
+        """Consumes next line out of buffered segments.
+
+        Returns segment holding the line along with start and end of
+        line within it, excluding CRLF.  Returns None until a complete
+        line has been buffered.  Segments already searched aren't
+        searched again upon subsequent calls.
+        """
+        segments = self.buffer
+        if not segments:
+            return None
+        if self._scanned == 0:
+            # Usually, line is found within the first segment
+            first, start = segments[0], self._offset
+            match = _CRLF.search(first, start)
+            if match is not None:
+                self._offset = match.end()
+                if self._offset == len(first):
+                    segments.pop(0)
+                    self._offset = 0
+                return first, start, match.start()
+            self._scanned = 1
+        for index in range(self._scanned, len(segments)):
+            segment = segments[index]
+            head = segments[:index]
+            head[0] = head[0][self._offset:]
+            # CR ending previous segment and LF starting this one
+            if segment[0] == 10 and head[-1][-1] == 13:
+                head[-1], rest = head[-1][:-1], segment[1:]
+            else:
+                match = _CRLF.search(segment)
+                if match is None:
+                    continue
+                head.append(segment[:match.start()])
+                rest = segment[match.end():]
+            line = memoryview(b''.join(head))
+            self.buffer = ([rest] if len(rest) > 0 else []) + segments[index + 1:]
+            self._offset = self._scanned = 0
+            return line, 0, len(line)
+        self._scanned = len(segments)
+        return None
+
+    def _process_headers(self) -> bool:
+        """Consumes header lines until a blank line is received.
+
+        Returns False when no complete line could be found in buffer.
+
+        When end of headers has already been received, entire header
+        block is split and indexed in a single pass.  Otherwise, header
+        lines received so far are consumed one at a time.
         """
         while True:
-            parts = raw.tobytes().split(CRLF, 1)
-            if len(parts) == 1:
-                return False, raw
-            line, raw = parts[0], memoryview(parts[1])
-            if self.state in (httpParserStates.LINE_RCVD, httpParserStates.RCVING_HEADERS):
-                if line == b'' or line.strip() == b'':  # Blank line received.
-                    self.state = httpParserStates.HEADERS_COMPLETE
-                else:
-                    self.state = httpParserStates.RCVING_HEADERS
-                    self._process_header(line)
-            # If raw length is now zero, bail out
-            # If we have received all headers, bail out
-            if raw == b'' or self.state == httpParserStates.HEADERS_COMPLETE:
-                break
-        return len(raw) > 0, raw
+            if self._scanned == 0 and self.buffer:
+                first, start = self.buffer[0], self._offset
+                # Leading CRLF is the blank line, not a header block
+                end = None if first[start:start + 2] == CRLF \
+                    else _END_OF_HEADERS.search(first, start)
+                if end is not None:
+                    self._offset = end.end()
+                    self._process_header_block(
+                        first[start:end.start()].tobytes(), start,
+                    )
+                    if self._offset == len(first):
+                        self.buffer.pop(0)
+                        self._offset = 0
+                    return True
+                # Usually, many lines are found within the first
+                # segment, which are matched in-place one after another
+                for crlf in _CRLF.finditer(first, self._offset):
+                    header = _HEADER.match(first, self._offset, crlf.start())
+                    self._offset = crlf.end()
+                    if self._process_header(header):
+                        break
+                if self._offset == len(first):
+                    self.buffer.pop(0)
+                    self._offset = 0
+                elif self.state != httpParserStates.HEADERS_COMPLETE:
+                    # Partial line left, continues within next segments
+                    self._scanned = 1
+                if self.state == httpParserStates.HEADERS_COMPLETE:
+                    return True
+            line = self._next_line()
+            if line is None:
+                return False
+            if self._process_header(_HEADER.match(*line)):
+                return True
+
+    def _process_header_block(self, block: bytes, start: int) -> None:
+        """Indexes all header lines of a block at once.
+
+        Block starts at offset ``start`` within first segment, and
+        ``self._offset`` must already point past the end of headers."""
+        lines = block.split(CRLF)
+        self._num_headers += len(lines)
+        if self._num_headers > self.max_headers:
+            self._reject_num_headers()
+        self.state = httpParserStates.HEADERS_COMPLETE
+        for index, line in enumerate(lines):
+            name, colon, value = line.partition(COLON)
+            key = name.strip()
+            if not colon and not key:
+                # Blank line received, remaining lines aren't headers
+                self._offset = start + len(CRLF.join(lines[:index + 1])) + len(CRLF)
+                return
+            self._add_header(key, value.strip())
 
     def _process_line(
             self,
-            raw: memoryview,
+            line: bytes,
             allowed_url_schemes: Optional[List[bytes]] = None,
-    ) -> Tuple[bool, memoryview]:
-        while True:
-            parts = raw.tobytes().split(CRLF, 1)
-            if len(parts) == 1:
-                return False, raw
-            line, raw = parts[0], memoryview(parts[1])
-            if self.type == httpParserTypes.REQUEST_PARSER:
-                if self.protocol is not None and self.protocol.version is None:
-                    # We expect to receive entire proxy protocol v1 line
-                    # in one network read and don't expect partial packets
-                    self.protocol.parse(line)
-                    continue
-                # Ref: https://datatracker.ietf.org/doc/html/rfc2616#section-5.1
-                parts = line.split(WHITESPACE, 2)
-                if len(parts) == 3:
-                    self.method = parts[0]
-                    if self.method == httpMethods.CONNECT:
-                        self._is_https_tunnel = True
-                    self.set_url(
-                        parts[1], allowed_url_schemes=allowed_url_schemes,
-                    )
-                    self.version = parts[2]
-                    self.state = httpParserStates.LINE_RCVD
-                    break
-                # To avoid a possible attack vector, we raise exception
-                # if parser receives an invalid request line.
-                raise HttpProtocolException('Invalid request line %r' % raw)
+    ) -> None:
+        if self.type == httpParserTypes.REQUEST_PARSER:
+            if self.protocol is not None and self.protocol.version is None:
+                # We expect to receive entire proxy protocol v1 line
+                # in one network read and don't expect partial packets
+                self.protocol.parse(line)
+                return
+            # Ref: https://datatracker.ietf.org/doc/html/rfc2616#section-5.1
             parts = line.split(WHITESPACE, 2)
-            self.version = parts[0]
-            self.code = parts[1]
-            # Our own WebServerPlugin example currently doesn't send any reason
             if len(parts) == 3:
-                self.reason = parts[2]
-            self.state = httpParserStates.LINE_RCVD
-            break
-        return len(raw) > 0, raw
-
-    def _process_header(self, raw: bytes) -> None:
-        parts = raw.split(COLON, 1)
-        key, value = (
-            parts[0].strip(),
-            b'' if len(parts) == 1 else parts[1].strip(),
-        )
-        k = self.add_header(key, value)
+                self.method = parts[0]
+                if self.method == httpMethods.CONNECT:
+                    self._is_https_tunnel = True
+                self.set_url(
+                    parts[1], allowed_url_schemes=allowed_url_schemes,
+                )
+                self.version = parts[2]
+                self.state = httpParserStates.LINE_RCVD
+                return
+            # To avoid a possible attack vector, we raise exception
+            # if parser receives an invalid request line.
+            raise HttpProtocolException('Invalid request line %r' % line)
+        parts = line.split(WHITESPACE, 2)
+        self.version = parts[0]
+        self.code = parts[1]
+        # Our own WebServerPlugin example currently doesn't send any reason
+        if len(parts) == 3:
+            self.reason = parts[2]
+        self.state = httpParserStates.LINE_RCVD
+
+    def _process_header(self, header: Optional['re.Match[bytes]']) -> bool:
+        """Returns True upon receiving blank line i.e. end of headers.
+
+        Only header name and value are copied out of matched segment."""
+        assert header is not None
+        key, value = header.group(1).strip(), header.group(2)
+        if value is None and key == b'':    # Blank line received.
+            self.state = httpParserStates.HEADERS_COMPLETE
+            return True
+        self.state = httpParserStates.RCVING_HEADERS
+        self._num_headers += 1
+        if self._num_headers > self.max_headers:
+            self._reject_num_headers()
+        self._add_header(key, b'' if value is None else value.strip())
+        return False
+
+    def _add_header(self, key: bytes, value: bytes) -> None:
+        """Same as add_header, but shares lower cased names of
+        common headers, and notes body indications."""
+        if self.headers is None:
+            self.headers = {}
+        k = _HEADER_NAMES.get(key) or key.lower()
+        self.headers[k] = (key, value)
         # b'content-length' in self.headers and int(self.header(b'content-length')) > 0
         if k == b'content-length' and int(value) > 0:
             self._content_expected = True
@@ -443,6 +603,20 @@ class HttpParser:
         elif k == b'transfer-encoding' and value.lower() == b'chunked':
             self._is_chunked_encoded = True
 
+    def _buffered(self) -> int:
+        """Returns number of unprocessed bytes."""
+        return sum(len(segment) for segment in self.buffer) - self._offset
+
+    def _reject_header_size(self) -> None:
+        raise HttpProtocolException(
+            'Headers exceed %d bytes' % self.max_header_size,
+        )
+
+    def _reject_num_headers(self) -> None:
+        raise HttpProtocolException(
+            'More than %d headers received' % self.max_headers,
+        )
+
     def _get_body_or_chunks(self) -> Optional[bytes]:
         return ChunkParser.to_chunks(self.body) \
             if self.body and self._is_chunked_encoded else \
@@ -11,7 +11,7 @@
 import socket
 import argparse
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, List, Union, Optional
+from typing import TYPE_CHECKING, List, Union, Optional, Sequence
 
 from .parser import HttpParser
 from .connection import HttpClientConnection
@@ -81,7 +81,7 @@ class HttpProtocolHandlerPlugin(
         return False  # pragma: no cover
 
     @abstractmethod
-    def on_response_chunk(self, chunk: List[memoryview]) -> List[memoryview]:
+    def on_response_chunk(self, chunk: Sequence[memoryview]) -> Sequence[memoryview]:
         """Handle data chunks as received from the server.
 
         Return optionally modified chunk to return back to client."""
@@ -94,6 +94,21 @@ class HttpProtocolHandlerPlugin(
         """
         pass  # pragma: no cover
 
+    def deadline(self, last_activity: float) -> Optional[float]:
+        """Optionally return time after which connection must be dropped.
+
+        ``last_activity`` is the last time data was exchanged with the client.
+        Return None to use the default --keep-alive-timeout."""
+        return None
+
+    def owns_client_connection(self) -> bool:
+        """Return True when plugin reads from and writes to the client
+        connection by itself e.g. when relaying data using splice.
+
+        Protocol handler then stops reading from the client connection
+        and only watches descriptors returned by ``get_descriptors``."""
+        return False
+
     @property
     def tls_interception_enabled(self) -> bool:
         return tls_interception_enabled(self.flags)
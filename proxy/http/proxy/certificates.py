@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import threading
+import contextlib
+from typing import Any, Dict, Callable, Optional, Generator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+try:
+    import fcntl
+except ImportError:     # pragma: no cover
+    fcntl = None    # type: ignore[assignment]
+
+
+@contextlib.contextmanager
+def file_lock(path: str) -> Generator[None, None, None]:
+    """Holds an exclusive lock over ``path.lock``, shared by all
+    processes and threads.  No-op where ``flock`` is unavailable.
+
+    Lock file is removed upon release, hence, lock files never
+    accumulate for every hostname ever intercepted."""
+    if fcntl is None:   # pragma: no cover
+        yield
+        return
+    lock_path = path + '.lock'
+    while True:
+        with open(lock_path, 'ab') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            # Previous holder may have removed the file while we were
+            # waiting, in which case we must lock the one now on disk.
+            if not _is_linked(lock.fileno(), lock_path):
+                continue
+            try:
+                yield
+            finally:
+                os.remove(lock_path)
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            return
+
+
+def _is_linked(fileno: int, path: str) -> bool:
+    try:
+        return os.path.samestat(os.fstat(fileno), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+@contextlib.contextmanager
+def replacing(path: str) -> Generator[str, None, None]:
+    """Yields a temporary path to write into, which atomically replaces
+    path upon success.  Hence, path is never observed half written."""
+    tmp_path = '{0}.{1}.{2}.tmp'.format(
+        path, os.getpid(), threading.get_ident(),
+    )
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+
+class CertificateGenerator:
+    """Generates certificates of intercepted hostnames off the event loop.
+
+    Generation runs within a pool of threads shared by the process.
+    Concurrent requests for the same hostname are coalesced into a
+    single generation, while different hostnames are generated in
+    parallel.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, 'Future[str]'] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(
+            self,
+            hostname: str,
+            generate: Callable[..., str],
+            *args: Any,
+    ) -> 'Future[str]':
+        """Returns future resolving to the generated certificate path.
+
+        ``generate`` is only invoked when a generation for hostname
+        isn't already in progress."""
+        with self._lock:
+            future = self._pending.get(hostname)
+            if future is not None and not future.done():
+                return future
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='proxy-certificates',
+                )
+            future = self._pool.submit(generate, *args)
+            self._pending[hostname] = future
+        future.add_done_callback(lambda _: self._done(hostname, future))
+        return future
+
+    def _done(self, hostname: str, future: 'Future[str]') -> None:
+        with self._lock:
+            if self._pending.get(hostname) is future:
+                del self._pending[hostname]
+
+
+class FutureWakeup:
+    """Makes completion of a future observable by a selector.
+
+    Read end of a pipe becomes readable once the future completes.
+    Pipe is safe to close before the future completes.
+    """
+
+    def __init__(self, future: 'Future[Any]') -> None:
+        self._lock = threading.Lock()
+        self.fileno, self._write_end = os.pipe()
+        self._closed = False
+        future.add_done_callback(self._wakeup)
+
+    def _wakeup(self, _: 'Future[Any]') -> None:
+        with self._lock:
+            if not self._closed:
+                os.write(self._write_end, b'\x00')
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            os.close(self.fileno)
+            os.close(self._write_end)
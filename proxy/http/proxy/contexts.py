@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import ssl
+import collections
+from typing import Tuple, Union, Optional
+
+from ...common.utils import new_ssl_context
+
+
+class ServerContextCache:
+    """Bounded LRU cache of ready made server side SSLContexts,
+    keyed by intercepted hostname.
+
+    Cached contexts have their certificate chain already loaded,
+    hence, wrapping a client connection for a cached hostname costs
+    no file I/O.  Memory used by a context is approximated by size of
+    the certificate and key files it was loaded from.
+
+    Contexts select the certificate of hostname asked for by clients
+    using SNI, when one is cached.
+    """
+
+    def __init__(self, max_entries: int, max_size: int) -> None:
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._contexts: 'collections.OrderedDict[str, Tuple[int, ssl.SSLContext]]' = \
+            collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def get(self, hostname: str) -> Optional[ssl.SSLContext]:
+        cached = self._contexts.get(hostname)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._contexts.move_to_end(hostname)
+        return cached[1]
+
+    def put(self, hostname: str, certfile: str, keyfile: str) -> ssl.SSLContext:
+        ctx = new_ssl_context(ssl.Purpose.CLIENT_AUTH, verify_mode=ssl.CERT_NONE)
+        ctx.load_cert_chain(certfile=certfile, keyfile=keyfile)
+        ctx.set_servername_callback(self._select)
+        size = os.path.getsize(certfile) + os.path.getsize(keyfile)
+        old = self._contexts.pop(hostname, None)
+        if old is not None:
+            self.size -= old[0]
+        self._contexts[hostname] = (size, ctx)
+        self.size += size
+        while len(self._contexts) > 1 and (
+            len(self._contexts) > self.max_entries or
+            self.size > self.max_size
+        ):
+            _, (evicted, _) = self._contexts.popitem(last=False)
+            self.size -= evicted
+        return ctx
+
+    def _select(
+            self,
+            sock: Union[ssl.SSLSocket, ssl.SSLObject],
+            server_name: Optional[str],
+            # Context of the connection at runtime, typeshed
+            # declares servername callbacks this way though.
+            ctx: ssl.SSLSocket,
+    ) -> Optional[int]:
+        if server_name is None:
+            return None
+        cached = self._contexts.get(server_name)
+        if cached is not None and cached[1] is not sock.context:
+            sock.context = cached[1]
+        return None
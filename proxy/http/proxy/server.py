@@ -16,14 +16,23 @@
 import os
 import ssl
 import time
+import uuid
 import errno
 import socket
 import logging
+import selectors
 import threading
 import subprocess
-from typing import Any, Dict, List, Union, Optional, cast
+from typing import (
+    Any, Dict, List, Tuple, Union, Optional, Sequence, cast,
+)
+from concurrent.futures import Future
 
 from .plugin import HttpProxyBasePlugin
+from .contexts import ServerContextCache
+from .certificates import (
+    FutureWakeup, CertificateGenerator, file_lock, replacing,
+)
 from ..parser import HttpParser, httpParserTypes, httpParserStates
 from ..plugin import HttpProtocolHandlerPlugin
 from ..headers import httpHeaders
@@ -31,7 +40,10 @@ from ..methods import httpMethods
 from ..exception import HttpProtocolException, ProxyConnectionFailed
 from ..protocols import httpProtocols
 from ..responses import PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT
-from ...common.pki import gen_csr, sign_csr, gen_public_key
+from ...common.pki import (
+    HAS_CRYPTOGRAPHY, gen_csr, sign_csr, gen_public_key, gen_leaf_certificate,
+)
+from ...core.tls import TlsParser
 from ...core.event import eventNames
 from ...common.flag import flags
 from ...common.types import Readables, Writables, Descriptors
@@ -39,12 +51,17 @@ from ...common.utils import text_
 from ...core.connection import (
     TcpServerConnection, TcpConnectionUninitializedException,
 )
+from ...core.connection.splice import SpliceRelay
+from ...core.tls.hello import TlsClientHello
 from ...common.constants import (
     COMMA, DEFAULT_CA_FILE, PLUGIN_PROXY_AUTH, DEFAULT_CA_CERT_DIR,
     DEFAULT_CA_KEY_FILE, DEFAULT_CA_CERT_FILE, DEFAULT_DISABLE_HEADERS,
     PROXY_AGENT_HEADER_VALUE, DEFAULT_DISABLE_HTTP_PROXY,
-    DEFAULT_CA_SIGNING_KEY_FILE, DEFAULT_HTTP_PROXY_ACCESS_LOG_FORMAT,
-    DEFAULT_HTTPS_PROXY_ACCESS_LOG_FORMAT,
+    DEFAULT_CA_SIGNING_KEY_FILE, DEFAULT_ENABLE_ASYNC_CONNECT,
+    DEFAULT_CONNECT_TIMEOUT, DEFAULT_TUNNEL_IDLE_TIMEOUT, DEFAULT_ENABLE_SPLICE,
+    DEFAULT_ENABLE_ASYNC_HANDSHAKE, DEFAULT_INTERCEPTION_CONTEXT_CACHE_SIZE,
+    DEFAULT_INTERCEPTION_CONTEXT_CACHE_MEMORY, DEFAULT_CERTIFICATE_GENERATION_WORKERS,
+    DEFAULT_HTTP_PROXY_ACCESS_LOG_FORMAT, DEFAULT_HTTPS_PROXY_ACCESS_LOG_FORMAT,
 )
 
 
@@ -114,14 +131,93 @@ flags.add_argument(
     'Auth plugin to use instead of default basic auth plugin.',
 )
 
+flags.add_argument(
+    '--enable-async-connect',
+    action='store_true',
+    default=DEFAULT_ENABLE_ASYNC_CONNECT,
+    help='Default: False.  Connect to upstream servers without blocking '
+    'the event loop.  Client request is parked until upstream connection completes.',
+)
+
+flags.add_argument(
+    '--connect-timeout',
+    type=float,
+    default=DEFAULT_CONNECT_TIMEOUT,
+    help='Default: None.  Number of seconds within which connection '
+    'to upstream server must be established.  Defaults to --timeout when not set.',
+)
+
+flags.add_argument(
+    '--tunnel-idle-timeout',
+    type=float,
+    default=DEFAULT_TUNNEL_IDLE_TIMEOUT,
+    help='Default: None.  Number of seconds after which an idle '
+    'CONNECT tunnel must be dropped.  Defaults to --timeout when not set.',
+)
+
+flags.add_argument(
+    '--enable-splice',
+    action='store_true',
+    default=DEFAULT_ENABLE_SPLICE,
+    help='Default: False.  Linux only, requires Python 3.10+.  '
+    'Relay data of CONNECT tunnels which are not intercepted using splice(2), '
+    'without copying it into the proxy.  Only applicable when no plugin '
+    'implements handle_upstream_chunk.',
+)
+
+flags.add_argument(
+    '--enable-async-handshake',
+    action='store_true',
+    default=DEFAULT_ENABLE_ASYNC_HANDSHAKE,
+    help='Default: False.  Perform TLS handshakes of intercepted '
+    'CONNECT tunnels without blocking the event loop.  Client handshake '
+    'starts once upstream handshake has completed and certificate for '
+    'intercepted hostname has been generated.  For hostnames with cached '
+    'certificates, both handshakes proceed in parallel.',
+)
+
+flags.add_argument(
+    '--interception-context-cache-size',
+    type=int,
+    default=DEFAULT_INTERCEPTION_CONTEXT_CACHE_SIZE,
+    help='Default: ' + str(DEFAULT_INTERCEPTION_CONTEXT_CACHE_SIZE) + '.  ' +
+    'Maximum number of intercepted hostnames for which TLS contexts, '
+    'with generated certificate loaded, are kept in memory per process.',
+)
+
+flags.add_argument(
+    '--interception-context-cache-memory',
+    type=int,
+    default=DEFAULT_INTERCEPTION_CONTEXT_CACHE_MEMORY,
+    help='Default: ' + str(DEFAULT_INTERCEPTION_CONTEXT_CACHE_MEMORY) + ' bytes.  ' +
+    'Maximum size of certificates and keys loaded into TLS contexts '
+    'of intercepted hostnames kept in memory per process.',
+)
+
+flags.add_argument(
+    '--certificate-generation-workers',
+    type=int,
+    default=DEFAULT_CERTIFICATE_GENERATION_WORKERS,
+    help='Default: ' + str(DEFAULT_CERTIFICATE_GENERATION_WORKERS) + '.  ' +
+    'Maximum number of threads per process generating certificates '
+    'of intercepted hostnames in parallel.',
+)
+
 
 class HttpProxyPlugin(HttpProtocolHandlerPlugin):
     """HttpProtocolHandler plugin which implements HttpProxy specifications."""
 
-    # Used to synchronization during certificate generation and
+    # Used to synchronization of TLS context cache and
     # connection pool operations.
     lock = threading.Lock()
 
+    # TLS contexts for intercepted hostnames, shared within the process.
+    contexts: Optional[ServerContextCache] = None
+
+    # Generates certificates for intercepted hostnames off the event loop,
+    # shared within the process.
+    certificates: Optional[CertificateGenerator] = None
+
     def __init__(
             self,
             *args: Any, **kwargs: Any,
@@ -129,9 +225,38 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         super().__init__(*args, **kwargs)
         self.start_time: float = time.time()
         self.upstream: Optional[TcpServerConnection] = None
-        self.response: HttpParser = HttpParser(httpParserTypes.RESPONSE_PARSER)
+        self.connect_started_at: Optional[float] = None
+        # Upstream responses are parsed only to track where they end,
+        # their body isn't held in memory.  Plugins needing body must
+        # parse chunks received within handle_upstream_chunk themselves.
+        self.response: HttpParser = HttpParser(
+            httpParserTypes.RESPONSE_PARSER,
+            max_header_size=self.flags.max_header_size,
+            max_headers=self.flags.max_headers,
+            store_body=False,
+        )
         self.pipeline_request: Optional[HttpParser] = None
         self.pipeline_response: Optional[HttpParser] = None
+        # Pipelined requests sent upstream, awaiting a complete response
+        self.pipelined_requests: int = 0
+        # Relays tunnel data when --enable-splice is used
+        self.relay: Optional[SpliceRelay] = None
+        self.relay_activity: float = 0
+        # True while TLS handshakes are in progress when
+        # --enable-async-handshake is used.  Handshake attributes
+        # hold selector event the handshake is waiting for.
+        self.intercepting: bool = False
+        self.server_handshake: Optional[int] = None
+        self.client_handshake: Optional[int] = None
+        # Certificate being generated for intercepted hostname.  With
+        # --enable-async-handshake, interception remains parked until
+        # certificate_wakeup becomes readable.
+        self.certificate: Optional['Future[str]'] = None
+        self.certificate_wakeup: Optional[FutureWakeup] = None
+        # ClientHello peeked while upstream handshake is in progress and
+        # cached TLS context for the hostname client asked for, if any.
+        self.client_hello: Optional[TlsClientHello] = None
+        self.early_context: Optional[ssl.SSLContext] = None
 
         self.plugins: Dict[str, HttpProxyBasePlugin] = {}
         if b'HttpProxyBasePlugin' in self.flags.plugins:
@@ -149,22 +274,51 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
     def protocols() -> List[int]:
         return [httpProtocols.HTTP_PROXY]
 
+    def deadline(self, last_activity: float) -> Optional[float]:
+        if self._is_upstream_connecting():
+            assert self.connect_started_at is not None
+            return self.connect_started_at + \
+                self._timeout(self.flags.connect_timeout)
+        if self.request.is_https_tunnel:
+            # Protocol handler only sees client activity, not
+            # tunnel data relayed by splice in either direction.
+            return max(last_activity, self.relay_activity) + \
+                self._timeout(self.flags.tunnel_idle_timeout)
+        if self._is_awaiting_response():
+            # --keep-alive-timeout only applies in between requests
+            return last_activity + float(self.flags.timeout)
+        return None
+
+    def owns_client_connection(self) -> bool:
+        return self.relay is not None or self.intercepting
+
     async def get_descriptors(self) -> Descriptors:
         r: List[int] = []
         w: List[int] = []
-        if (
-            self.upstream and
-            not self.upstream.closed and
-            self.upstream.connection
-        ):
-            r.append(self.upstream.connection.fileno())
-        if (
-            self.upstream and
-            not self.upstream.closed and
-            self.upstream.has_buffer() and
-            self.upstream.connection
-        ):
+        self._maybe_start_relay()
+        if self.relay is not None:
+            r, w = self.relay.get_descriptors()
+        elif self.intercepting:
+            for fileno, event in self._interception_events():
+                (r if event == selectors.EVENT_READ else w).append(fileno)
+        elif self._is_upstream_connecting():
+            assert self.upstream
+            # Non-blocking connect completes once socket is write ready
             w.append(self.upstream.connection.fileno())
+        else:
+            if (
+                self.upstream and
+                not self.upstream.closed and
+                self.upstream.connection
+            ):
+                r.append(self.upstream.connection.fileno())
+            if (
+                self.upstream and
+                not self.upstream.closed and
+                self.upstream.has_buffer() and
+                self.upstream.connection
+            ):
+                w.append(self.upstream.connection.fileno())
         # TODO(abhinavsingh): We need to keep a mapping of plugin and
         # descriptors registered by them, so that within write/read blocks
         # we can invoke the right plugin callbacks.
@@ -175,6 +329,19 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return r, w
 
     async def write_to_descriptors(self, w: Writables) -> bool:
+        if self.relay is not None:
+            spliced = self.relay.spliced_bytes
+            try:
+                self.relay.write_to_descriptors(w)
+            except OSError as e:
+                logger.warning('Exception while relaying tunnel data: %r' % e)
+                return self._close_and_release()
+            self._track_relay_activity(spliced)
+            return False
+        if self.intercepting:
+            if any(fileno in w for fileno, _ in self._interception_events()):
+                return self._continue_interception()
+            return False
         if (self.upstream and self.upstream.connection.fileno() not in w) or not self.upstream:
             # Currently, we just call write/read block of each plugins.  It is
             # plugins responsibility to ignore this callback, if passed descriptors
@@ -183,6 +350,8 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 teardown = await plugin.write_to_descriptors(w)
                 if teardown:
                     return True
+        elif self._is_upstream_connecting():
+            return self._on_upstream_connected()
         elif self.upstream and not self.upstream.closed and \
                 self.upstream.has_buffer() and \
                 self.upstream.connection.fileno() in w:
@@ -207,6 +376,21 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return False
 
     async def read_from_descriptors(self, r: Readables) -> bool:
+        if self.relay is not None:
+            spliced = self.relay.spliced_bytes
+            try:
+                if self.relay.read_from_descriptors(r):
+                    logger.debug('Tunnel closed, tearing down...')
+                    return True
+            except OSError as e:
+                logger.warning('Exception while relaying tunnel data: %r' % e)
+                return self._close_and_release()
+            self._track_relay_activity(spliced)
+            return False
+        if self.intercepting:
+            if any(fileno in r for fileno, _ in self._interception_events()):
+                return self._continue_interception()
+            return False
         if (
             self.upstream and not
             self.upstream.closed and
@@ -285,6 +469,11 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return False
 
     def on_client_connection_close(self) -> None:
+        if self.relay is not None:
+            self.response.total_size += self.relay.upstream_bytes
+            self.relay.close()
+        if self.certificate_wakeup is not None:
+            self.certificate_wakeup.close()
         context = {
             'client_ip': None if not self.client.addr else self.client.addr[0],
             'client_port': None if not self.client.addr else self.client.addr[1],
@@ -383,7 +572,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             access_log_format = DEFAULT_HTTP_PROXY_ACCESS_LOG_FORMAT
         logger.info(access_log_format.format_map(log_attrs))
 
-    def on_response_chunk(self, chunk: List[memoryview]) -> List[memoryview]:
+    def on_response_chunk(self, chunk: Sequence[memoryview]) -> Sequence[memoryview]:
         # TODO: Allow to output multiple access_log lines
         # for each request over a pipelined HTTP connection (not for HTTPS).
         # However, this must also be accompanied by resetting both request
@@ -438,6 +627,8 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                     # request line before HTTP request lines.
                     self.pipeline_request = HttpParser(
                         httpParserTypes.REQUEST_PARSER,
+                        max_header_size=self.flags.max_header_size,
+                        max_headers=self.flags.max_headers,
                     )
                 self.pipeline_request.parse(raw)
                 if self.pipeline_request.is_complete:
@@ -455,6 +646,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                             self.pipeline_request.build(),
                         ),
                     )
+                    self.pipelined_requests += 1
                     if not self.pipeline_request.is_connection_upgrade:
                         self.pipeline_request = None
             # For scenarios where we cannot peek into the data,
@@ -497,20 +689,12 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         # Optionally, setup interceptor if TLS interception is enabled.
         if self.upstream:
             if self.request.is_https_tunnel:
-                self.client.queue(PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT)
-                if self.tls_interception_enabled:
-                    # Check if any plugin wants to
-                    # disable interception even
-                    # with flags available
-                    do_intercept = True
-                    for plugin in self.plugins.values():
-                        do_intercept = plugin.do_intercept(self.request)
-                        # A plugin requested to not intercept
-                        # the request
-                        if do_intercept is False:
-                            break
-                    if do_intercept:
-                        return self.intercept()
+                # Request remains parked until a non-blocking
+                # upstream connection attempt completes.
+                # See _on_upstream_connected.
+                if self._is_upstream_connecting():
+                    return False
+                return self.establish_tunnel()
             # If an upstream server connection was established for http request,
             # queue the request for upstream server.
             else:
@@ -543,14 +727,38 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 )
         return False
 
+    def establish_tunnel(self) -> Union[socket.socket, bool]:
+        """Responds back with tunnel established response.
+
+        Optionally, sets up interceptor if TLS interception is enabled."""
+        self.client.queue(PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT)
+        if self.tls_interception_enabled:
+            # Check if any plugin wants to
+            # disable interception even
+            # with flags available
+            do_intercept = True
+            for plugin in self.plugins.values():
+                do_intercept = plugin.do_intercept(self.request)
+                # A plugin requested to not intercept
+                # the request
+                if do_intercept is False:
+                    break
+            if do_intercept:
+                return self.intercept()
+        return False
+
     def handle_pipeline_response(self, raw: memoryview) -> None:
         if self.pipeline_response is None:
             self.pipeline_response = HttpParser(
                 httpParserTypes.RESPONSE_PARSER,
+                max_header_size=self.flags.max_header_size,
+                max_headers=self.flags.max_headers,
+                store_body=False,
             )
         self.pipeline_response.parse(raw)
         if self.pipeline_response.is_complete:
             self.pipeline_response = None
+            self.pipelined_requests = max(self.pipelined_requests - 1, 0)
 
     def connect_upstream(self) -> None:
         host, port = self.request.host, self.request.port
@@ -580,12 +788,21 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                     )
                     # Connect with overridden upstream IP and source address
                     # if any of the plugin returned a non-null value.
+                    self.connect_started_at = time.time()
                     self.upstream.connect(
                         addr=None if not upstream_ip else (
                             upstream_ip, port,
                         ), source_address=source_addr,
+                        non_blocking=self.flags.enable_async_connect,
+                        timeout=self._timeout(self.flags.connect_timeout),
                     )
                     self.upstream.connection.setblocking(False)
+                    if self._is_upstream_connecting():
+                        logger.debug(
+                            'Connection to upstream %s:%d in progress' %
+                            (text_(host), port),
+                        )
+                        return
                 if not created:
                     # NOTE: Acquired connection might be in an unusable state.
                     #
@@ -627,22 +844,25 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             self, cert_file_path: str, certificate: Dict[str, Any],
     ) -> None:
         '''CA signing key (default) is used for generating a public key
-        for common_name, if one already doesn't exist.  Using generated
-        public key a CSR request is generated, which is then signed by
-        CA key and secret.  Again this process only happen if signed
-        certificate doesn't already exist.
+        for common_name.  Using generated public key a CSR request is
+        generated, which is then signed by CA key and secret and written
+        to cert_file_path.  Intermediate public key and CSR files are
+        removed once done.
 
-        returns signed certificate path.'''
+        When ``cryptography`` package is available, certificate is instead
+        signed in-process and no intermediate files are written.
+
+        Callers must ensure no other generation for the same
+        cert_file_path is in progress, see generate_upstream_certificate.'''
         assert(
             self.request.host and self.flags.ca_cert_dir and self.flags.ca_signing_key_file and
             self.flags.ca_key_file and self.flags.ca_cert_file
         )
 
         upstream_subject = {s[0][0]: s[0][1] for s in certificate['subject']}
-        public_key_path = os.path.join(
-            self.flags.ca_cert_dir,
-            '{0}.{1}'.format(text_(self.request.host), 'pub'),
-        )
+        # Intermediate files are private to this generation
+        public_key_path = '{0}.{1}'.format(cert_file_path, 'pub')
+        csr_path = '{0}.{1}'.format(cert_file_path, 'csr')
         private_key_path = self.flags.ca_signing_key_file
         private_key_password = ''
 
@@ -655,19 +875,40 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             'O': 'organizationName',
             'OU': 'organizationalUnitName',
         }
-        subject = ''
-        for key in keys:
-            if upstream_subject.get(keys[key], None):
-                subject += '/{0}={1}'.format(
-                    key,
-                    upstream_subject.get(keys[key]),
-                )
+        subject_fields = {
+            key: upstream_subject[keys[key]]
+            for key in keys if upstream_subject.get(keys[key], None)
+        }
+        subject = ''.join(
+            '/{0}={1}'.format(key, value)
+            for key, value in subject_fields.items()
+        )
         alt_subj_names = [text_(self.request.host)]
         validity_in_days = 365 * 2
         timeout = 10
 
-        # Generate a public key for the common name
-        if not os.path.isfile(public_key_path):
+        ca_key_path = self.flags.ca_key_file
+        ca_key_password = ''
+        ca_crt_path = self.flags.ca_cert_file
+        # Certificates can be generated concurrently, hence
+        # serial must not be derived out of time and pid alone.
+        serial = str(uuid.uuid4().int >> 64)
+
+        if HAS_CRYPTOGRAPHY:
+            logger.debug('Signing certificate %s', cert_file_path)
+            resp = gen_leaf_certificate(
+                crt_path=cert_file_path, key_path=private_key_path,
+                password=private_key_password, ca_key_path=ca_key_path,
+                ca_key_password=ca_key_password, ca_crt_path=ca_crt_path,
+                subject=subject_fields, serial=serial,
+                alt_subj_names=alt_subj_names,
+                validity_in_days=validity_in_days,
+            )
+            assert(resp is True)
+            return
+
+        try:
+            # Generate a public key for the common name
             logger.debug('Generating public key %s', public_key_path)
             resp = gen_public_key(
                 public_key_path=public_key_path, private_key_path=private_key_path,
@@ -676,13 +917,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             )
             assert(resp is True)
 
-        csr_path = os.path.join(
-            self.flags.ca_cert_dir,
-            '{0}.{1}'.format(text_(self.request.host), 'csr'),
-        )
-
-        # Generate a CSR request for this common name
-        if not os.path.isfile(csr_path):
+            # Generate a CSR request for this common name
             logger.debug('Generating CSR %s', csr_path)
             resp = gen_csr(
                 csr_path=csr_path, key_path=private_key_path, password=private_key_password,
@@ -690,13 +925,7 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
             )
             assert(resp is True)
 
-        ca_key_path = self.flags.ca_key_file
-        ca_key_password = ''
-        ca_crt_path = self.flags.ca_cert_file
-        serial = '%d%d' % (time.time(), os.getpid())
-
-        # Sign generated CSR
-        if not os.path.isfile(cert_file_path):
+            # Sign generated CSR
             logger.debug('Signing CSR %s', cert_file_path)
             resp = sign_csr(
                 csr_path=csr_path, crt_path=cert_file_path, ca_key_path=ca_key_path,
@@ -705,6 +934,10 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 validity_in_days=validity_in_days, timeout=timeout,
             )
             assert(resp is True)
+        finally:
+            for path in (public_key_path, csr_path):
+                if os.path.isfile(path):
+                    os.remove(path)
 
     @staticmethod
     def generated_cert_file_path(ca_cert_dir: str, host: str) -> str:
@@ -726,9 +959,13 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         cert_file_path = HttpProxyPlugin.generated_cert_file_path(
             self.flags.ca_cert_dir, text_(self.request.host),
         )
-        with self.lock:
-            if not os.path.isfile(cert_file_path):
-                self.gen_ca_signed_certificate(cert_file_path, certificate)
+        if not os.path.isfile(cert_file_path):
+            # Certificate for a hostname is generated by one process at
+            # a time, others wait and then find it already generated.
+            with file_lock(cert_file_path):
+                if not os.path.isfile(cert_file_path):
+                    with replacing(cert_file_path) as tmp_path:
+                        self.gen_ca_signed_certificate(tmp_path, certificate)
         return cert_file_path
 
     def intercept(self) -> Union[socket.socket, bool]:
@@ -736,6 +973,11 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         teardown = self.wrap_server()
         if teardown:
             return teardown
+        if self.flags.enable_async_handshake:
+            # Handshakes are driven by the event loop,
+            # see _continue_interception
+            self.intercepting = True
+            return False
         # Generate certificate and perform handshake with client
         # wrap_client also flushes client data before wrapping
         # sending to client can raise, handle expected exceptions
@@ -749,15 +991,28 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return self.client.connection
 
     def wrap_server(self) -> bool:
+        """Wraps upstream connection with TLS.
+
+        With --enable-async-handshake, call again whenever upstream is
+        ready for ``server_handshake`` event, until it becomes None."""
         assert self.upstream is not None
         assert isinstance(self.upstream.connection, socket.socket)
         do_close = False
         try:
-            self.upstream.wrap(
-                text_(self.request.host),
-                self.flags.ca_file,
-                as_non_blocking=True,
-            )
+            if not self.flags.enable_async_handshake:
+                self.upstream.wrap(
+                    text_(self.request.host),
+                    self.flags.ca_file,
+                    as_non_blocking=True,
+                )
+            else:
+                if not isinstance(self.upstream.connection, ssl.SSLSocket):
+                    self.upstream.wrap(
+                        text_(self.request.host),
+                        self.flags.ca_file,
+                        do_handshake=False,
+                    )
+                self.server_handshake = self.upstream.handshake()
         except ssl.SSLCertVerificationError:    # Server raised certificate verification error
             # When --disable-interception-on-ssl-cert-verification-error flag is on,
             # we will cache such upstream hosts and avoid intercepting them for future
@@ -789,15 +1044,25 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
         return do_close
 
     def wrap_client(self) -> bool:
+        """Wraps client connection with TLS using a generated certificate.
+
+        With --enable-async-handshake, call again whenever client is
+        ready for ``client_handshake`` event, until it becomes None."""
         assert self.upstream is not None and self.flags.ca_signing_key_file is not None
         assert isinstance(self.upstream.connection, ssl.SSLSocket)
         do_close = False
         try:
-            # TODO: Perform async certificate generation
-            generated_cert = self.generate_upstream_certificate(
-                cast(Dict[str, Any], self.upstream.connection.getpeercert()),
-            )
-            self.client.wrap(self.flags.ca_signing_key_file, generated_cert)
+            if not isinstance(self.client.connection, ssl.SSLSocket):
+                ctx = self.server_context()
+                if ctx is None:
+                    # Parked until certificate has been generated
+                    return False
+                if not self.flags.enable_async_handshake:
+                    self.client.wrap(context=ctx)
+                else:
+                    self.client.wrap(do_handshake=False, context=ctx)
+            if self.flags.enable_async_handshake:
+                self.client_handshake = self.client.handshake()
         except subprocess.TimeoutExpired as e:  # Popen communicate timeout
             logger.exception(
                 'TimeoutExpired during certificate generation', exc_info=e,
@@ -850,10 +1115,52 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
                 ), exc_info=e,
             )
             do_close = True
-        if not do_close:
-            logger.debug('TLS intercepting using %s', generated_cert)
         return do_close
 
+    def server_context(self) -> Optional[ssl.SSLContext]:
+        """Returns TLS context to wrap client connection with.
+
+        Certificate for intercepted hostname is generated and loaded
+        only when context isn't already cached within the process.
+        Generation happens off the event loop.  With --enable-async-handshake,
+        None is returned until certificate is ready, otherwise, waits for it."""
+        assert self.upstream is not None and self.flags.ca_signing_key_file is not None
+        assert isinstance(self.upstream.connection, ssl.SSLSocket)
+        if HttpProxyPlugin.contexts is None:
+            HttpProxyPlugin.contexts = ServerContextCache(
+                self.flags.interception_context_cache_size,
+                self.flags.interception_context_cache_memory,
+            )
+        if HttpProxyPlugin.certificates is None:
+            HttpProxyPlugin.certificates = CertificateGenerator(
+                self.flags.certificate_generation_workers,
+            )
+        if self.early_context is not None:
+            return self.early_context
+        hostname = text_(self.request.host)
+        if self.certificate is None:
+            ctx = HttpProxyPlugin.contexts.get(hostname)
+            if ctx is not None:
+                return ctx
+            self.certificate = HttpProxyPlugin.certificates.submit(
+                hostname,
+                self.generate_upstream_certificate,
+                cast(Dict[str, Any], self.upstream.connection.getpeercert()),
+            )
+        if self.flags.enable_async_handshake and not self.certificate.done():
+            if self.certificate_wakeup is None:
+                self.certificate_wakeup = FutureWakeup(self.certificate)
+            return None
+        if self.certificate_wakeup is not None:
+            self.certificate_wakeup.close()
+            self.certificate_wakeup = None
+        generated_cert = self.certificate.result()
+        logger.debug('TLS intercepting using %s', generated_cert)
+        with self.lock:
+            return HttpProxyPlugin.contexts.put(
+                hostname, generated_cert, self.flags.ca_signing_key_file,
+            )
+
     #
     # Event emitter callbacks
     #
@@ -942,6 +1249,170 @@ class HttpProxyPlugin(HttpProtocolHandlerPlugin):
     # Internal methods
     #
 
+    def _timeout(self, timeout: Optional[float]) -> float:
+        return float(self.flags.timeout) if timeout is None else timeout
+
+    def _is_upstream_connecting(self) -> bool:
+        return self.flags.enable_async_connect and \
+            self.upstream is not None and \
+            not self.upstream.closed and \
+            self.upstream.connecting
+
+    def _is_awaiting_response(self) -> bool:
+        return self.upstream is not None and \
+            not self.upstream.closed and \
+            (not self.response.is_complete or self.pipelined_requests > 0)
+
+    def _on_upstream_connected(self) -> bool:
+        """Resumes parked request once non-blocking upstream connection completes.
+
+        Raises ProxyConnectionFailed if connection attempt has failed."""
+        assert self.upstream
+        host, port = self.upstream.addr
+        try:
+            self.upstream.finish_connect()
+        except OSError as e:
+            logger.warning(
+                'Unable to connect with upstream %s:%d due to %s' % (
+                    host, port, str(e),
+                ),
+            )
+            self.upstream.close()
+            raise ProxyConnectionFailed(host, port, repr(e)) from e
+        logger.debug('Connected to upstream %s:%s' % (host, port))
+        if self.request.is_https_tunnel:
+            # Interception updates client connection reference
+            # in-place, hence only teardown signal is of interest.
+            return self.establish_tunnel() is True
+        return False
+
+    def _interception_events(self) -> List[Tuple[int, int]]:
+        """Returns descriptors and events interception is waiting for."""
+        assert self.upstream
+        events: List[Tuple[int, int]] = []
+        if self.server_handshake is not None:
+            events.append((self.upstream.connection.fileno(), self.server_handshake))
+        if isinstance(self.client.connection, ssl.SSLSocket):
+            if self.client_handshake is not None:
+                events.append((self.client.connection.fileno(), self.client_handshake))
+        elif self.client.has_buffer():
+            # Tunnel established response must be flushed before
+            # client connection can be wrapped.
+            events.append((self.client.connection.fileno(), selectors.EVENT_WRITE))
+        elif self.certificate_wakeup is not None:
+            events.append((self.certificate_wakeup.fileno, selectors.EVENT_READ))
+        elif self.server_handshake is None:
+            # Client connection can be wrapped right away
+            events.append((self.client.connection.fileno(), selectors.EVENT_WRITE))
+        elif self.client_hello is None:
+            events.append((self.client.connection.fileno(), selectors.EVENT_READ))
+        return events
+
+    def _continue_interception(self) -> bool:
+        """Drives interception handshakes as far as possible
+        without blocking.  Returns True to teardown.
+
+        Client handshake starts once upstream handshake has completed,
+        unless TLS context for the hostname client asked for is already
+        cached, in which case both handshakes proceed in parallel."""
+        try:
+            if self.server_handshake is not None:
+                if self.wrap_server():
+                    return True
+            if not isinstance(self.client.connection, ssl.SSLSocket):
+                if self.client.has_buffer():
+                    self.client.flush(self.flags.max_sendbuf_size)
+                    if self.client.has_buffer():
+                        return False
+                if self.server_handshake is not None and \
+                        self._early_server_context() is None:
+                    return False
+                if self.wrap_client():
+                    return True
+            elif self.client_handshake is not None:
+                if self.wrap_client():
+                    return True
+        except OSError as e:
+            logger.warning(
+                'Exception during TLS interception for upstream {0}: {1!r}'.format(
+                    text_(self.request.host), e,
+                ),
+            )
+            return True
+        if self.server_handshake is not None or \
+                self.certificate_wakeup is not None or \
+                self.client_handshake is not None:
+            return False
+        self.intercepting = False
+        # Update all plugin connection reference
+        for plugin in self.plugins.values():
+            plugin.client._conn = self.client.connection
+        logger.debug('TLS interception established for %s', text_(self.request.host))
+        return False
+
+    def _early_server_context(self) -> Optional[ssl.SSLContext]:
+        """Peeks into client's ClientHello, once it has arrived, and
+        returns cached TLS context for the hostname client asked for
+        using SNI, otherwise for the CONNECT hostname."""
+        if self.client_hello is not None:
+            return self.early_context
+        try:
+            raw = self.client.connection.recv(
+                self.flags.client_recvbuf_size, socket.MSG_PEEK,
+            )
+        except BlockingIOError:
+            return None
+        self.client_hello = TlsClientHello()
+        tls = TlsParser()
+        if tls.parse(raw)[0] and tls.handshake and tls.handshake.client_hello:
+            self.client_hello = tls.handshake.client_hello
+        if HttpProxyPlugin.contexts is not None:
+            self.early_context = HttpProxyPlugin.contexts.get(
+                self.client_hello.server_name or text_(self.request.host),
+            )
+        if self.early_context is not None:
+            logger.debug(
+                'Handshaking with client for %s in parallel with upstream',
+                self.client_hello.server_name or text_(self.request.host),
+            )
+        return self.early_context
+
+    def _maybe_start_relay(self) -> None:
+        """Hands tunnel over to a splice relay once the tunnel
+        is established and all buffered data has been flushed."""
+        if self.relay is not None or \
+                self.intercepting or \
+                not self.flags.enable_splice or \
+                not SpliceRelay.is_available() or \
+                self.flags.enable_conn_pool or \
+                not self.request.is_https_tunnel or \
+                self.upstream is None or \
+                self.upstream.closed or \
+                self._is_upstream_connecting() or \
+                self.upstream.has_buffer() or \
+                self.client.has_buffer():
+            return
+        # Intercepted tunnels and TLS client
+        # connections must be handled in userspace
+        if isinstance(self.client.connection, ssl.SSLSocket) or \
+                isinstance(self.upstream.connection, ssl.SSLSocket):
+            return
+        for plugin in self.plugins.values():
+            if type(plugin).handle_upstream_chunk is not \
+                    HttpProxyBasePlugin.handle_upstream_chunk:
+                return
+        self.relay = SpliceRelay(
+            self.client.connection.fileno(),
+            self.upstream.connection.fileno(),
+            self.flags.server_recvbuf_size,
+        )
+        logger.debug('Relaying tunnel using splice')
+
+    def _track_relay_activity(self, spliced: int) -> None:
+        assert self.relay
+        if self.relay.spliced_bytes != spliced:
+            self.relay_activity = time.time()
+
     def _close_and_release(self) -> bool:
         if self.flags.enable_conn_pool:
             assert self.upstream and not self.upstream.closed and self.upstream_conn_pool
@@ -8,14 +8,16 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
-import gzip
 from typing import Any, Dict, Optional
 
 from .codes import httpStatusCodes
+from .compression import (
+    GZIP, IDENTITY, negotiate, is_compressible, compress as compress_content,
+)
 from ..common.utils import build_http_response
 from ..common.constants import (
     PROXY_AGENT_HEADER_KEY, PROXY_AGENT_HEADER_VALUE,
-    DEFAULT_MIN_COMPRESSION_LENGTH,
+    DEFAULT_COMPRESSION_LEVEL, DEFAULT_MIN_COMPRESSION_LENGTH,
 )
 
 
@@ -102,29 +104,47 @@ def okResponse(
         headers: Optional[Dict[bytes, bytes]] = None,
         compress: bool = True,
         min_compression_length: int = DEFAULT_MIN_COMPRESSION_LENGTH,
+        accept_encoding: Optional[bytes] = None,
         **kwargs: Any,
 ) -> memoryview:
-    do_compress: bool = False
-    if compress and content and len(content) > min_compression_length:
-        do_compress = True
+    """Returns a 200 OK response packet.
+
+    Content longer than ``min_compression_length`` is compressed unless
+    its ``Content-Type`` is incompressible.  When client's ``Accept-Encoding``
+    is passed, encoding is negotiated (and content possibly left
+    uncompressed), otherwise content is gzipped."""
+    encoding = IDENTITY
+    if compress and content and len(content) > min_compression_length and \
+            is_compressible(_content_type(headers)):
+        encoding = GZIP if accept_encoding is None else negotiate(accept_encoding)
+    if encoding != IDENTITY:
         if not headers:
             headers = {}
         headers.update({
-            b'Content-Encoding': b'gzip',
+            b'Content-Encoding': encoding,
         })
+        if accept_encoding is not None:
+            headers[b'Vary'] = b'Accept-Encoding'
     return memoryview(
         build_http_response(
             200,
             reason=b'OK',
             headers=headers,
-            body=gzip.compress(content)
-            if do_compress and content
+            body=compress_content(content, encoding, DEFAULT_COMPRESSION_LEVEL)
+            if encoding != IDENTITY and content
             else content,
             **kwargs,
         ),
     )
 
 
+def _content_type(headers: Optional[Dict[bytes, bytes]]) -> Optional[bytes]:
+    for k, v in (headers or {}).items():
+        if k.lower() == b'content-type':
+            return v
+    return None
+
+
 def permanentRedirectResponse(location: bytes) -> memoryview:
     return memoryview(
         build_http_response(
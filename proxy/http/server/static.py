@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+
+    .. spelling::
+
+       sendfile
+"""
+import os
+import ssl
+import socket
+import logging
+import calendar
+import posixpath
+import mimetypes
+from typing import IO, Dict, Tuple, Optional, NamedTuple
+from email.utils import formatdate, parsedate
+from urllib.parse import unquote
+
+from ..parser import HttpParser
+from ..methods import httpMethods
+from ..responses import NOT_FOUND_RESPONSE_PKT
+from ..connection import HttpClientConnection
+from ..compression import (
+    ENCODINGS, IDENTITY, EXTENSIONS, CompressedCache, compress, negotiate,
+    is_compressible,
+)
+from ...common.utils import text_, bytes_, build_http_response
+from ...common.constants import (
+    COMMA, DEFAULT_MIN_COMPRESSION_LENGTH,
+    DEFAULT_STATIC_COMPRESSION_LEVEL, DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+StaticFile = NamedTuple(
+    'StaticFile', [
+        ('path', str),
+        ('size', int),
+        ('mtime_ns', int),
+        ('etag', bytes),
+        ('last_modified', bytes),
+        ('content_type', bytes),
+        ('compressible', bool),
+        # (encoding, path) of precompressed siblings
+        ('variants', Tuple[Tuple[bytes, str], ...]),
+    ],
+)
+
+# Content types of files which are themselves compressed
+_ENCODED_CONTENT_TYPES = {
+    'gzip': 'application/gzip',
+    'br': 'application/x-brotli',
+}
+
+
+class StaticFileIndex:
+    """Metadata index of files served out of a static directory.
+
+    Indexed metadata is revalidated against ``os.stat`` on every
+    lookup, hence, modified files are picked up immediately without
+    having to read them.  Paths resolving outside of the static
+    directory are never served.
+
+    Precompressed ``.br`` and ``.gz`` siblings of compressible files
+    are discovered when a file is (re)indexed.  Compressed variants of
+    files without siblings are cached in ``compressed``.
+    """
+
+    def __init__(
+            self,
+            root: str,
+            cache_size: int = DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
+    ) -> None:
+        self.root = os.path.realpath(root)
+        self.compressed = CompressedCache(cache_size)
+        self._files: Dict[str, StaticFile] = {}
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        """Returns metadata for requested path, None if not found."""
+        path = posixpath.normpath(unquote(path.split('?', 1)[0]))
+        indexed = self._files.get(path)
+        filepath = self._resolve(path) if indexed is None else indexed.path
+        if filepath is None:
+            return None
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            self._files.pop(path, None)
+            return None
+        if indexed is not None and \
+                indexed.mtime_ns == st.st_mtime_ns and \
+                indexed.size == st.st_size:
+            return indexed
+        content_type, encoding = mimetypes.guess_type(filepath)
+        if encoding is not None:
+            content_type = _ENCODED_CONTENT_TYPES.get(
+                encoding, 'application/octet-stream',
+            )
+        content_type = content_type or 'text/plain'
+        compressible = is_compressible(bytes_(content_type))
+        indexed = StaticFile(
+            path=filepath,
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            etag=b'"%x-%x"' % (st.st_mtime_ns, st.st_size),
+            last_modified=bytes_(formatdate(st.st_mtime, usegmt=True)),
+            content_type=bytes_(content_type),
+            compressible=compressible,
+            variants=tuple(
+                (enc, filepath + ext)
+                for enc, ext in EXTENSIONS.items()
+                if compressible and os.path.isfile(filepath + ext)
+            ),
+        )
+        self._files[path] = indexed
+        return indexed
+
+    def _resolve(self, path: str) -> Optional[str]:
+        filepath = os.path.realpath(self.root + path)
+        if not filepath.startswith(self.root + os.sep) or \
+                not os.path.isfile(filepath):
+            return None
+        return filepath
+
+
+_indexes: Dict[str, StaticFileIndex] = {}
+
+
+def static_file_index(
+        root: str,
+        cache_size: int = DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
+) -> StaticFileIndex:
+    """Returns index shared by all connections served out of root."""
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = StaticFileIndex(root, cache_size)
+    return index
+
+
+class StaticResponse:
+    """A queued static file response.
+
+    Response head is queued into client buffer, body is then
+    streamed out of the file.  Bodies are written using ``sendfile``
+    where possible, otherwise, they are read in chunks of
+    ``max_size`` bytes and queued into client buffer.  In-memory
+    bodies (e.g. cached compressed variants) are queued as is.
+    """
+
+    def __init__(
+            self,
+            head: memoryview,
+            path: Optional[str] = None,
+            offset: int = 0,
+            count: int = 0,
+            conn_close: bool = False,
+            body: Optional[bytes] = None,
+    ) -> None:
+        self.head = head
+        self.body = body
+        self.path = path
+        self.offset = offset
+        self.remaining = count
+        self.conn_close = conn_close
+        self.file: Optional[IO[bytes]] = None
+
+    def send(self, client: HttpClientConnection, max_size: int) -> bool:
+        """Writes next chunk of body.  Returns True once entire body has been written."""
+        if self.remaining > 0 and self.body is not None:
+            client.queue(memoryview(self.body)[self.offset:self.offset + self.remaining])
+            self.remaining = 0
+        if self.remaining > 0:
+            if self.file is None:
+                assert self.path
+                self.file = open(self.path, 'rb')
+            conn = client.connection
+            if hasattr(os, 'sendfile') and \
+                    isinstance(conn, socket.socket) and \
+                    not isinstance(conn, ssl.SSLSocket):
+                try:
+                    sent = os.sendfile(
+                        conn.fileno(), self.file.fileno(),
+                        self.offset, min(self.remaining, max_size),
+                    )
+                except BlockingIOError:
+                    return False
+                if sent == 0:
+                    # File was truncated underneath us
+                    raise BrokenPipeError()
+            else:
+                self.file.seek(self.offset)
+                data = self.file.read(min(self.remaining, max_size))
+                sent = len(data)
+                if sent == 0:
+                    raise BrokenPipeError()
+                client.queue(memoryview(data))
+            self.offset += sent
+            self.remaining -= sent
+        return self.remaining == 0
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def static_response(
+        index: StaticFileIndex,
+        request: HttpParser,
+        min_compression_length: int = DEFAULT_MIN_COMPRESSION_LENGTH,
+) -> StaticResponse:
+    """Returns response for static file request.
+
+    Supports conditional requests using ``If-None-Match`` and
+    ``If-Modified-Since`` and a single byte range via ``Range``
+    (optionally guarded by ``If-Range``).  Compressible files are
+    served compressed as per ``Accept-Encoding``, except for
+    range requests."""
+    conn_close = not request.is_http_1_1_keep_alive
+    static = index.lookup(text_(request.path or b'/'))
+    if static is None:
+        # 404 response always closes the connection
+        return StaticResponse(NOT_FOUND_RESPONSE_PKT, conn_close=True)
+    encoding = IDENTITY
+    if static.compressible and not request.has_header(b'range'):
+        encoding = _encoding(index, static, request, min_compression_length)
+    etag = _etag(static, encoding)
+    headers = {
+        b'ETag': etag,
+        b'Last-Modified': static.last_modified,
+        b'Cache-Control': b'max-age=86400',
+    }
+    if static.compressible:
+        headers[b'Vary'] = b'Accept-Encoding'
+    if _not_modified(etag, static.mtime_ns, request):
+        return StaticResponse(
+            memoryview(
+                build_http_response(
+                    304,
+                    reason=b'Not Modified',
+                    headers=headers,
+                    conn_close=conn_close,
+                    no_cl=True,
+                ),
+            ),
+            conn_close=conn_close,
+        )
+    path, body, size = static.path, None, static.size
+    if encoding != IDENTITY:
+        variant = _variant(index, static, encoding)
+        if variant is None:
+            encoding = IDENTITY
+            headers[b'ETag'] = _etag(static, encoding)
+        else:
+            path, body, size = variant
+    headers[b'Content-Type'] = static.content_type
+    if encoding != IDENTITY:
+        headers[b'Content-Encoding'] = encoding
+    headers[b'Accept-Ranges'] = b'bytes'
+    code, reason = 200, b'OK'
+    start, count = 0, size
+    byte_range = _requested_range(static, etag, request)
+    if byte_range is not None:
+        start, end = byte_range
+        if start > end:
+            headers[b'Content-Range'] = b'bytes */%d' % static.size
+            return StaticResponse(
+                memoryview(
+                    build_http_response(
+                        416,
+                        reason=b'Range Not Satisfiable',
+                        headers=headers,
+                        conn_close=conn_close,
+                    ),
+                ),
+                conn_close=conn_close,
+            )
+        code, reason = 206, b'Partial Content'
+        count = end - start + 1
+        headers[b'Content-Range'] = b'bytes %d-%d/%d' % (start, end, static.size)
+    headers[b'Content-Length'] = bytes_(count)
+    head = memoryview(
+        build_http_response(
+            code,
+            reason=reason,
+            headers=headers,
+            conn_close=conn_close,
+            no_cl=True,
+        ),
+    )
+    if request.method == httpMethods.HEAD:
+        count = 0
+    return StaticResponse(
+        head,
+        path=path,
+        offset=start,
+        count=count,
+        conn_close=conn_close,
+        body=body,
+    )
+
+
+def _etag(static: StaticFile, encoding: bytes) -> bytes:
+    if encoding == IDENTITY:
+        return static.etag
+    return static.etag[:-1] + b'-' + encoding + b'"'
+
+
+def _encoding(
+        index: StaticFileIndex,
+        static: StaticFile,
+        request: HttpParser,
+        min_compression_length: int,
+) -> bytes:
+    """Returns encoding to serve static file with as per client's Accept-Encoding."""
+    if not request.has_header(b'accept-encoding'):
+        return IDENTITY
+    # Compress ourselves only if file is worth compressing
+    # and its compressed variant can be cached.
+    on_the_fly = min_compression_length < static.size <= index.compressed.max_size // 8
+    precompressed = [enc for enc, _ in static.variants]
+    return negotiate(
+        request.header(b'accept-encoding'),
+        [
+            enc for enc in EXTENSIONS
+            if enc in precompressed or (on_the_fly and enc in ENCODINGS)
+        ],
+    )
+
+
+def _variant(
+        index: StaticFileIndex,
+        static: StaticFile,
+        encoding: bytes,
+) -> Optional[Tuple[str, Optional[bytes], int]]:
+    """Returns (path, in-memory body, size) of encoded variant of static file.
+
+    Precompressed siblings are preferred over compressing ourselves."""
+    sibling = dict(static.variants).get(encoding)
+    if sibling is not None:
+        try:
+            return sibling, None, os.stat(sibling).st_size
+        except OSError:
+            if encoding not in ENCODINGS:
+                return None
+    key = (static.path, static.mtime_ns, encoding)
+    body = index.compressed.get(key)
+    if body is None:
+        try:
+            with open(static.path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        body = compress(content, encoding, DEFAULT_STATIC_COMPRESSION_LEVEL)
+        index.compressed.put(key, body)
+    return static.path, body, len(body)
+
+
+def _not_modified(etag: bytes, mtime_ns: int, request: HttpParser) -> bool:
+    if request.has_header(b'if-none-match'):
+        etags = [
+            e.strip()
+            for e in request.header(b'if-none-match').split(COMMA)
+        ]
+        # Weak comparison as per RFC 7232 Section 3.2
+        return b'*' in etags or any(
+            e[2:] == etag if e.startswith(b'W/') else e == etag
+            for e in etags
+        )
+    if request.has_header(b'if-modified-since'):
+        since = parsedate(text_(request.header(b'if-modified-since')))
+        if since is not None:
+            return mtime_ns // 10**9 <= calendar.timegm(since)
+    return False
+
+
+def _requested_range(
+        static: StaticFile,
+        etag: bytes,
+        request: HttpParser,
+) -> Optional[Tuple[int, int]]:
+    """Returns inclusive (start, end) of requested range.
+
+    None is returned when entire file must be served.  Returns
+    start > end for unsatisfiable ranges."""
+    if_range_mismatch = request.has_header(b'if-range') and \
+        request.header(b'if-range') != etag
+    if not request.has_header(b'range') or if_range_mismatch:
+        return None
+    unit, _, spec = request.header(b'range').partition(b'=')
+    # Multiple ranges are not supported, serve entire file instead
+    if unit.strip().lower() != b'bytes' or COMMA in spec:
+        return None
+    first, sep, last = spec.strip().partition(b'-')
+    try:
+        if not sep or not (first or last):
+            return None
+        if not first:
+            # Suffix range i.e. last N bytes
+            return max(0, static.size - int(last)), static.size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    # Syntactically invalid range is ignored
+    if end is not None and end < start:
+        return None
+    if start >= static.size:
+        return 1, 0
+    return start, static.size - 1 if end is None else min(end, static.size - 1)
@@ -12,9 +12,15 @@ import re
 import time
 import socket
 import logging
-from typing import Any, Dict, List, Tuple, Union, Pattern, Optional
+import collections
+from typing import (
+    Any, Dict, List, Deque, Tuple, Union, Pattern, Optional, Sequence,
+)
 
 from .plugin import HttpWebServerBasePlugin
+from .static import (
+    StaticFileIndex, StaticResponse, static_response, static_file_index,
+)
 from ..parser import HttpParser, httpParserTypes
 from ..plugin import HttpProtocolHandlerPlugin
 from .protocols import httpProtocolTypes
@@ -29,6 +35,7 @@ from ...common.constants import (
     DEFAULT_ENABLE_WEB_SERVER, DEFAULT_STATIC_SERVER_DIR,
     DEFAULT_ENABLE_REVERSE_PROXY, DEFAULT_ENABLE_STATIC_SERVER,
     DEFAULT_WEB_ACCESS_LOG_FORMAT, DEFAULT_MIN_COMPRESSION_LENGTH,
+    DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
 )
 
 
@@ -69,6 +76,15 @@ flags.add_argument(
     'Sets the minimum length of a response that will be compressed (gzipped).',
 )
 
+flags.add_argument(
+    '--static-compression-cache-size',
+    type=int,
+    default=DEFAULT_STATIC_COMPRESSION_CACHE_SIZE,
+    help='Default: ' + str(DEFAULT_STATIC_COMPRESSION_CACHE_SIZE) + ' bytes.  ' +
+    'Maximum size of in-memory cache of compressed variants of static files.  '
+    'Precompressed .br and .gz siblings of static files are served as is.',
+)
+
 flags.add_argument(
     '--enable-reverse-proxy',
     action='store_true',
@@ -89,6 +105,11 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
         self.pipeline_request: Optional[HttpParser] = None
         self.switched_protocol: Optional[int] = None
         self.route: Optional[HttpWebServerBasePlugin] = None
+        # Static file responses in the order of requests.  Head of the
+        # first response is in client buffer, or has already been flushed.
+        self.static_index: Optional[StaticFileIndex] = None
+        self.static_responses: Deque[StaticResponse] = collections.deque()
+        self.static_activity: float = 0
 
         self.plugins: Dict[str, HttpWebServerBasePlugin] = {}
         self.routes: Dict[
@@ -144,14 +165,30 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
             return teardown
         # No-route found, try static serving if enabled
         if self.flags.enable_static_server:
-            self._try_static_or_404(path)
-            return True
+            self.static_index = static_file_index(
+                self.flags.static_server_dir,
+                self.flags.static_compression_cache_size,
+            )
+            self._serve_static(self.request)
+            return False
         # Catch all unhandled web server requests, return 404
         self.client.queue(NOT_FOUND_RESPONSE_PKT)
         return True
 
+    def deadline(self, last_activity: float) -> Optional[float]:
+        # Client buffer stays empty while static file bodies
+        # are written using sendfile, count it as activity too.
+        if self.static_activity <= last_activity:
+            return None
+        timeout = self.flags.keep_alive_timeout
+        if timeout is None or self.static_responses:
+            timeout = self.flags.timeout
+        return self.static_activity + float(timeout)
+
     async def get_descriptors(self) -> Descriptors:
         r, w = [], []
+        if self.static_responses and not self.client.has_buffer():
+            w.append(self.client.connection.fileno())
         for plugin in self.plugins.values():
             r1, w1 = await plugin.get_descriptors()
             r.extend(r1)
@@ -159,6 +196,10 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
         return r, w
 
     async def write_to_descriptors(self, w: Writables) -> bool:
+        if self.static_responses and \
+                self.client.connection.fileno() in w and \
+                self._send_static():
+            return True
         for plugin in self.plugins.values():
             teardown = await plugin.write_to_descriptors(w)
             if teardown:
@@ -193,16 +234,23 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
                 frame.reset()
             return
         # If 1st valid request was completed and it's a HTTP/1.1 keep-alive
-        # And only if we have a route, parse pipeline requests
+        # And only if we have a route or are serving static files,
+        # parse pipeline requests
         if self.request.is_complete and \
                 self.request.is_http_1_1_keep_alive and \
-                self.route is not None:
+                (self.route is not None or self.static_index is not None):
             if self.pipeline_request is None:
                 self.pipeline_request = HttpParser(
                     httpParserTypes.REQUEST_PARSER,
                 )
             self.pipeline_request.parse(raw)
-            if self.pipeline_request.is_complete:
+            if self.pipeline_request.is_complete and self.route is None:
+                # Connection is closed after the response
+                # if pipelined request is not keep-alive
+                self._serve_static(self.pipeline_request)
+                self.pipeline_request = None
+            elif self.pipeline_request.is_complete:
+                assert self.route
                 self.route.handle_request(self.pipeline_request)
                 if not self.pipeline_request.is_http_1_1_keep_alive:
                     raise HttpProtocolException(
@@ -210,10 +258,13 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
                     )
                 self.pipeline_request = None
 
-    def on_response_chunk(self, chunk: List[memoryview]) -> List[memoryview]:
+    def on_response_chunk(self, chunk: Sequence[memoryview]) -> Sequence[memoryview]:
         return chunk
 
     def on_client_connection_close(self) -> None:
+        for response in self.static_responses:
+            response.close()
+        self.static_responses.clear()
         context = {
             'client_ip': None if not self.client.addr else self.client.addr[0],
             'client_port': None if not self.client.addr else self.client.addr[1],
@@ -284,11 +335,40 @@ class HttpWebServerPlugin(HttpProtocolHandlerPlugin):
                         return True
         return False
 
-    def _try_static_or_404(self, path: bytes) -> None:
-        path = text_(path).split('?', 1)[0]
-        self.client.queue(
-            HttpWebServerBasePlugin.serve_static_file(
-                self.flags.static_server_dir + path,
-                self.flags.min_compression_length,
-            ),
+    def _serve_static(self, request: HttpParser) -> None:
+        assert self.static_index
+        response = static_response(
+            self.static_index,
+            request,
+            self.flags.min_compression_length,
         )
+        self.static_responses.append(response)
+        if len(self.static_responses) == 1:
+            self.client.queue(response.head)
+
+    def _send_static(self) -> bool:
+        """Writes queued static responses until client would block.
+
+        Returns True if connection must be closed."""
+        self.static_activity = time.time()
+        while self.static_responses and not self.client.has_buffer():
+            response = self.static_responses[0]
+            try:
+                if not response.send(self.client, self.flags.max_sendbuf_size):
+                    return False
+            except OSError as e:
+                logger.warning(
+                    'Exception when sending static file to client: %r' % e,
+                )
+                return True
+            if response.conn_close and self.client.has_buffer():
+                # Body was queued into client buffer, connection
+                # is closed once the buffer has been flushed
+                return False
+            response.close()
+            self.static_responses.popleft()
+            if response.conn_close:
+                return True
+            if self.static_responses:
+                self.client.queue(self.static_responses[0].head)
+        return False
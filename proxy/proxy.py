@@ -191,7 +191,13 @@ class Proxy:
         self._write_pid_file()
         # We setup listeners first because of flags.port override
         # in case of ephemeral port being used
-        self.listeners = ListenerPool(flags=self.flags)
+        #
+        # With --enable-reuseport, listeners only reserve the ports.
+        # Executors will listen upon them using their own sockets.
+        self.listeners = ListenerPool(
+            flags=self.flags,
+            bind_only=self.flags.enable_reuseport,
+        )
         self.listeners.setup()
         # Override flags.port to match the actual port
         # we are listening upon.  This is necessary to preserve
@@ -232,16 +238,19 @@ class Proxy:
                 executor_klass=RemoteFdExecutor,
             )
             self.executors.setup()
-        # Setup acceptors
-        self.acceptors = AcceptorPool(
-            flags=self.flags,
-            listeners=self.listeners,
-            executor_queues=self.executors.work_queues if self.executors else [],
-            executor_pids=self.executors.work_pids if self.executors else [],
-            executor_locks=self.executors.work_locks if self.executors else [],
-            event_queue=event_queue,
-        )
-        self.acceptors.setup()
+        # Setup acceptors, unless executors accept directly
+        # i.e. when --enable-reuseport is used.
+        if not self.flags.enable_reuseport:
+            self.acceptors = AcceptorPool(
+                flags=self.flags,
+                listeners=self.listeners,
+                executor_queues=self.executors.work_queues if self.executors else [],
+                executor_pids=self.executors.work_pids if self.executors else [],
+                executor_locks=self.executors.work_locks if self.executors else [],
+                event_queue=event_queue,
+                executor_loads=self.executors.work_loads if self.executors else None,
+            )
+            self.acceptors.setup()
         # Start SSH tunnel acceptor if enabled
         if self.flags.enable_ssh_tunnel:
             self.ssh_http_protocol_handler = SshHttpProtocolHandler(
@@ -263,8 +272,8 @@ class Proxy:
         if self.flags.enable_ssh_tunnel:
             assert self.ssh_tunnel_listener is not None
             self.ssh_tunnel_listener.shutdown()
-        assert self.acceptors
-        self.acceptors.shutdown()
+        if self.acceptors:
+            self.acceptors.shutdown()
         if self.remote_executors_enabled:
             assert self.executors
             self.executors.shutdown()
@@ -120,6 +120,87 @@ class TestPki(unittest.TestCase):
     def test_sign_csr(self) -> None:
         pass
 
+    @unittest.skipUnless(pki.HAS_CRYPTOGRAPHY, 'Requires cryptography')
+    def test_gen_leaf_certificate(self) -> None:
+        from cryptography import x509
+        from cryptography.x509.oid import NameOID
+        key_path, nopass_key_path, crt_path = self._gen_public_private_key()
+        leaf_path = os.path.join(self._tempdir, 'test_gen_leaf.pem')
+        self.assertTrue(
+            pki.gen_leaf_certificate(
+                leaf_path, nopass_key_path, '', key_path, 'password', crt_path,
+                {'CN': 'proxy.py', 'O': 'proxy.py'}, '1234',
+                alt_subj_names=['proxy.py'],
+            ),
+        )
+        with open(leaf_path, 'rb') as leaf, open(crt_path, 'rb') as ca:
+            crt = x509.load_pem_x509_certificate(leaf.read())
+            ca_crt = x509.load_pem_x509_certificate(ca.read())
+        self.assertEqual(crt.serial_number, 1234)
+        self.assertEqual(crt.issuer, ca_crt.subject)
+        self.assertEqual(
+            crt.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value,
+            'proxy.py',
+        )
+        self.assertEqual(
+            crt.extensions.get_extension_for_class(
+                x509.SubjectAlternativeName,
+            ).value.get_values_for_type(x509.DNSName),
+            ['proxy.py'],
+        )
+        os.remove(leaf_path)
+        os.remove(crt_path)
+        os.remove(key_path)
+        os.remove(nopass_key_path)
+
+    @mock.patch('proxy.common.pki._load')
+    def test_gen_leaf_certificate_signs_using_ca(self, mock_load: mock.Mock) -> None:
+        x509, name_oid, hashes, serialization = \
+            mock.MagicMock(), mock.MagicMock(), mock.MagicMock(), mock.MagicMock()
+        builder = x509.CertificateBuilder.return_value
+        for method in (
+            'subject_name', 'issuer_name', 'public_key', 'serial_number',
+            'not_valid_before', 'not_valid_after', 'add_extension',
+        ):
+            getattr(builder, method).return_value = builder
+        builder.sign.return_value.public_bytes.return_value = b'leaf'
+        key, ca_key, ca_crt = mock.Mock(), mock.Mock(), mock.Mock()
+        mock_load.side_effect = [key, ca_key, ca_crt]
+        leaf_path = os.path.join(self._tempdir, 'test_gen_leaf_mocked.pem')
+        with mock.patch.multiple(
+            'proxy.common.pki',
+            create=True,
+            HAS_CRYPTOGRAPHY=True,
+            x509=x509,
+            NameOID=name_oid,
+            hashes=hashes,
+            serialization=serialization,
+        ):
+            self.assertTrue(
+                pki.gen_leaf_certificate(
+                    leaf_path, 'leaf.key', '', 'ca.key', 'password', 'ca.crt',
+                    {'CN': 'proxy.py'}, '1234',
+                    alt_subj_names=['proxy.py'],
+                ),
+            )
+        mock_load.assert_has_calls([
+            mock.call('leaf.key', '', 'key'),
+            mock.call('ca.key', 'password', 'key'),
+            mock.call('ca.crt', '', 'crt'),
+        ])
+        x509.NameAttribute.assert_called_once_with(
+            name_oid.COMMON_NAME, 'proxy.py',
+        )
+        builder.issuer_name.assert_called_once_with(ca_crt.subject)
+        builder.public_key.assert_called_once_with(key.public_key())
+        builder.serial_number.assert_called_once_with(1234)
+        x509.DNSName.assert_called_once_with('proxy.py')
+        self.assertEqual(builder.add_extension.call_count, 3)
+        builder.sign.assert_called_once_with(ca_key, hashes.SHA256())
+        with open(leaf_path, 'rb') as leaf:
+            self.assertEqual(leaf.read(), b'leaf')
+        os.remove(leaf_path)
+
     def _gen_public_private_key(self) -> Tuple[str, str, str]:
         key_path, nopass_key_path = self._gen_private_key()
         crt_path = os.path.join(self._tempdir, 'test_gen_public.crt')
@@ -8,12 +8,17 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import os
+import ssl
 import socket
+import tempfile
 
 import unittest
 from unittest import mock
 
-from proxy.common.utils import socket_connection, new_socket_connection
+from proxy.common.utils import (
+    ssl_context, socket_connection, new_socket_connection,
+)
 from proxy.common.constants import (
     DEFAULT_PORT, DEFAULT_TIMEOUT, DEFAULT_HTTP_PORT, DEFAULT_IPV4_HOSTNAME,
     DEFAULT_IPV6_HOSTNAME,
@@ -64,3 +69,52 @@ class TestSocketConnectionUtils(unittest.TestCase):
     ) -> None:
         with socket_connection(self.addr_ipv4) as conn:
             self.assertEqual(conn, mock_new_socket_connection.return_value)
+
+
+class TestSslContext(unittest.TestCase):
+
+    @mock.patch.dict('proxy.common.utils._ssl_contexts', clear=True)
+    @mock.patch('ssl.create_default_context')
+    def test_contexts_are_cached_until_files_change(
+            self, mock_create: mock.Mock,
+    ) -> None:
+        mock_create.side_effect = lambda *args, **kwargs: mock.MagicMock()
+        with tempfile.TemporaryDirectory() as tmp:
+            cafile = os.path.join(tmp, 'ca.pem')
+            with open(cafile, 'wb') as f:
+                f.write(b'ca')
+            ctx = ssl_context(ssl.Purpose.SERVER_AUTH, cafile=cafile)
+            self.assertIs(ssl_context(ssl.Purpose.SERVER_AUTH, cafile=cafile), ctx)
+            self.assertEqual(mock_create.call_count, 1)
+            # Differently configured contexts are not shared
+            self.assertIsNot(
+                ssl_context(
+                    ssl.Purpose.SERVER_AUTH,
+                    cafile=cafile,
+                    verify_mode=ssl.CERT_NONE,
+                ),
+                ctx,
+            )
+            # Replacing file invalidates cached context
+            with open(cafile + '.tmp', 'wb') as f:
+                f.write(b'new ca')
+            os.replace(cafile + '.tmp', cafile)
+            self.assertIsNot(ssl_context(ssl.Purpose.SERVER_AUTH, cafile=cafile), ctx)
+            self.assertEqual(mock_create.call_count, 3)
+
+    @mock.patch.dict('proxy.common.utils._ssl_contexts', clear=True)
+    @mock.patch('proxy.common.utils.DEFAULT_SSL_CONTEXT_CACHE_SIZE', 2)
+    @mock.patch('ssl.create_default_context')
+    def test_least_recently_used_context_is_evicted(
+            self, mock_create: mock.Mock,
+    ) -> None:
+        mock_create.side_effect = lambda *args, **kwargs: mock.MagicMock()
+        first = ssl_context(ssl.Purpose.SERVER_AUTH)
+        second = ssl_context(ssl.Purpose.CLIENT_AUTH)
+        # Hit refreshes first context, second one is evicted instead
+        self.assertIs(ssl_context(ssl.Purpose.SERVER_AUTH), first)
+        ssl_context(ssl.Purpose.SERVER_AUTH, verify_mode=ssl.CERT_NONE)
+        self.assertEqual(mock_create.call_count, 3)
+        self.assertIs(ssl_context(ssl.Purpose.SERVER_AUTH), first)
+        self.assertIsNot(ssl_context(ssl.Purpose.CLIENT_AUTH), second)
+        self.assertEqual(mock_create.call_count, 4)
@@ -116,3 +116,57 @@ class TestAcceptor(unittest.TestCase):
         )
         mock_thread.return_value.start.assert_called()
         sock.close.assert_called()
+
+    def test_accept_drains_until_would_block(self) -> None:
+        fileno = 10
+        sock = mock.MagicMock()
+        sock.accept.side_effect = [
+            (mock.MagicMock(), ('127.0.0.1', 1)),
+            (mock.MagicMock(), ('127.0.0.1', 2)),
+            BlockingIOError(),
+        ]
+        self.acceptor.socks[fileno] = sock
+        mock_key = mock.MagicMock()
+        type(mock_key).data = mock.PropertyMock(return_value=fileno)
+        works = self.acceptor.accept([(mock_key, selectors.EVENT_READ)])
+        self.assertEqual(
+            [addr for _, addr in works],
+            [('127.0.0.1', 1), ('127.0.0.1', 2)],
+        )
+        self.assertEqual(sock.accept.call_count, 3)
+
+    def test_accept_is_capped_per_wakeup(self) -> None:
+        self.flags.max_accepts_per_wakeup = 2
+        fileno = 10
+        sock = mock.MagicMock()
+        sock.accept.return_value = (mock.MagicMock(), None)
+        self.acceptor.socks[fileno] = sock
+        mock_key = mock.MagicMock()
+        type(mock_key).data = mock.PropertyMock(return_value=fileno)
+        works = self.acceptor.accept([(mock_key, selectors.EVENT_READ)])
+        self.assertEqual(len(works), 2)
+        self.assertEqual(sock.accept.call_count, 2)
+
+    def test_least_connections_dispatch_strategy(self) -> None:
+        self.flags.num_workers = 3
+        self.flags.dispatch_strategy = 'least-connections'
+        self.acceptor._total = 0
+        # Works dispatched within a batch count towards load too
+        loads = [2, 0, 1]
+        self.assertEqual(self.acceptor._choose_executor(None, loads), 1)
+        loads[1] += 1
+        self.assertEqual(self.acceptor._choose_executor(None, loads), 1)
+        loads[1] += 1
+        self.assertEqual(self.acceptor._choose_executor(None, loads), 2)
+
+    def test_ip_hash_dispatch_strategy(self) -> None:
+        self.flags.num_workers = 4
+        self.flags.dispatch_strategy = 'ip-hash'
+        self.acceptor._total = 0
+        index = self.acceptor._choose_executor(('10.0.0.1', 1111), None)
+        for total in range(1, 4):
+            self.acceptor._total = total
+            self.assertEqual(
+                self.acceptor._choose_executor(('10.0.0.1', 2222), None),
+                index,
+            )
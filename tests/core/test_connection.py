@@ -8,6 +8,9 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import ssl
+import socket
+import selectors
 from typing import Optional
 
 import unittest
@@ -69,6 +72,85 @@ class TestTcpConnection(unittest.TestCase):
         self.conn.flush()
         self.assertTrue(not _conn.send.called)
 
+    def testOnQueuedInvokedWhenBufferBecomesNonEmpty(self) -> None:
+        self.conn = TestTcpConnection.TcpConnectionToTest(mock.MagicMock())
+        self.conn.on_queued = mock.MagicMock()
+        self.conn.queue(memoryview(b'hello'))
+        self.conn.queue(memoryview(b'world'))
+        self.conn.on_queued.assert_called_once()
+
+    def testRecvCopiesOnlyReceivedBytes(self) -> None:
+        left, right = socket.socketpair()
+        try:
+            self.conn = TestTcpConnection.TcpConnectionToTest(left)
+            right.send(b'hello')
+            first = self.conn.recv()
+            assert first is not None
+            self.assertEqual(first.tobytes(), b'hello')
+            # Data received earlier must not be overwritten
+            # by subsequent reads into the scratch buffer.
+            right.send(b'world')
+            second = self.conn.recv()
+            assert second is not None
+            self.assertEqual(second.tobytes(), b'world')
+            self.assertEqual(first.tobytes(), b'hello')
+            right.close()
+            self.assertIsNone(self.conn.recv())
+        finally:
+            left.close()
+            right.close()
+
+    def testFlushGathersQueuedBuffers(self) -> None:
+        left, right = socket.socketpair()
+        try:
+            self.conn = TestTcpConnection.TcpConnectionToTest(left)
+            self.conn.queue(memoryview(b'hello'))
+            self.conn.queue(memoryview(b' '))
+            self.conn.queue(memoryview(b'world'))
+            self.assertEqual(self.conn.flush(), 11)
+            self.assertFalse(self.conn.has_buffer())
+            self.assertEqual(right.recv(11), b'hello world')
+        finally:
+            left.close()
+            right.close()
+
+    def testFlushAccountsForPartialSends(self) -> None:
+        _conn = mock.MagicMock(spec=socket.socket)
+        _conn.sendmsg.return_value = 7
+        self.conn = TestTcpConnection.TcpConnectionToTest(_conn)
+        self.conn.queue(memoryview(b'hello'))
+        self.conn.queue(memoryview(b'world'))
+        self.conn.queue(memoryview(b'!'))
+        self.assertEqual(self.conn.flush(), 7)
+        self.assertEqual(
+            [mv.tobytes() for mv in self.conn.buffer],
+            [b'rld', b'!'],
+        )
+        _conn.sendmsg.return_value = 4
+        self.assertEqual(self.conn.flush(), 4)
+        self.assertFalse(self.conn.has_buffer())
+
+    def testFlushGathersWithinMaxSendSize(self) -> None:
+        _conn = mock.MagicMock(spec=socket.socket)
+        _conn.sendmsg.return_value = 5
+        self.conn = TestTcpConnection.TcpConnectionToTest(_conn)
+        self.conn.queue(memoryview(b'hello'))
+        self.conn.queue(memoryview(b'world'))
+        self.conn.flush(max_send_size=8)
+        _conn.sendmsg.assert_called_once_with([memoryview(b'hello')])
+
+    def testHandshakeReportsEventItIsWaitingFor(self) -> None:
+        _conn = mock.MagicMock(spec=ssl.SSLSocket)
+        self.conn = TestTcpConnection.TcpConnectionToTest(_conn)
+        _conn.do_handshake.side_effect = [
+            ssl.SSLWantReadError(),
+            ssl.SSLWantWriteError(),
+            None,
+        ]
+        self.assertEqual(self.conn.handshake(), selectors.EVENT_READ)
+        self.assertEqual(self.conn.handshake(), selectors.EVENT_WRITE)
+        self.assertIsNone(self.conn.handshake())
+
     @mock.patch('socket.socket')
     def testTcpServerEstablishesIPv6Connection(
             self, mock_socket: mock.Mock,
@@ -108,6 +190,39 @@ class TestTcpConnection(unittest.TestCase):
             (str(DEFAULT_IPV4_HOSTNAME), DEFAULT_PORT),
         )
 
+    def testTcpServerNonBlockingConnect(self) -> None:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            server.bind((str(DEFAULT_IPV4_HOSTNAME), 0))
+            server.listen(1)
+            conn = TcpServerConnection(
+                str(DEFAULT_IPV4_HOSTNAME), server.getsockname()[1],
+            )
+            conn.connect(non_blocking=True)
+            self.assertTrue(conn.connecting)
+            self.assertFalse(conn.connection.getblocking())
+            with selectors.DefaultSelector() as selector:
+                selector.register(conn.connection, selectors.EVENT_WRITE)
+                self.assertEqual(len(selector.select(timeout=1)), 1)
+            conn.finish_connect()
+            self.assertFalse(conn.connecting)
+            conn.close()
+
+    def testTcpServerNonBlockingConnectFailure(self) -> None:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            # Reserve a port with nobody listening on it
+            server.bind((str(DEFAULT_IPV4_HOSTNAME), 0))
+            conn = TcpServerConnection(
+                str(DEFAULT_IPV4_HOSTNAME), server.getsockname()[1],
+            )
+            conn.connect(non_blocking=True)
+            with selectors.DefaultSelector() as selector:
+                selector.register(conn.connection, selectors.EVENT_WRITE)
+                self.assertEqual(len(selector.select(timeout=1)), 1)
+            with self.assertRaises(ConnectionRefusedError):
+                conn.finish_connect()
+            self.assertTrue(conn.connecting)
+            conn.close()
+
     @mock.patch('proxy.core.connection.server.new_socket_connection')
     def testTcpServerConnectionProperty(
             self,
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import socket
+import unittest
+import multiprocessing
+from typing import List, Tuple, Optional
+from unittest import mock
+
+from proxy.core.work import delegate_works_to_pool
+from proxy.common.flag import FlagParser
+from proxy.common.types import HostPort
+from proxy.core.work.fd import RemoteFdExecutor
+from proxy.common.constants import IS_WINDOWS
+
+
+@unittest.skipIf(IS_WINDOWS, 'Threadless executors are not supported on Windows')
+class TestDelegateWorksToPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.pipe = multiprocessing.Pipe()
+        self.pairs = [socket.socketpair() for _ in range(3)]
+
+    def tearDown(self) -> None:
+        for left, right in self.pairs:
+            left.close()
+            right.close()
+        self.pipe[0].close()
+        self.pipe[1].close()
+
+    def _receive(
+            self,
+            unix_socket_path: Optional[str] = None,
+    ) -> List[Tuple[int, Optional[HostPort]]]:
+        executor = RemoteFdExecutor(
+            iid='0', work_queue=self.pipe[1],
+            flags=FlagParser.initialize(
+                threaded=True, unix_socket_path=unix_socket_path,
+            ),
+        )
+        with mock.patch.object(executor, 'work') as mock_work:
+            self.assertFalse(executor.receive_from_work_queue())
+        return [(c[0][0], c[0][1]) for c in mock_work.call_args_list]
+
+    def _assert_usable(self, filenos: List[int]) -> None:
+        for fileno, (_, right) in zip(filenos, self.pairs):
+            os.write(fileno, b'hello')
+            self.assertEqual(right.recv(5), b'hello')
+            os.close(fileno)
+
+    def test_works_are_handed_over_in_batch(self) -> None:
+        addrs: List[Optional[HostPort]] = [
+            ('127.0.0.1', 10000 + i) for i in range(len(self.pairs))
+        ]
+        works = [(left, addr) for (left, _), addr in zip(self.pairs, addrs)]
+        delegate_works_to_pool(
+            os.getpid(), self.pipe[0], multiprocessing.Lock(), works,
+        )
+        # Acceptor no longer owns the descriptors
+        for left, _ in self.pairs:
+            self.assertEqual(left.fileno(), -1)
+        received = self._receive()
+        self.assertEqual([addr for _, addr in received], addrs)
+        self._assert_usable([fileno for fileno, _ in received])
+
+    def test_unix_socket_path_only_sends_descriptors(self) -> None:
+        works: List[Tuple[socket.socket, Optional[HostPort]]] = [
+            (left, None) for left, _ in self.pairs
+        ]
+        delegate_works_to_pool(
+            os.getpid(), self.pipe[0], multiprocessing.Lock(), works,
+            unix_socket_path='/tmp/proxy.sock',
+        )
+        received = self._receive(unix_socket_path='/tmp/proxy.sock')
+        self.assertEqual([addr for _, addr in received], [None] * 3)
+        self._assert_usable([fileno for fileno, _ in received])
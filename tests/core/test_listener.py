@@ -52,6 +52,29 @@ class TestListener(unittest.TestCase):
             )
         sock.close.assert_called_once()
 
+    @pytest.mark.skipif(
+        not hasattr(socket, 'SO_REUSEPORT'),
+        reason='SO_REUSEPORT not available',
+    )  # type: ignore[misc]
+    @mock.patch('socket.socket')
+    def test_bind_only_reuseport_listener(self, mock_socket: mock.Mock) -> None:
+        sock = mock_socket.return_value
+        flags = FlagParser.initialize(
+            port=0, threadless=True, local_executor=0, enable_reuseport=True,
+        )
+        self.assertTrue(flags.enable_reuseport)
+        with TcpSocketListener(flags=flags, bind_only=True):
+            self.assertIn(
+                mock.call(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1),
+                sock.setsockopt.call_args_list,
+            )
+            sock.bind.assert_called_with(
+                (str(flags.hostname), 0),
+            )
+            # Executors listen upon their own sockets
+            sock.listen.assert_not_called()
+        sock.close.assert_called_once()
+
     @pytest.mark.skipif(
         IS_WINDOWS,
         reason='AF_UNIX not available on Windows',
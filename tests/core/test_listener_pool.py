@@ -31,7 +31,7 @@ class TestListenerPool(unittest.TestCase):
     ) -> None:
         flags = FlagParser.initialize(port=0)
         with ListenerPool(flags=flags) as pool:
-            mock_tcp_listener.assert_called_once_with(flags=flags)
+            mock_tcp_listener.assert_called_once_with(flags=flags, bind_only=False)
             mock_unix_listener.assert_not_called()
             mock_tcp_listener.return_value.setup.assert_called_once()
             self.assertEqual(pool.pool[0], mock_tcp_listener.return_value)
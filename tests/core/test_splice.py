@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import socket
+import unittest
+
+from proxy.core.connection.splice import SpliceRelay
+
+
+@unittest.skipIf(
+    not SpliceRelay.is_available(),
+    'splice not available',
+)
+class TestSpliceRelay(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # (client, client side of proxy) and (proxy side of upstream, upstream)
+        self.client, self.proxy_client = socket.socketpair()
+        self.proxy_upstream, self.upstream = socket.socketpair()
+        for sock in (self.proxy_client, self.proxy_upstream):
+            sock.setblocking(False)
+        self.relay = SpliceRelay(
+            self.proxy_client.fileno(),
+            self.proxy_upstream.fileno(),
+            1024,
+        )
+
+    def tearDown(self) -> None:
+        self.relay.close()
+        for sock in (self.client, self.proxy_client, self.proxy_upstream, self.upstream):
+            sock.close()
+
+    def test_relays_both_directions(self) -> None:
+        r, w = self.relay.get_descriptors()
+        self.assertEqual(
+            r, [self.proxy_client.fileno(), self.proxy_upstream.fileno()],
+        )
+        self.assertEqual(w, [])
+        self.client.sendall(b'hello')
+        self.upstream.sendall(b'world')
+        self.assertFalse(self.relay.read_from_descriptors(r))
+        self.assertEqual(self.upstream.recv(5), b'hello')
+        self.assertEqual(self.client.recv(5), b'world')
+        self.assertEqual(self.relay.client_bytes, 5)
+        self.assertEqual(self.relay.upstream_bytes, 5)
+
+    def test_tears_down_after_relaying_pending_bytes_on_eof(self) -> None:
+        self.upstream.sendall(b'bye')
+        self.upstream.close()
+        fileno = self.proxy_upstream.fileno()
+        self.assertFalse(self.relay.read_from_descriptors([fileno]))
+        self.assertTrue(self.relay.read_from_descriptors([fileno]))
+        self.assertEqual(self.client.recv(3), b'bye')
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import socket
+import select
+import asyncio
+import selectors
+from typing import Any, Optional
+
+import pytest
+
+from pytest_mock import MockerFixture
+
+from proxy.core.work import Work, Threadless, EventLoopSelector
+from proxy.core.work.fd import LocalFdExecutor, RemoteFdExecutor
+from proxy.common.flag import FlagParser
+from proxy.common.types import SelectableEvents
+from proxy.common.backports import NonBlockingQueue
+
+
+class DummyWork(Work[None]):
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.events: SelectableEvents = {}
+        self.num_get_events = 0
+
+    @staticmethod
+    def create(*args: Any) -> None:
+        return None     # pragma: no cover
+
+    async def get_events(self) -> SelectableEvents:
+        self.num_get_events += 1
+        return dict(self.events)
+
+
+class DummyExecutor(Threadless[None]):
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return None     # pragma: no cover
+
+    def receive_from_work_queue(self) -> bool:
+        return False    # pragma: no cover
+
+    def work_queue_fileno(self) -> Optional[int]:
+        return None     # pragma: no cover
+
+    def work(self, *args: Any) -> None:
+        pass    # pragma: no cover
+
+
+class TestThreadless:
+
+    @pytest.fixture(autouse=True)   # type: ignore[misc]
+    def _setUp(self, mocker: MockerFixture) -> None:
+        self.flags = FlagParser.initialize(threaded=True)
+        self.executor = DummyExecutor(
+            iid='0', work_queue=None, flags=self.flags,
+        )
+        self.selector = mocker.MagicMock()
+        self.executor.selector = self.selector
+        self.work = DummyWork(None, flags=self.flags)
+        self.work.events = {10: selectors.EVENT_READ}
+        self.executor.works[10] = self.work
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_events_are_only_evaluated_for_changed_works(self) -> None:
+        await self.executor._update_selector()
+        self.selector.register.assert_called_once_with(
+            10, events=selectors.EVENT_READ, data=10,
+        )
+        assert self.work.num_get_events == 1
+        # Nothing changed, work must not be asked for events again
+        await self.executor._update_selector()
+        assert self.work.num_get_events == 1
+        # Work signals change in events of interest
+        self.work.events = {10: selectors.EVENT_READ | selectors.EVENT_WRITE}
+        self.work.events_changed()
+        await self.executor._update_selector()
+        assert self.work.num_get_events == 2
+        self.selector.modify.assert_called_once_with(
+            10, events=selectors.EVENT_READ | selectors.EVENT_WRITE, data=10,
+        )
+        self.selector.register.assert_called_once()
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_selector_untouched_for_unchanged_masks(self) -> None:
+        await self.executor._update_selector()
+        self.work.events_changed()
+        await self.executor._update_selector()
+        assert self.work.num_get_events == 2
+        self.selector.register.assert_called_once()
+        self.selector.modify.assert_not_called()
+        self.selector.unregister.assert_not_called()
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_descriptors_no_longer_of_interest_are_unregistered(self) -> None:
+        self.work.events = {10: selectors.EVENT_READ, 11: selectors.EVENT_WRITE}
+        await self.executor._update_selector()
+        assert self.selector.register.call_count == 2
+        self.work.events = {10: selectors.EVENT_READ}
+        self.work.events_changed()
+        await self.executor._update_selector()
+        self.selector.unregister.assert_called_once_with(11)
+        assert self.executor.registered_events_by_work_ids[10] == {
+            10: selectors.EVENT_READ,
+        }
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_finished_tasks_are_reaped_without_ready_descriptors(
+            self, mocker: MockerFixture,
+    ) -> None:
+        mocker.patch.object(
+            DummyExecutor, 'loop', new_callable=mocker.PropertyMock,
+            return_value=asyncio.get_event_loop(),
+        )
+        mocker.patch.object(
+            self.executor, '_selected_events',
+            return_value=({}, False),
+        )
+        mock_cleanup = mocker.patch.object(self.executor, '_cleanup')
+
+        async def teardown() -> bool:
+            return True
+
+        task = asyncio.get_event_loop().create_task(teardown())
+        task._work_id = 10  # type: ignore[attr-defined]
+        await asyncio.sleep(0)
+        assert task.done()
+        self.executor.unfinished.add(task)
+        assert not await self.executor._run_once()
+        mock_cleanup.assert_called_once_with(10)
+        assert len(self.executor.unfinished) == 0
+
+    def test_expired_works_are_shutdown(self, mocker: MockerFixture) -> None:
+        self.executor._timers.schedule(10, 100)
+        self.work.deadline = mocker.MagicMock(return_value=100)    # type: ignore[assignment]
+        mock_cleanup = mocker.patch.object(self.executor, '_cleanup')
+        self.executor._expire_works(99)
+        mock_cleanup.assert_not_called()
+        self.executor._expire_works(101)
+        mock_cleanup.assert_called_once_with(10)
+
+    def test_postponed_deadlines_are_rescheduled(self, mocker: MockerFixture) -> None:
+        self.executor._timers.schedule(10, 100)
+        # Work had activity since deadline was scheduled
+        self.work.deadline = mocker.MagicMock(return_value=150)    # type: ignore[assignment]
+        mock_cleanup = mocker.patch.object(self.executor, '_cleanup')
+        self.executor._expire_works(101)
+        mock_cleanup.assert_not_called()
+        assert self.executor._timers.deadline(10) == 150
+
+
+class TestEventLoopSelector:
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_wait_returns_ready_descriptors(self) -> None:
+        left, right = socket.socketpair()
+        selector = EventLoopSelector(asyncio.get_event_loop())
+        try:
+            selector.register(left.fileno(), selectors.EVENT_READ, data=1)
+            assert await selector.wait(timeout=0.01) == []
+            right.send(b'hello')
+            events = await selector.wait(timeout=1)
+            assert len(events) == 1
+            key, mask = events[0]
+            assert key.fd == left.fileno() and key.data == 1
+            assert mask == selectors.EVENT_READ
+            # Consumed readiness must not be reported again
+            assert left.recv(5) == b'hello'
+            assert await selector.wait(timeout=0.01) == []
+        finally:
+            selector.close()
+            left.close()
+            right.close()
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_wakeup_before_wait_is_not_lost(self) -> None:
+        selector = EventLoopSelector(asyncio.get_event_loop())
+        selector.wakeup()
+        assert await asyncio.wait_for(selector.wait(timeout=None), 1) == []
+
+
+class TestLocalFdExecutor:
+
+    def test_queued_works_are_received_in_batch_upon_wakeup(
+            self, mocker: MockerFixture,
+    ) -> None:
+        work_queue = NonBlockingQueue()
+        executor = LocalFdExecutor(
+            iid='0', work_queue=work_queue,
+            flags=FlagParser.initialize(threaded=True),
+        )
+        mock_initialize = mocker.patch.object(executor, 'initialize')
+        wakeup_fd = executor.work_queue_fileno()
+        assert wakeup_fd is not None
+        try:
+            assert select.select([wakeup_fd], [], [], 0)[0] == []
+            work_queue.put(('conn1', None))
+            work_queue.put(('conn2', None))
+            executor.wakeup()
+            assert select.select([wakeup_fd], [], [], 0)[0] == [wakeup_fd]
+            assert executor.receive_from_work_queue() is False
+            assert mock_initialize.call_count == 2
+            # Wakeup signal must be consumed too
+            assert select.select([wakeup_fd], [], [], 0)[0] == []
+            # Shutdown sentinel
+            work_queue.put(False)
+            executor.wakeup()
+            assert executor.receive_from_work_queue() is True
+        finally:
+            executor.close_work_queue()
+
+
+class TestRemoteFdExecutor:
+
+    def test_accepted_work_is_owned_by_executor(
+            self, mocker: MockerFixture,
+    ) -> None:
+        executor = RemoteFdExecutor(
+            iid='0', work_queue=mocker.MagicMock(),
+            flags=FlagParser.initialize(threaded=True),
+        )
+        mock_work = mocker.patch.object(executor, 'work')
+        left, right = socket.socketpair()
+        listener = mocker.MagicMock()
+        # Listener is drained until it would block
+        listener.accept.side_effect = [(left, None), BlockingIOError()]
+        try:
+            fileno = left.fileno()
+            executor.accept(listener)
+            mock_work.assert_called_once_with(fileno, None, None)
+            assert listener.accept.call_count == 2
+            # Socket object no longer owns the descriptor
+            assert left.fileno() == -1
+        finally:
+            executor.close_work(fileno)
+            right.close()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import unittest
+
+from proxy.core.work.timer import TimerWheel
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.now = 1000.0
+        self.wheel = TimerWheel(self.now, resolution=1, slots=4, levels=2)
+
+    def test_expires_only_due_keys(self) -> None:
+        self.wheel.schedule(1, self.now + 2.5)
+        self.wheel.schedule(2, self.now + 10)
+        self.assertEqual(self.wheel.expire(self.now + 2), [])
+        self.assertEqual(self.wheel.expire(self.now + 3), [1])
+        self.assertEqual(len(self.wheel), 1)
+        self.assertEqual(self.wheel.expire(self.now + 10), [2])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_deadlines_in_the_past_expire_immediately(self) -> None:
+        self.wheel.schedule(1, self.now - 5)
+        self.assertEqual(self.wheel.expire(self.now), [1])
+
+    def test_schedule_replaces_previous_deadline(self) -> None:
+        self.wheel.schedule(1, self.now + 5)
+        self.wheel.schedule(1, self.now + 30)
+        self.assertEqual(self.wheel.deadline(1), self.now + 30)
+        self.assertEqual(self.wheel.expire(self.now + 29), [])
+        self.assertEqual(self.wheel.expire(self.now + 30), [1])
+
+    def test_cancel(self) -> None:
+        self.wheel.schedule(1, self.now + 5)
+        self.wheel.cancel(1)
+        self.wheel.cancel(2)
+        self.assertFalse(1 in self.wheel)
+        self.assertEqual(self.wheel.expire(self.now + 10), [])
+
+    def test_deadlines_beyond_last_level_are_cascaded(self) -> None:
+        # 2 levels of 4 slots only cover 16 ticks
+        self.wheel.schedule(1, self.now + 100)
+        for i in range(1, 100):
+            self.assertEqual(self.wheel.expire(self.now + i), [])
+        self.assertEqual(self.wheel.expire(self.now + 100), [1])
@@ -9,6 +9,7 @@
     :license: BSD, see LICENSE for more details.
 """
 import unittest
+from typing import List
 
 from proxy.http.parser import ChunkParser, chunkParserStates
 
@@ -94,6 +95,39 @@ class TestChunkParser(unittest.TestCase):
         self.assertEqual(self.parser.body, b'abcdefg')
         self.assertEqual(self.parser.state, chunkParserStates.COMPLETE)
 
+    def test_chunk_data_is_not_stored(self) -> None:
+        parser = ChunkParser(store_body=False)
+        for part in (b'4\r\nWi', b'ki\r\n5\r\npedia\r', b'\n0\r\n\r\nleftover'):
+            raw = parser.parse(memoryview(part))
+        self.assertEqual(raw, b'leftover')
+        self.assertEqual(parser.chunk, b'')
+        self.assertEqual(parser.body, b'')
+        self.assertEqual(parser.state, chunkParserStates.COMPLETE)
+
+    def test_decoded_chunks_are_streamed(self) -> None:
+        chunks: List[bytes] = []
+        parser = ChunkParser(
+            store_body=False,
+            on_chunk=lambda data: chunks.append(data.tobytes()),
+        )
+        parser.parse(memoryview(b'5;name=value\r\nhel'))
+        self.assertEqual(chunks, [b'hel'])
+        parser.parse(memoryview(b'lo\r'))
+        parser.parse(memoryview(b'\n6\r'))
+        parser.parse(memoryview(b'\n world\r\n'))
+        self.assertEqual(chunks, [b'hel', b'lo', b' world'])
+        self.assertEqual(parser.state, chunkParserStates.WAITING_FOR_SIZE)
+        # Trailers are skipped until the blank line
+        parser.parse(memoryview(b'0\r\nExpires: never\r\n'))
+        self.assertEqual(parser.state, chunkParserStates.WAITING_FOR_SIZE)
+        self.assertEqual(parser.parse(memoryview(b'\r\nHTTP/1.1')), b'HTTP/1.1')
+        self.assertEqual(parser.state, chunkParserStates.COMPLETE)
+        self.assertEqual(parser.body, b'')
+
+    def test_invalid_chunk_size_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            self.parser.parse(memoryview(b'xyz\r\n'))
+
     def test_to_chunks(self) -> None:
         self.assertEqual(
             b'f\r\n{"key":"value"}\r\n0\r\n\r\n',
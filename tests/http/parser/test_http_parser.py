@@ -11,7 +11,9 @@
 import unittest
 
 from proxy.http import httpMethods
-from proxy.http.parser import HttpParser, httpParserTypes, httpParserStates
+from proxy.http.parser import (
+    ChunkParser, HttpParser, httpParserTypes, httpParserStates,
+)
 from proxy.common.utils import (
     bytes_, find_http_line, build_http_header, build_http_request,
 )
@@ -59,6 +61,16 @@ class TestHttpParser(unittest.TestCase):
         self.assertEqual(p.body, b'<!-- HTML RESPONSE HERE -->')
         self.assertEqual(p.state, httpParserStates.RCVING_BODY)
 
+    def test_body_without_content_length_outlives_received_buffer(self) -> None:
+        p = HttpParser(httpParserTypes.RESPONSE_PARSER)
+        p.parse(memoryview(HTTP_1_0 + b' 200 OK' + CRLF))
+        # Connections receive into reused buffers
+        buf = bytearray(b'Server: proxy.py' + CRLF + CRLF + b'<html>')
+        p.parse(memoryview(buf))
+        buf[-6:] = b'XXXXXX'
+        self.assertEqual(p.body, b'<html>')
+        self.assertIsInstance(p.body, bytes)
+
     def test_urlparse(self) -> None:
         self.parser.parse(memoryview(b'CONNECT httpbin.org:443 HTTP/1.1\r\n'))
         self.assertTrue(self.parser.is_https_tunnel)
@@ -319,7 +331,7 @@ class TestHttpParser(unittest.TestCase):
             len(pkt) + len(CRLF) + len(host_hdr),
         )
         assert self.parser.headers is None
-        self.assertEqual(self.parser.buffer, b'Host: localhost:8080')
+        self.assertEqual(self.parser.buffer, [b'Host: localhost:8080'])
         self.assertEqual(self.parser.state, httpParserStates.LINE_RCVD)
 
         self.parser.parse(memoryview(CRLF * 2))
@@ -351,7 +363,7 @@ class TestHttpParser(unittest.TestCase):
         self.assertEqual(self.parser._url.hostname, b'localhost')
         self.assertEqual(self.parser._url.port, 8080)
         self.assertEqual(self.parser.version, b'HTTP/1.1')
-        self.assertEqual(self.parser.buffer, b'Host: ')
+        self.assertEqual(self.parser.buffer, [b'Host: '])
         self.assertEqual(self.parser.state, httpParserStates.LINE_RCVD)
 
         self.parser.parse(memoryview(b'localhost:8080' + CRLF))
@@ -363,14 +375,14 @@ class TestHttpParser(unittest.TestCase):
                 b'localhost:8080',
             ),
         )
-        self.assertEqual(self.parser.buffer, None)
+        self.assertEqual(self.parser.buffer, [])
         self.assertEqual(
             self.parser.state,
             httpParserStates.RCVING_HEADERS,
         )
 
         self.parser.parse(memoryview(b'Content-Type: text/plain' + CRLF))
-        self.assertEqual(self.parser.buffer, None)
+        self.assertEqual(self.parser.buffer, [])
         assert self.parser.headers
         self.assertEqual(
             self.parser.headers[b'content-type'], (
@@ -386,6 +398,39 @@ class TestHttpParser(unittest.TestCase):
         self.parser.parse(memoryview(CRLF))
         self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
 
+    def test_byte_by_byte_parse(self) -> None:
+        raw = build_http_request(
+            httpMethods.POST, b'http://localhost/',
+            headers={
+                b'Host': b'localhost',
+                b'Content-Length': b'7',
+                b'Content-Type': b'text/plain',
+            },
+            body=b'a=b&c=d',
+        )
+        # Every CRLF is split across separate reads
+        for i in range(len(raw)):
+            self.parser.parse(memoryview(raw[i:i + 1]))
+        self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
+        self.assertEqual(self.parser.method, b'POST')
+        self.assertEqual(self.parser.header(b'host'), b'localhost')
+        self.assertEqual(self.parser.header(b'content-type'), b'text/plain')
+        self.assertEqual(self.parser.body, b'a=b&c=d')
+        self.assertEqual(self.parser.total_size, len(raw))
+        self.assertEqual(self.parser.buffer, [])
+
+    def test_line_split_across_many_reads(self) -> None:
+        self.parser.parse(memoryview(b'GET / HTTP/1.1\r'))
+        self.parser.parse(memoryview(b'\nUser-Agent: '))
+        self.parser.parse(memoryview(b'proxy'))
+        self.parser.parse(memoryview(b'.py\r'))
+        self.assertEqual(self.parser.state, httpParserStates.LINE_RCVD)
+        # Unprocessed segments are held as received
+        self.assertEqual(self.parser.buffer, [b'User-Agent: ', b'proxy', b'.py\r'])
+        self.parser.parse(memoryview(b'\n\r\n'))
+        self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
+        self.assertEqual(self.parser.header(b'user-agent'), b'proxy.py')
+
     def test_post_full_parse(self) -> None:
         raw = CRLF.join([
             b'POST %s HTTP/1.1',
@@ -410,7 +455,7 @@ class TestHttpParser(unittest.TestCase):
             (b'Content-Length', b'7'),
         )
         self.assertEqual(self.parser.body, b'a=b&c=d')
-        self.assertEqual(self.parser.buffer, None)
+        self.assertEqual(self.parser.buffer, [])
         self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
         self.assertEqual(len(self.parser.build()), len(raw % b'/'))
 
@@ -454,12 +499,12 @@ class TestHttpParser(unittest.TestCase):
             httpParserStates.RCVING_BODY,
         )
         self.assertEqual(self.parser.body, b'a=b')
-        self.assertEqual(self.parser.buffer, None)
+        self.assertEqual(self.parser.buffer, [])
 
         self.parser.parse(memoryview(b'&c=d'))
         self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
         self.assertEqual(self.parser.body, b'a=b&c=d')
-        self.assertEqual(self.parser.buffer, None)
+        self.assertEqual(self.parser.buffer, [])
 
     def test_connect_request_without_host_header_request_parse(self) -> None:
         """Case where clients can send CONNECT request without a Host header field.
@@ -673,15 +718,15 @@ class TestHttpParser(unittest.TestCase):
         self.parser.parse(memoryview(response.tobytes() + response.tobytes()))
         self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
         self.assertEqual(self.parser.body, b'{"key":"value"}')
-        self.assertEqual(self.parser.buffer, response)
+        self.assertEqual(self.parser.buffer, [response])
 
         # parse buffer
         parser = HttpParser(httpParserTypes.RESPONSE_PARSER)
         assert self.parser.buffer
-        parser.parse(self.parser.buffer)
+        parser.parse(self.parser.buffer[0])
         self.assertEqual(parser.state, httpParserStates.COMPLETE)
         self.assertEqual(parser.body, b'{"key":"value"}')
-        self.assertEqual(parser.buffer, None)
+        self.assertEqual(parser.buffer, [])
 
     def test_chunked_request_parse(self) -> None:
         self.parser.parse(
@@ -908,3 +953,102 @@ class TestHttpParser(unittest.TestCase):
                     b'\r\n',
                 ),
             )
+
+    def test_header_block_shares_common_header_names(self) -> None:
+        raw = CRLF.join([
+            b'GET http://localhost/ HTTP/1.1',
+            b'Host: localhost',
+            b'user-agent:  proxy.py ',
+            b'X-Custom: a:b',
+            b'Empty',
+            CRLF,
+        ])
+        self.parser.parse(memoryview(raw))
+        self.assertEqual(self.parser.state, httpParserStates.COMPLETE)
+        assert self.parser.headers
+        self.assertEqual(
+            self.parser.headers, {
+                b'host': (b'Host', b'localhost'),
+                b'user-agent': (b'user-agent', b'proxy.py'),
+                b'x-custom': (b'X-Custom', b'a:b'),
+                b'empty': (b'Empty', b''),
+            },
+        )
+        other = HttpParser.request(raw)
+        assert other.headers
+        for a, b in zip(self.parser.headers, other.headers):
+            self.assertEqual(a is b, a in (b'host', b'user-agent'))
+
+    def test_blank_line_with_whitespace_ends_header_block(self) -> None:
+        self.parser.parse(
+            memoryview(
+                b'POST / HTTP/1.1\r\nHost: localhost\r\n \r\n' +
+                b'X-Not-Header: a\r\n\r\n',
+            ),
+        )
+        self.assertEqual(self.parser.state, httpParserStates.RCVING_BODY)
+        self.assertEqual(self.parser.headers, {b'host': (b'Host', b'localhost')})
+        self.assertEqual(self.parser.body, b'X-Not-Header: a\r\n\r\n')
+
+    def test_too_many_headers_are_rejected(self) -> None:
+        headers = b''.join(b'X-%d: %d\r\n' % (i, i) for i in range(5))
+        parser = HttpParser(httpParserTypes.REQUEST_PARSER, max_headers=4)
+        with self.assertRaises(HttpProtocolException):
+            parser.parse(memoryview(b'GET / HTTP/1.1\r\n' + headers + CRLF))
+        # Also when received one line at a time
+        parser = HttpParser(httpParserTypes.REQUEST_PARSER, max_headers=4)
+        parser.parse(memoryview(b'GET / HTTP/1.1\r\n'))
+        with self.assertRaises(HttpProtocolException):
+            for line in headers.split(CRLF):
+                parser.parse(memoryview(line + CRLF))
+
+    def test_headers_exceeding_max_size_are_rejected(self) -> None:
+        parser = HttpParser(httpParserTypes.REQUEST_PARSER, max_header_size=64)
+        with self.assertRaises(HttpProtocolException):
+            parser.parse(
+                memoryview(b'GET / HTTP/1.1\r\nCookie: ' + b'a' * 64 + b'\r\n\r\n'),
+            )
+        # Slow clients are rejected before end of headers is received
+        parser = HttpParser(httpParserTypes.REQUEST_PARSER, max_header_size=64)
+        parser.parse(memoryview(b'GET / HTTP/1.1\r\nCookie: '))
+        with self.assertRaises(HttpProtocolException):
+            for _ in range(64):
+                parser.parse(memoryview(b'a'))
+        # Body isn't accounted for
+        parser = HttpParser(httpParserTypes.REQUEST_PARSER, max_header_size=64)
+        parser.parse(
+            memoryview(
+                b'POST / HTTP/1.1\r\nContent-Length: 100\r\n\r\n' + b'a' * 100,
+            ),
+        )
+        self.assertEqual(parser.state, httpParserStates.COMPLETE)
+
+    def test_body_is_only_tracked_when_not_stored(self) -> None:
+        body = b'a' * 1000
+        for response in (
+            okResponse(content=body, compress=False).tobytes(),
+            okResponse(
+                headers={b'Transfer-Encoding': b'chunked'},
+                content=ChunkParser.to_chunks(body, chunk_size=300),
+                compress=False,
+            ).tobytes(),
+        ):
+            parser = HttpParser(httpParserTypes.RESPONSE_PARSER, store_body=False)
+            for i in range(0, len(response), 128):
+                parser.parse(memoryview(response[i:i + 128]))
+            self.assertEqual(parser.state, httpParserStates.COMPLETE)
+            self.assertEqual(parser.body, None)
+            self.assertEqual(parser.total_size, len(response))
+            # Pipelined responses are left unparsed
+            parser.parse(memoryview(response))
+            self.assertEqual(parser.buffer, [response])
+        assert parser.chunk
+        self.assertEqual(parser.chunk.body, b'')
+
+    def test_body_without_content_length_is_only_tracked(self) -> None:
+        parser = HttpParser(httpParserTypes.RESPONSE_PARSER, store_body=False)
+        parser.parse(memoryview(b'HTTP/1.0 200 OK\r\n\r\nabc'))
+        parser.parse(memoryview(b'def'))
+        self.assertEqual(parser.state, httpParserStates.RCVING_BODY)
+        self.assertEqual(parser.body, None)
+        self.assertEqual(parser.body_size, 6)
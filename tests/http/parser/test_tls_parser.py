@@ -9,6 +9,7 @@
     :license: BSD, see LICENSE for more details.
 """
 import re
+import ssl
 import binascii
 from pathlib import Path
 
@@ -50,6 +51,21 @@ class TestTlsParser(unittest.TestCase):
             ),
         )
 
+    def test_parse_client_hello_sni_and_alpn(self) -> None:
+        ctx = ssl.create_default_context()
+        ctx.set_alpn_protocols(['h2', 'http/1.1'])
+        incoming, outgoing = ssl.MemoryBIO(), ssl.MemoryBIO()
+        sslobj = ctx.wrap_bio(incoming, outgoing, server_hostname='proxy.py')
+        with self.assertRaises(ssl.SSLWantReadError):
+            sslobj.do_handshake()
+        tls = TlsParser()
+        tls.parse(outgoing.read())
+        assert tls.handshake and tls.handshake.client_hello
+        self.assertEqual(tls.handshake.client_hello.server_name, 'proxy.py')
+        self.assertEqual(
+            tls.handshake.client_hello.alpn_protocols, [b'h2', b'http/1.1'],
+        )
+
     def test_parse_server_hello(self) -> None:
         with open(Path(__file__).parent / 'tls_server_hello.data', 'rb') as f:
             data = f.read()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import time
+import select
+import threading
+from typing import List
+from pathlib import Path
+from concurrent.futures import Future
+
+import pytest
+
+from proxy.common.constants import IS_WINDOWS
+from proxy.http.proxy.certificates import (
+    FutureWakeup, CertificateGenerator, file_lock, replacing,
+)
+
+
+class TestCertificateGenerator:
+
+    def test_generation_for_same_hostname_is_coalesced(self) -> None:
+        generator = CertificateGenerator(max_workers=2)
+        release = threading.Event()
+        calls = []
+
+        def generate(path: str) -> str:
+            calls.append(path)
+            release.wait(5)
+            return path
+
+        first = generator.submit('proxy.py', generate, 'proxy.py.pem')
+        second = generator.submit('proxy.py', generate, 'other.pem')
+        other = generator.submit('www.proxy.py', generate, 'www.proxy.py.pem')
+        assert first is second
+        assert other is not first
+        assert len(generator) == 2
+        release.set()
+        assert first.result(5) == 'proxy.py.pem'
+        assert other.result(5) == 'www.proxy.py.pem'
+        assert sorted(calls) == ['proxy.py.pem', 'www.proxy.py.pem']
+
+    def test_failed_generation_is_retried(self) -> None:
+        generator = CertificateGenerator(max_workers=1)
+
+        def generate() -> str:
+            raise ValueError('openssl failed')
+
+        with pytest.raises(ValueError):
+            generator.submit('proxy.py', generate).result(5)
+        # Subsequent requests retry generation
+        assert generator.submit('proxy.py', lambda: 'ok').result(5) == 'ok'
+
+
+class TestFutureWakeup:
+
+    def test_readable_once_future_completes(self) -> None:
+        future: 'Future[str]' = Future()
+        wakeup = FutureWakeup(future)
+        try:
+            assert select.select([wakeup.fileno], [], [], 0)[0] == []
+            future.set_result('proxy.py.pem')
+            assert select.select([wakeup.fileno], [], [], 0)[0] == [wakeup.fileno]
+        finally:
+            wakeup.close()
+
+    def test_closed_before_future_completes(self) -> None:
+        future: 'Future[str]' = Future()
+        wakeup = FutureWakeup(future)
+        wakeup.close()
+        wakeup.close()
+        # Must not write into a closed descriptor
+        future.set_result('proxy.py.pem')
+
+
+class TestReplacing:
+
+    def test_path_is_replaced_upon_success(self, tmp_path: Path) -> None:
+        path = str(tmp_path / 'proxy.py.pem')
+        with replacing(path) as tmp:
+            with open(tmp, 'wb') as f:
+                f.write(b'certificate')
+            # Not visible until complete
+            assert not os.path.exists(path)
+        with open(path, 'rb') as f:
+            assert f.read() == b'certificate'
+        assert os.listdir(str(tmp_path)) == ['proxy.py.pem']
+
+    def test_partial_writes_are_discarded(self, tmp_path: Path) -> None:
+        path = str(tmp_path / 'proxy.py.pem')
+        with pytest.raises(ValueError):
+            with replacing(path) as tmp:
+                with open(tmp, 'wb') as f:
+                    f.write(b'certif')
+                raise ValueError()
+        assert os.listdir(str(tmp_path)) == []
+
+
+class TestFileLock:
+
+    @pytest.mark.skipif(
+        IS_WINDOWS,
+        reason='flock is unavailable on Windows',
+    )  # type: ignore[misc]
+    def test_lock_is_exclusive_across_processes(self, tmp_path: Path) -> None:
+        path = str(tmp_path / 'proxy.py.pem')
+        read_end, write_end = os.pipe()
+        with file_lock(path):
+            pid = os.fork()
+            if pid == 0:    # pragma: no cover
+                with file_lock(path):
+                    os.write(write_end, b'locked')
+                os._exit(0)
+            # Child must still be waiting for the lock
+            assert select.select([read_end], [], [], 0.2)[0] == []
+        assert os.read(read_end, 6) == b'locked'
+        os.waitpid(pid, 0)
+        os.close(read_end)
+        os.close(write_end)
+
+    @pytest.mark.skipif(
+        IS_WINDOWS,
+        reason='flock is unavailable on Windows',
+    )  # type: ignore[misc]
+    def test_lock_file_is_removed_upon_release(self, tmp_path: Path) -> None:
+        path = str(tmp_path / 'proxy.py.pem')
+        with file_lock(path):
+            assert os.listdir(str(tmp_path)) == ['proxy.py.pem.lock']
+        assert os.listdir(str(tmp_path)) == []
+
+    @pytest.mark.skipif(
+        IS_WINDOWS,
+        reason='flock is unavailable on Windows',
+    )  # type: ignore[misc]
+    def test_lock_is_exclusive_across_threads(self, tmp_path: Path) -> None:
+        path = str(tmp_path / 'proxy.py.pem')
+        acquired: List[int] = []
+        overlapped: List[int] = []
+        held = threading.Lock()
+
+        def hold() -> None:
+            for _ in range(50):
+                with file_lock(path):
+                    # Never held by more than one thread at a time
+                    if not held.acquire(blocking=False):
+                        overlapped.append(threading.get_ident())
+                        continue
+                    acquired.append(threading.get_ident())
+                    time.sleep(0.0001)
+                    held.release()
+
+        threads = [threading.Thread(target=hold) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert overlapped == []
+        assert len(acquired) == 200
+        assert os.listdir(str(tmp_path)) == []
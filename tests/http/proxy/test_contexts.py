@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+from typing import cast
+from unittest import mock
+
+import pytest
+
+from pytest_mock import MockerFixture
+
+from proxy.http.proxy.contexts import ServerContextCache
+
+
+class TestServerContextCache:
+
+    @pytest.fixture(autouse=True)   # type: ignore[misc]
+    def _setUp(self, mocker: MockerFixture) -> None:
+        self.mock_new_ssl_context = mocker.patch(
+            'proxy.http.proxy.contexts.new_ssl_context',
+            side_effect=lambda *args, **kwargs: mocker.MagicMock(),
+        )
+        mocker.patch('os.path.getsize', return_value=100)
+
+    def test_hits_and_misses_are_counted(self) -> None:
+        cache = ServerContextCache(max_entries=10, max_size=10000)
+        assert cache.get('proxy.py') is None
+        ctx = cache.put('proxy.py', 'proxy.py.pem', 'signing-key.pem')
+        cast(mock.MagicMock, ctx).load_cert_chain.assert_called_once_with(
+            certfile='proxy.py.pem', keyfile='signing-key.pem',
+        )
+        assert cache.get('proxy.py') is ctx
+        assert cache.get('proxy.py') is ctx
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert cache.size == 200
+        # Cached contexts never load certificates again
+        assert self.mock_new_ssl_context.call_count == 1
+
+    def test_least_recently_used_are_evicted(self) -> None:
+        cache = ServerContextCache(max_entries=2, max_size=10000)
+        cache.put('a.com', 'a.com.pem', 'signing-key.pem')
+        cache.put('b.com', 'b.com.pem', 'signing-key.pem')
+        assert cache.get('a.com') is not None
+        cache.put('c.com', 'c.com.pem', 'signing-key.pem')
+        assert len(cache) == 2
+        assert cache.get('b.com') is None
+        assert cache.get('a.com') is not None
+
+    def test_evicted_when_over_memory(self) -> None:
+        cache = ServerContextCache(max_entries=10, max_size=500)
+        for host in ('a.com', 'b.com', 'c.com'):
+            cache.put(host, host + '.pem', 'signing-key.pem')
+        assert len(cache) == 2
+        assert cache.size == 400
+        assert cache.get('a.com') is None
+
+    def test_sni_selects_cached_context(self, mocker: MockerFixture) -> None:
+        cache = ServerContextCache(max_entries=10, max_size=10000)
+        a = cache.put('a.com', 'a.com.pem', 'signing-key.pem')
+        b = cache.put('b.com', 'b.com.pem', 'signing-key.pem')
+        select = cast(mock.MagicMock, a.set_servername_callback).call_args[0][0]
+        sock = mocker.MagicMock()
+        sock.context = a
+        select(sock, 'b.com', a)
+        assert sock.context is b
+        # Unknown or missing server names keep the context
+        sock.context = a
+        select(sock, 'c.com', a)
+        select(sock, None, a)
+        assert sock.context is a
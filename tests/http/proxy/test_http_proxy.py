@@ -8,7 +8,9 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import socket
 import selectors
+from unittest import mock
 
 import pytest
 
@@ -17,9 +19,13 @@ from pytest_mock import MockerFixture
 from proxy.http import HttpProtocolHandler, HttpClientConnection
 from proxy.http.proxy import HttpProxyPlugin
 from proxy.common.flag import FlagParser
+from proxy.core.connection.splice import SpliceRelay
 from proxy.common.utils import build_http_request
+from proxy.http.responses import (
+    BAD_GATEWAY_RESPONSE_PKT, PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT,
+)
 from proxy.http.exception import HttpProtocolException
-from proxy.common.constants import DEFAULT_HTTP_PORT
+from proxy.common.constants import DEFAULT_TIMEOUT, DEFAULT_HTTP_PORT
 
 
 class TestHttpProxyPlugin:
@@ -112,6 +118,209 @@ class TestHttpProxyPlugin:
         self.mock_server_conn.assert_not_called()
         self.plugin.return_value.before_upstream_connection.assert_called()
 
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_proxy_plugin_parks_tunnel_until_async_connect_completes(self) -> None:
+        self.flags.enable_async_connect = True
+        self.plugin.return_value.write_to_descriptors = mock.AsyncMock(
+            return_value=False,
+        )
+        self.plugin.return_value.read_from_descriptors = mock.AsyncMock(
+            return_value=False,
+        )
+        self.plugin.return_value.get_descriptors = mock.AsyncMock(
+            return_value=([], []),
+        )
+        self.plugin.return_value.before_upstream_connection.side_effect = lambda r: r
+        self.plugin.return_value.handle_client_request.side_effect = lambda r: r
+        self.plugin.return_value.resolve_dns.return_value = None, None
+
+        server = self.mock_server_conn.return_value
+        server.closed = False
+        server.connecting = True
+        server.addr = ('upstream.host', 443)
+        server.connection.fileno.return_value = 11
+
+        self._conn.recv.return_value = build_http_request(
+            b'CONNECT', b'upstream.host:443',
+            headers={
+                b'Host': b'upstream.host:443',
+            },
+        )
+        self.mock_selector.return_value.select.side_effect = [
+            [(
+                selectors.SelectorKey(
+                    fileobj=self._conn.fileno(),
+                    fd=self._conn.fileno(),
+                    events=selectors.EVENT_READ,
+                    data=None,
+                ),
+                selectors.EVENT_READ,
+            )],
+        ]
+        await self.protocol_handler._run_once()
+
+        server.connect.assert_called_once_with(
+            addr=None, source_address=None, non_blocking=True, timeout=DEFAULT_TIMEOUT,
+        )
+        # Tunnel established response is not sent while connecting
+        assert not self.protocol_handler.work.has_buffer()
+        assert self.protocol_handler.plugin is not None
+        assert await self.protocol_handler.plugin.get_descriptors() == ([], [11])
+
+        def finish_connect() -> None:
+            server.connecting = False
+        server.finish_connect.side_effect = finish_connect
+        teardown = await self.protocol_handler.plugin.write_to_descriptors([11])
+        assert not teardown
+        server.finish_connect.assert_called_once()
+        assert self.protocol_handler.work.has_buffer()
+        assert self.protocol_handler.work.buffer[0] == \
+            PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_proxy_plugin_async_connect_failure_responds_bad_gateway(self) -> None:
+        self.flags.enable_async_connect = True
+        self.plugin.return_value.write_to_descriptors = mock.AsyncMock(
+            return_value=False,
+        )
+        self.plugin.return_value.read_from_descriptors = mock.AsyncMock(
+            return_value=False,
+        )
+        self.plugin.return_value.get_descriptors = mock.AsyncMock(
+            return_value=([], []),
+        )
+        self.plugin.return_value.before_upstream_connection.side_effect = lambda r: r
+        self.plugin.return_value.handle_client_request.side_effect = lambda r: r
+        self.plugin.return_value.resolve_dns.return_value = None, None
+
+        server = self.mock_server_conn.return_value
+        server.closed = False
+        server.connecting = True
+        server.addr = ('upstream.host', 443)
+        server.connection.fileno.return_value = 11
+        server.finish_connect.side_effect = ConnectionRefusedError()
+
+        self._conn.recv.return_value = build_http_request(
+            b'CONNECT', b'upstream.host:443',
+            headers={
+                b'Host': b'upstream.host:443',
+            },
+        )
+        self.mock_selector.return_value.select.side_effect = [
+            [(
+                selectors.SelectorKey(
+                    fileobj=self._conn.fileno(),
+                    fd=self._conn.fileno(),
+                    events=selectors.EVENT_READ,
+                    data=None,
+                ),
+                selectors.EVENT_READ,
+            )],
+        ]
+        await self.protocol_handler._run_once()
+        teardown = await self.protocol_handler.handle_events([], [11])
+        # Teardown is deferred until bad gateway response is flushed
+        assert not teardown
+        assert self.protocol_handler.must_flush_before_shutdown
+        server.close.assert_called_once()
+        assert self.protocol_handler.work.buffer[0] == BAD_GATEWAY_RESPONSE_PKT
+
+    def test_keep_alive_timeout_applies_once_response_completes(self) -> None:
+        self.flags.keep_alive_timeout = 5
+        self.mock_server_conn.return_value.closed = False
+        self.plugin.return_value.before_upstream_connection.side_effect = lambda r: r
+        self.plugin.return_value.handle_client_request.side_effect = lambda r: r
+        self.plugin.return_value.resolve_dns.return_value = None, None
+        handler = self.protocol_handler
+        handler.handle_data(
+            memoryview(
+                build_http_request(
+                    b'GET', b'http://upstream.host/',
+                    headers={b'Host': b'upstream.host'},
+                ),
+            ),
+        )
+        assert isinstance(handler.plugin, HttpProxyPlugin)
+        # Slow upstream response must not be subject to keep-alive timeout
+        assert handler.deadline() == handler.last_activity + DEFAULT_TIMEOUT
+        handler.plugin.response.parse(
+            memoryview(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n'),
+        )
+        assert handler.deadline() == handler.last_activity + 5
+
+    def test_upstream_responses_are_subject_to_header_limits(self) -> None:
+        self.flags.max_headers = 2
+        self.plugin.return_value.before_upstream_connection.side_effect = lambda r: r
+        self.plugin.return_value.handle_client_request.side_effect = lambda r: r
+        self.plugin.return_value.resolve_dns.return_value = None, None
+        handler = self.protocol_handler
+        handler.handle_data(
+            memoryview(
+                build_http_request(
+                    b'GET', b'http://upstream.host/',
+                    headers={b'Host': b'upstream.host'},
+                    no_ua=True,
+                ),
+            ),
+        )
+        assert isinstance(handler.plugin, HttpProxyPlugin)
+        with pytest.raises(HttpProtocolException):
+            handler.plugin.response.parse(
+                memoryview(
+                    b'HTTP/1.1 200 OK\r\nA: 1\r\nB: 2\r\nC: 3\r\n\r\n',
+                ),
+            )
+
+    @pytest.mark.skipif(
+        not SpliceRelay.is_available(),
+        reason='splice not available',
+    )   # type: ignore[misc]
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_spliced_tunnel_stays_active_while_upstream_streams(
+            self, mocker: MockerFixture,
+    ) -> None:
+        self.flags.tunnel_idle_timeout = 5
+        mock_time = mocker.patch('proxy.http.proxy.server.time.time')
+        handler = self.protocol_handler
+        handler.request.parse(
+            memoryview(
+                build_http_request(
+                    b'CONNECT', b'upstream.host:443',
+                    headers={b'Host': b'upstream.host:443'},
+                ),
+            ),
+        )
+        plugin = handler._initialize_plugin(HttpProxyPlugin)
+        assert isinstance(plugin, HttpProxyPlugin)
+        handler.plugin = plugin
+        client, proxy_client = socket.socketpair()
+        proxy_upstream, upstream = socket.socketpair()
+        for sock in (proxy_client, proxy_upstream):
+            sock.setblocking(False)
+        plugin.relay = SpliceRelay(
+            proxy_client.fileno(), proxy_upstream.fileno(), 1024,
+        )
+        try:
+            # Client remains silent while upstream keeps streaming
+            # for longer than tunnel idle timeout
+            handler.last_activity = 100
+            for now in (103, 106, 109):
+                mock_time.return_value = now
+                upstream.sendall(b'data')
+                assert not await plugin.read_from_descriptors(
+                    [proxy_upstream.fileno()],
+                )
+                assert client.recv(4) == b'data'
+                assert handler.deadline() == now + 5
+            # Relay without progress is not activity
+            mock_time.return_value = 112
+            assert not await plugin.read_from_descriptors([])
+            assert handler.deadline() == 109 + 5
+        finally:
+            plugin.relay.close()
+            for sock in (client, proxy_client, proxy_upstream, upstream):
+                sock.close()
+
     def test_proxy_plugin_plugins_can_teardown_from_write_to_descriptors(self) -> None:
         pass
 
@@ -8,11 +8,16 @@
     :copyright: (c) 2013-present by Abhinav Singh and contributors.
     :license: BSD, see LICENSE for more details.
 """
+import os
 import ssl
 import uuid
+import select
 import socket
 import selectors
+import subprocess
+from pathlib import Path
 from typing import Any, TypeVar
+from concurrent.futures import Future
 
 import pytest
 from unittest import mock
@@ -35,12 +40,14 @@ from ...test_assertions import Assertions
 class TestHttpProxyTlsInterception(Assertions):
 
     @pytest.mark.asyncio    # type: ignore[misc]
-    async def test_e2e(self, mocker: MockerFixture) -> None:
+    async def test_e2e(self, mocker: MockerFixture, tmp_path: Path) -> None:
         host, port = uuid.uuid4().hex, 443
         netloc = '{0}:{1}'.format(host, port)
 
         self.mock_fromfd = mocker.patch('socket.fromfd')
         self.mock_selector = mocker.patch('selectors.DefaultSelector')
+        # Exercise openssl based certificate generation
+        mocker.patch('proxy.http.proxy.server.HAS_CRYPTOGRAPHY', False)
         self.mock_sign_csr = mocker.patch('proxy.http.proxy.server.sign_csr')
         self.mock_gen_csr = mocker.patch('proxy.http.proxy.server.gen_csr')
         self.mock_gen_public_key = mocker.patch(
@@ -49,22 +56,42 @@ class TestHttpProxyTlsInterception(Assertions):
         self.mock_server_conn = mocker.patch(
             'proxy.http.proxy.server.TcpServerConnection',
         )
-        self.mock_sign_csr.return_value = True
+
+        def sign_csr(**kwargs: Any) -> bool:
+            with open(kwargs['crt_path'], 'wb'):
+                pass
+            return True
+        self.mock_sign_csr.side_effect = sign_csr
         self.mock_gen_csr.return_value = True
         self.mock_gen_public_key.return_value = True
 
         # Used for server side wrapping
+        # Contexts are cached process wide
+        mocker.patch.dict('proxy.common.utils._ssl_contexts', clear=True)
+        mocker.patch.object(HttpProxyPlugin, 'contexts', None)
+        mocker.patch('os.path.getsize', return_value=1024)
         self.mock_ssl_context = mocker.patch('ssl.create_default_context')
         upstream_tls_sock = mock.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_context.return_value.wrap_socket.return_value = upstream_tls_sock
-
         # Used for client wrapping
-        self.mock_ssl_wrap = mocker.patch('ssl.wrap_socket')
         client_tls_sock = mock.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_wrap.return_value = client_tls_sock
+        self.mock_ssl_context.return_value.wrap_socket.side_effect = \
+            lambda sock, server_side=False, **kwargs: \
+            client_tls_sock if server_side else upstream_tls_sock
 
         plain_connection = mock.MagicMock(spec=socket.socket)
 
+        # Connections receive using recv_into, serve
+        # them from mocked recv return values.
+        def recv_into_using_recv(sock: mock.MagicMock) -> None:
+            def recv_into(buffer: memoryview, nbytes: int = 0) -> int:
+                data = sock.recv(nbytes or len(buffer))
+                buffer[:len(data)] = data
+                return len(data)
+            sock.recv_into.side_effect = recv_into
+
+        for sock in (upstream_tls_sock, client_tls_sock, plain_connection):
+            recv_into_using_recv(sock)
+
         def mock_connection() -> Any:
             if self.mock_ssl_context.return_value.wrap_socket.called:
                 return upstream_tls_sock
@@ -88,6 +115,7 @@ class TestHttpProxyTlsInterception(Assertions):
             ca_cert_file='ca-cert.pem',
             ca_key_file='ca-key.pem',
             ca_signing_key_file='ca-signing-key.pem',
+            ca_cert_dir=str(tmp_path),
             threaded=True,
         )
         self.assertTrue(tls_interception_enabled(self.flags))
@@ -229,11 +257,11 @@ class TestHttpProxyTlsInterception(Assertions):
             False,
         )
 
-        self.mock_ssl_context.assert_called_with(
+        self.mock_ssl_context.assert_any_call(
             ssl.Purpose.SERVER_AUTH, cafile=str(DEFAULT_CA_FILE),
         )
         self.assertEqual(plain_connection.setblocking.call_count, 2)
-        self.mock_ssl_context.return_value.wrap_socket.assert_called_with(
+        self.mock_ssl_context.return_value.wrap_socket.assert_any_call(
             plain_connection, server_hostname=host,
         )
         self.assertEqual(self.mock_sign_csr.call_count, 1)
@@ -248,15 +276,22 @@ class TestHttpProxyTlsInterception(Assertions):
             PROXY_TUNNEL_ESTABLISHED_RESPONSE_PKT,
         )
         assert self.flags.ca_cert_dir is not None
-        self.mock_ssl_wrap.assert_called_with(
-            self._conn,
-            server_side=True,
+        self.mock_ssl_context.assert_called_with(
+            ssl.Purpose.CLIENT_AUTH, cafile=None,
+        )
+        self.mock_ssl_context.return_value.load_cert_chain.assert_called_with(
             keyfile=self.flags.ca_signing_key_file,
             certfile=HttpProxyPlugin.generated_cert_file_path(
                 self.flags.ca_cert_dir, host,
             ),
-            ssl_version=ssl.PROTOCOL_TLS,
         )
+        self.mock_ssl_context.return_value.wrap_socket.assert_called_with(
+            self._conn, server_side=True,
+        )
+        # Context of intercepted host is reused
+        assert HttpProxyPlugin.contexts is not None
+        self.assertEqual(HttpProxyPlugin.contexts.misses, 1)
+        self.assertTrue(HttpProxyPlugin.contexts.get(host) is not None)
         self.assertEqual(self._conn.setblocking.call_count, 2)
         self.assertEqual(
             self.protocol_handler.work.connection,
@@ -299,3 +334,266 @@ class TestHttpProxyTlsInterception(Assertions):
         self.assertEqual(callback_request._url.remainder, b'/')
         self.assertEqual(callback_request.method, httpMethods.GET)
         self.assertEqual(callback_request.is_https_tunnel, False)
+
+
+class TestHttpProxyAsyncHandshake(Assertions):
+    """Drives --enable-async-handshake interception of a CONNECT tunnel
+    without performing any actual TLS handshake."""
+
+    @pytest.fixture(autouse=True)   # type: ignore[misc]
+    def _setUp(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        self.flags = FlagParser.initialize(
+            ca_cert_file='ca-cert.pem',
+            ca_key_file='ca-key.pem',
+            ca_signing_key_file='ca-signing-key.pem',
+            ca_cert_dir=str(tmp_path),
+            threaded=True,
+        )
+        self.flags.enable_async_handshake = True
+        self.flags.plugins = {}
+        # TLS contexts of intercepted hostnames cached within the process
+        self.contexts = mocker.patch.object(HttpProxyPlugin, 'contexts')
+        self.contexts.get.return_value = None
+        self.context = mock.MagicMock(spec=ssl.SSLContext)
+        self.certificates = mocker.patch.object(HttpProxyPlugin, 'certificates')
+        # Client connection
+        self.client_tls = mock.MagicMock(spec=ssl.SSLSocket)
+        self.client_tls.fileno.return_value = 12
+        self.context.wrap_socket.return_value = self.client_tls
+        self.client_sock = mock.MagicMock(spec=socket.socket)
+        self.client_sock.fileno.return_value = 10
+        self.client = HttpClientConnection(self.client_sock, ('127.0.0.1', 54382))
+        # Upstream connection
+        self.upstream_tls = mock.MagicMock(spec=ssl.SSLSocket)
+        self.upstream_tls.fileno.return_value = 11
+        mocker.patch(
+            'proxy.core.connection.server.ssl_context',
+        ).return_value.wrap_socket.return_value = self.upstream_tls
+        self.upstream = TcpServerConnection('upstream.host', 443)
+        self.upstream._conn = mock.MagicMock(spec=socket.socket)
+        self.upstream.closed = False
+        request = HttpParser.request(
+            build_http_request(
+                httpMethods.CONNECT, b'upstream.host:443',
+                headers={b'Host': b'upstream.host:443'},
+                no_ua=True,
+            ),
+        )
+        self.plugin = HttpProxyPlugin(
+            uuid.uuid4().hex, self.flags, self.client, request,
+        )
+        self.plugin.upstream = self.upstream
+
+    def test_handshakes_are_retried_on_want_read_and_want_write(self) -> None:
+        self.contexts.get.return_value = self.context
+        # ClientHello hasn't arrived yet
+        self.client_sock.recv.side_effect = BlockingIOError
+        self.upstream_tls.do_handshake.side_effect = [
+            ssl.SSLWantReadError(), ssl.SSLWantWriteError(), None,
+        ]
+        self.client_tls.do_handshake.side_effect = [
+            ssl.SSLWantReadError(), ssl.SSLWantWriteError(), None,
+        ]
+        self.assertFalse(self.plugin.intercept())
+        self.assertTrue(self.plugin.intercepting)
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(11, selectors.EVENT_READ), (10, selectors.EVENT_READ)],
+        )
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(11, selectors.EVENT_WRITE), (10, selectors.EVENT_READ)],
+        )
+        # Client handshake starts once upstream handshake completes
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertEqual(self.plugin.server_handshake, None)
+        self.context.wrap_socket.assert_called_once_with(
+            self.client_sock,
+            server_side=True,
+            do_handshake_on_connect=False,
+        )
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(12, selectors.EVENT_READ)],
+        )
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(12, selectors.EVENT_WRITE)],
+        )
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertFalse(self.plugin.intercepting)
+        self.assertEqual(self.client.connection, self.client_tls)
+        self.assertEqual(self.upstream.connection, self.upstream_tls)
+        self.assertEqual(self.upstream_tls.do_handshake.call_count, 3)
+        self.assertEqual(self.client_tls.do_handshake.call_count, 3)
+
+    def _park(self) -> 'Future[str]':
+        """Starts interception of a hostname without cached TLS context."""
+        certificate: 'Future[str]' = Future()
+        self.certificates.submit.return_value = certificate
+        self.upstream_tls.do_handshake.return_value = None
+        self.assertFalse(self.plugin.intercept())
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(10, selectors.EVENT_WRITE)],
+        )
+        self.assertFalse(self.plugin._continue_interception())
+        return certificate
+
+    def test_interception_is_parked_until_certificate_is_generated(self) -> None:
+        certificate = self._park()
+        self.assertEqual(self.plugin.server_context(), None)
+        self.certificates.submit.assert_called_once()
+        self.context.wrap_socket.assert_not_called()
+        wakeup = self.plugin.certificate_wakeup
+        assert wakeup is not None
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(wakeup.fileno, selectors.EVENT_READ)],
+        )
+        self.assertEqual(select.select([wakeup.fileno], [], [], 0)[0], [])
+        # Resumes once generation completes
+        self.contexts.put.return_value = self.context
+        certificate.set_result('upstream.host.pem')
+        self.assertEqual(
+            select.select([wakeup.fileno], [], [], 0)[0],
+            [wakeup.fileno],
+        )
+        self.client_tls.do_handshake.return_value = None
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertFalse(self.plugin.intercepting)
+        self.assertEqual(self.plugin.certificate_wakeup, None)
+        self.contexts.put.assert_called_once_with(
+            'upstream.host', 'upstream.host.pem', 'ca-signing-key.pem',
+        )
+        self.assertEqual(self.client.connection, self.client_tls)
+
+    @pytest.mark.parametrize(
+        'error',
+        [subprocess.TimeoutExpired('openssl', 10), OSError()],
+    )   # type: ignore[misc]
+    def test_failed_certificate_generation_tears_down(self, error: Exception) -> None:
+        certificate = self._park()
+        certificate.set_exception(error)
+        self.assertTrue(self.plugin._continue_interception())
+        self.assertEqual(self.plugin.certificate_wakeup, None)
+        self.contexts.put.assert_not_called()
+        self.context.wrap_socket.assert_not_called()
+
+    def test_parked_connection_can_be_closed(self) -> None:
+        certificate = self._park()
+        wakeup = self.plugin.certificate_wakeup
+        assert wakeup is not None
+        self.plugin.on_client_connection_close()
+        with pytest.raises(OSError):
+            os.fstat(wakeup.fileno)
+        # Generation completing later must not touch closed pipe
+        certificate.set_result('upstream.host.pem')
+        self.contexts.put.assert_not_called()
+
+    def test_certificate_generator_is_sized_using_flags(self, mocker: MockerFixture) -> None:
+        mocker.patch.object(HttpProxyPlugin, 'certificates', None)
+        self.flags.certificate_generation_workers = 2
+        self.contexts.get.return_value = self.context
+        self.upstream_tls.do_handshake.return_value = None
+        self.assertFalse(self.plugin.intercept())
+        self.assertEqual(self.plugin.server_context(), self.context)
+        assert HttpProxyPlugin.certificates is not None
+        self.assertEqual(HttpProxyPlugin.certificates.max_workers, 2)
+
+    @staticmethod
+    def _client_hello(server_name: str) -> bytes:
+        ctx = ssl.create_default_context()
+        incoming, outgoing = ssl.MemoryBIO(), ssl.MemoryBIO()
+        sslobj = ctx.wrap_bio(incoming, outgoing, server_hostname=server_name)
+        with pytest.raises(ssl.SSLWantReadError):
+            sslobj.do_handshake()
+        return outgoing.read()
+
+    def _cache(self, hostname: str) -> None:
+        self.contexts.get.side_effect = \
+            lambda name: self.context if name == hostname else None
+
+    def test_client_handshake_overlaps_for_cached_sni(self) -> None:
+        self._cache('sni.host')
+        self.client_sock.recv.return_value = self._client_hello('sni.host')
+        self.upstream_tls.do_handshake.side_effect = [
+            ssl.SSLWantReadError(), ssl.SSLWantReadError(), None,
+        ]
+        self.client_tls.do_handshake.side_effect = [ssl.SSLWantReadError(), None]
+        self.assertFalse(self.plugin.intercept())
+        self.assertFalse(self.plugin._continue_interception())
+        # Both handshakes are in progress
+        self.contexts.get.assert_called_once_with('sni.host')
+        assert self.plugin.client_hello is not None
+        self.assertEqual(self.plugin.client_hello.server_name, 'sni.host')
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(11, selectors.EVENT_READ), (12, selectors.EVENT_READ)],
+        )
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertFalse(self.plugin.intercepting)
+        self.certificates.submit.assert_not_called()
+        self.assertEqual(self.client.connection, self.client_tls)
+
+    def test_client_handshake_waits_for_upstream_on_sni_miss(self) -> None:
+        self._cache('upstream.host')
+        self.client_sock.recv.return_value = self._client_hello('other.host')
+        self.upstream_tls.do_handshake.side_effect = [
+            ssl.SSLWantReadError(), ssl.SSLWantReadError(), None,
+        ]
+        self.client_tls.do_handshake.return_value = None
+        self.assertFalse(self.plugin.intercept())
+        self.assertFalse(self.plugin._continue_interception())
+        self.contexts.get.assert_called_once_with('other.host')
+        self.context.wrap_socket.assert_not_called()
+        # ClientHello is only peeked once
+        self.assertEqual(
+            self.plugin._interception_events(),
+            [(11, selectors.EVENT_READ)],
+        )
+        # Context is then looked up for CONNECT hostname
+        self.assertFalse(self.plugin._continue_interception())
+        self.contexts.get.assert_called_with('upstream.host')
+        self.assertEqual(self.client_sock.recv.call_count, 1)
+        self.assertFalse(self.plugin.intercepting)
+        self.assertEqual(self.client.connection, self.client_tls)
+
+    @pytest.mark.parametrize(
+        'raw',
+        [b'', b'\x16\x03\x01\x02\x00\x01', b'GET / HTTP/1.1\r\n\r\n'],
+    )   # type: ignore[misc]
+    def test_unparsable_client_hello_falls_back_to_connect_host(
+            self, raw: bytes,
+    ) -> None:
+        self._cache('upstream.host')
+        self.client_sock.recv.return_value = raw
+        self.upstream_tls.do_handshake.side_effect = [
+            ssl.SSLWantReadError(), ssl.SSLWantReadError(), None,
+        ]
+        self.client_tls.do_handshake.return_value = None
+        self.assertFalse(self.plugin.intercept())
+        self.assertFalse(self.plugin._continue_interception())
+        assert self.plugin.client_hello is not None
+        self.assertEqual(self.plugin.client_hello.server_name, None)
+        self.contexts.get.assert_called_once_with('upstream.host')
+        self.assertEqual(self.plugin.server_handshake, selectors.EVENT_READ)
+        self.assertEqual(self.client.connection, self.client_tls)
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertFalse(self.plugin.intercepting)
+
+    def test_upstream_handshake_failure_after_client_handshake_started(self) -> None:
+        self._cache('sni.host')
+        self.client_sock.recv.return_value = self._client_hello('sni.host')
+        alert = ssl.SSLError(1, 'handshake failure')
+        alert.reason = 'SSLV3_ALERT_HANDSHAKE_FAILURE'
+        self.upstream_tls.do_handshake.side_effect = [
+            ssl.SSLWantReadError(), ssl.SSLWantReadError(), alert,
+        ]
+        self.client_tls.do_handshake.side_effect = ssl.SSLWantReadError()
+        self.assertFalse(self.plugin.intercept())
+        self.assertFalse(self.plugin._continue_interception())
+        self.assertEqual(self.plugin.client_handshake, selectors.EVENT_READ)
+        self.assertTrue(self.plugin._continue_interception())
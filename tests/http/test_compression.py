@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import gzip
+import unittest
+
+from proxy.http.compression import (
+    GZIP, BROTLI, IDENTITY, CompressedCache, compress, negotiate,
+    is_compressible,
+)
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_negotiate(self) -> None:
+        available = [BROTLI, GZIP]
+        self.assertEqual(negotiate(None, available), IDENTITY)
+        self.assertEqual(negotiate(b'gzip, deflate, br', available), BROTLI)
+        self.assertEqual(negotiate(b'gzip, deflate', available), GZIP)
+        self.assertEqual(negotiate(b'br;q=0.5, gzip;q=0.8', available), GZIP)
+        self.assertEqual(negotiate(b'*;q=0.1, br;q=0', available), GZIP)
+        self.assertEqual(negotiate(b'gzip;q=0, br;q=0', available), IDENTITY)
+        self.assertEqual(negotiate(b'deflate', available), IDENTITY)
+        self.assertEqual(negotiate(b'GZIP;Q=1', [GZIP]), GZIP)
+        self.assertEqual(negotiate(b'gzip;q=abc', [GZIP]), IDENTITY)
+        self.assertEqual(negotiate(b'gzip', []), IDENTITY)
+
+    def test_is_compressible(self) -> None:
+        self.assertTrue(is_compressible(b'text/html; charset=utf-8'))
+        self.assertTrue(is_compressible(b'application/javascript'))
+        self.assertTrue(is_compressible(b'image/svg+xml'))
+        self.assertTrue(is_compressible(None))
+        self.assertFalse(is_compressible(b'image/png'))
+        self.assertFalse(is_compressible(b'application/gzip'))
+        self.assertFalse(is_compressible(b'font/woff2'))
+
+    def test_compress(self) -> None:
+        content = b'hello world ' * 10
+        self.assertEqual(gzip.decompress(compress(content, GZIP, 1)), content)
+
+    def test_cache_evicts_least_recently_used(self) -> None:
+        cache = CompressedCache(80)
+        cache.put(('a', 1, GZIP), b'a' * 10)
+        cache.put(('b', 1, GZIP), b'b' * 10)
+        # Too large to be cached
+        cache.put(('c', 1, GZIP), b'c' * 11)
+        self.assertIsNone(cache.get(('c', 1, GZIP)))
+        self.assertEqual(cache.get(('a', 1, GZIP)), b'a' * 10)
+        for i in range(7):
+            cache.put(('d', i, GZIP), b'd' * 10)
+        self.assertEqual(cache.size, 80)
+        # b was least recently used
+        self.assertIsNone(cache.get(('b', 1, GZIP)))
+        self.assertIsNotNone(cache.get(('a', 1, GZIP)))
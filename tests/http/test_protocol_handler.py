@@ -142,6 +142,25 @@ class TestHttpProtocolHandlerWithoutServerMock(Assertions):
             BAD_REQUEST_RESPONSE_PKT,
         )
 
+    def test_deadline_depends_on_connection_phase(self) -> None:
+        self.flags.header_read_timeout = 2
+        self.flags.keep_alive_timeout = 30
+        handler = self.protocol_handler
+        # Request headers must arrive within header read timeout,
+        # irrespective of client activity
+        handler.last_activity = handler.start_time + 1
+        handler.request.parse(memoryview(b'GET http://x HTTP/1.1\r\nHost: x\r\n'))
+        self.assertEqual(handler.deadline(), handler.start_time + 2)
+        # Once request is being handled, connection is dropped when idle
+        handler.plugin = mock.MagicMock()
+        handler.plugin.deadline.return_value = None
+        self.assertEqual(handler.deadline(), handler.last_activity + 30)
+        handler.plugin.deadline.return_value = handler.start_time + 5
+        self.assertEqual(handler.deadline(), handler.start_time + 5)
+        # Never while there is pending data for client
+        handler.work.queue(memoryview(b'data'))
+        assert handler.deadline() is None
+
 
 class TestHttpProtocolHandler(Assertions):
 
@@ -70,6 +70,34 @@ class TestResponses(unittest.TestCase):
             b'HTTP/1.1 200 OK\r\nHost: jaxl.com\r\nContent-Length: 21\r\n\r\nHHHHHHHHHHHHHHHHHHHHH',
         )
 
+    def test_compression_negotiation(self) -> None:
+        content = b'H' * 21
+        response = okResponse(
+            content=content,
+            accept_encoding=b'deflate',
+        )
+        self.assertEqual(
+            response,
+            b'HTTP/1.1 200 OK\r\nContent-Length: 21\r\n\r\nHHHHHHHHHHHHHHHHHHHHH',
+        )
+        response = okResponse(
+            content=content,
+            headers={b'Content-Type': b'text/plain'},
+            accept_encoding=b'gzip;q=0.8',
+        )
+        head, body = response.tobytes().split(CRLF + CRLF, maxsplit=1)
+        self.assertIn(b'Content-Encoding: gzip', head)
+        self.assertIn(b'Vary: Accept-Encoding', head)
+        self.assertEqual(gzip.decompress(body), content)
+        # Already compressed content types are left alone
+        self.assertNotIn(
+            b'Content-Encoding',
+            okResponse(
+                content=content,
+                headers={b'Content-Type': b'image/png'},
+            ).tobytes(),
+        )
+
     def test_close_header(self) -> None:
         self.assertEqual(
             okResponse(
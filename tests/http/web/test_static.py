@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+    proxy.py
+    ~~~~~~~~
+    ⚡⚡⚡ Fast, Lightweight, Pluggable, TLS interception capable proxy server focused on
+    Network monitoring, controls & Application development, testing, debugging.
+
+    :copyright: (c) 2013-present by Abhinav Singh and contributors.
+    :license: BSD, see LICENSE for more details.
+"""
+import os
+import gzip
+import socket
+from typing import Any, Dict, Optional
+
+import pytest
+
+from proxy.http import HttpClientConnection
+from proxy.common.flag import FlagParser
+from proxy.http.parser import HttpParser, httpParserTypes
+from proxy.common.utils import build_http_request
+from proxy.http.server import HttpWebServerPlugin
+from proxy.http.server.static import StaticFileIndex, static_response
+from proxy.http.compression import GZIP
+
+
+CONTENT = b'0123456789' * 10
+
+
+def request(
+        headers: Optional[Dict[bytes, bytes]] = None,
+        path: bytes = b'/file.txt',
+        method: bytes = b'GET',
+) -> HttpParser:
+    parser = HttpParser(httpParserTypes.REQUEST_PARSER)
+    parser.parse(memoryview(build_http_request(method, path, headers=headers)))
+    return parser
+
+
+def response_of(head: memoryview) -> HttpParser:
+    parser = HttpParser(httpParserTypes.RESPONSE_PARSER)
+    parser.parse(head)
+    return parser
+
+
+class TestStaticFiles:
+
+    @pytest.fixture(autouse=True)   # type: ignore[misc]
+    def _setUp(self, tmp_path: Any) -> None:
+        self.root = str(tmp_path / 'static')
+        os.makedirs(self.root)
+        with open(os.path.join(self.root, 'file.txt'), 'wb') as f:
+            f.write(CONTENT)
+        with open(str(tmp_path / 'secret.txt'), 'wb') as f:
+            f.write(b'secret')
+        self.index = StaticFileIndex(self.root)
+
+    def test_index_revalidates_metadata(self) -> None:
+        static = self.index.lookup('/file.txt?v=1')
+        assert static is not None
+        assert static.size == len(CONTENT)
+        assert static.content_type == b'text/plain'
+        assert self.index.lookup('/./file.txt') is static
+        with open(os.path.join(self.root, 'file.txt'), 'ab') as f:
+            f.write(b'!')
+        updated = self.index.lookup('/file.txt')
+        assert updated is not None and updated.size == len(CONTENT) + 1
+        os.remove(os.path.join(self.root, 'file.txt'))
+        assert self.index.lookup('/file.txt') is None
+
+    def test_paths_outside_root_are_not_served(self) -> None:
+        assert self.index.lookup('/../secret.txt') is None
+        assert self.index.lookup('/%2e%2e/secret.txt') is None
+        assert self.index.lookup('/') is None
+
+    def test_conditional_requests(self) -> None:
+        response = static_response(self.index, request())
+        etag = response_of(response.head).header(b'etag')
+        last_modified = response_of(response.head).header(b'last-modified')
+        for headers in (
+                {b'If-None-Match': b'"other", ' + etag},
+                {b'If-None-Match': b'W/' + etag},
+                {b'If-Modified-Since': last_modified},
+        ):
+            not_modified = static_response(self.index, request(headers))
+            assert response_of(not_modified.head).code == b'304'
+            assert not_modified.remaining == 0
+        modified = static_response(
+            self.index,
+            request({b'If-None-Match': b'"other"'}),
+        )
+        assert response_of(modified.head).code == b'200'
+        assert modified.remaining == len(CONTENT)
+
+    @pytest.mark.parametrize(     # type: ignore[misc]
+        'byte_range,code,offset,count,content_range',
+        [
+            (b'bytes=10-19', b'206', 10, 10, b'bytes 10-19/100'),
+            (b'bytes=90-', b'206', 90, 10, b'bytes 90-99/100'),
+            (b'bytes=-5', b'206', 95, 5, b'bytes 95-99/100'),
+            (b'bytes=95-200', b'206', 95, 5, b'bytes 95-99/100'),
+            (b'bytes=100-', b'416', 0, 0, b'bytes */100'),
+            (b'bytes=0-1,5-6', b'200', 0, 100, None),
+            (b'lines=0-1', b'200', 0, 100, None),
+        ],
+    )
+    def test_range_requests(
+            self,
+            byte_range: bytes,
+            code: bytes,
+            offset: int,
+            count: int,
+            content_range: Optional[bytes],
+    ) -> None:
+        response = static_response(
+            self.index,
+            request({b'Range': byte_range}),
+        )
+        head = response_of(response.head)
+        assert head.code == code
+        assert response.offset == offset
+        assert response.remaining == count
+        if content_range is None:
+            assert not head.has_header(b'content-range')
+        else:
+            assert head.header(b'content-range') == content_range
+
+    def test_stale_if_range_serves_entire_file(self) -> None:
+        response = static_response(
+            self.index,
+            request({b'Range': b'bytes=0-9', b'If-Range': b'"stale"'}),
+        )
+        assert response_of(response.head).code == b'200'
+        assert response.remaining == len(CONTENT)
+
+    def test_head_and_not_found(self) -> None:
+        head = static_response(self.index, request(method=b'HEAD'))
+        assert response_of(head.head).header(b'content-length') == b'100'
+        assert head.remaining == 0
+        not_found = static_response(self.index, request(path=b'/missing'))
+        assert response_of(not_found.head).code == b'404'
+        assert not_found.conn_close
+
+    def test_body_is_written_using_sendfile(self) -> None:
+        left, right = socket.socketpair()
+        left.setblocking(False)
+        client = HttpClientConnection(left, ('127.0.0.1', 0))
+        response = static_response(
+            self.index,
+            request({b'Range': b'bytes=10-'}),
+        )
+        try:
+            assert response.send(client, 64) is False
+            assert response.send(client, 64) is True
+            # Nothing is buffered in userspace when sendfile is available
+            assert client.has_buffer() is not hasattr(os, 'sendfile')
+            while client.has_buffer():
+                client.flush()
+            assert right.recv(1024) == CONTENT[10:]
+        finally:
+            response.close()
+            left.close()
+            right.close()
+
+    def test_precompressed_sibling_is_served(self) -> None:
+        with open(os.path.join(self.root, 'file.txt.gz'), 'wb') as f:
+            f.write(b'precompressed')
+        # Siblings are discovered when file is indexed
+        self.index = StaticFileIndex(self.root)
+        response = static_response(
+            self.index,
+            request({b'Accept-Encoding': b'gzip'}),
+        )
+        head = response_of(response.head)
+        assert head.header(b'content-encoding') == b'gzip'
+        assert head.header(b'content-type') == b'text/plain'
+        assert head.header(b'vary') == b'Accept-Encoding'
+        assert head.header(b'etag').endswith(b'-gzip"')
+        assert response.path == os.path.join(self.root, 'file.txt.gz')
+        assert response.remaining == len(b'precompressed')
+        # Siblings requested directly are served as is
+        sibling = static_response(self.index, request(path=b'/file.txt.gz'))
+        assert response_of(sibling.head).header(b'content-type') == b'application/gzip'
+        assert not response_of(sibling.head).has_header(b'content-encoding')
+
+    def test_compressed_variant_is_cached(self) -> None:
+        headers = {b'Accept-Encoding': b'gzip'}
+        response = static_response(self.index, request(headers))
+        assert response.body is not None
+        assert gzip.decompress(response.body) == CONTENT
+        assert response_of(response.head).header(b'content-length') == \
+            bytes(str(len(response.body)), 'ascii')
+        static = self.index.lookup('/file.txt')
+        assert static is not None
+        assert self.index.compressed.get(
+            (static.path, static.mtime_ns, GZIP),
+        ) is response.body
+        etag = response_of(response.head).header(b'etag')
+        # Conditional requests are validated against encoded variant
+        not_modified = static_response(
+            self.index,
+            request({b'If-None-Match': etag, **headers}),
+        )
+        assert response_of(not_modified.head).code == b'304'
+        identity = static_response(
+            self.index,
+            request({b'If-None-Match': etag}),
+        )
+        assert response_of(identity.head).code == b'200'
+        # Files smaller than min compression length are not compressed
+        small = static_response(self.index, request(headers), len(CONTENT))
+        assert not response_of(small.head).has_header(b'content-encoding')
+
+    def test_compressed_body_is_flushed_before_close(self) -> None:
+        left, right = socket.socketpair()
+        client = HttpClientConnection(left, ('127.0.0.1', 0))
+        plugin = HttpWebServerPlugin(
+            'uid', FlagParser.initialize(threaded=True), client,
+            request(),
+        )
+        plugin.static_index = self.index
+        plugin._serve_static(
+            request({b'Accept-Encoding': b'gzip', b'Connection': b'close'}),
+        )
+        # Compressed variant is queued from memory
+        assert plugin.static_responses[0].conn_close
+        assert plugin.static_responses[0].body is not None
+        try:
+            while True:
+                while client.has_buffer():
+                    client.flush()
+                if plugin._send_static():
+                    break
+            left.close()
+            received = b''
+            while True:
+                data = right.recv(1024)
+                if not data:
+                    break
+                received += data
+        finally:
+            left.close()
+            right.close()
+        response = response_of(memoryview(received))
+        assert response.header(b'content-encoding') == b'gzip'
+        assert response.body is not None
+        assert gzip.decompress(response.body) == CONTENT
@@ -23,6 +23,7 @@ from proxy.common.flag import FlagParser
 from proxy.http.parser import HttpParser, httpParserTypes, httpParserStates
 from proxy.common.utils import bytes_, build_http_request, build_http_response
 from proxy.common.plugins import Plugins
+from proxy.http.server import HttpWebServerBasePlugin
 from proxy.http.responses import NOT_FOUND_RESPONSE_PKT
 from proxy.common.constants import (
     CRLF, PROXY_PY_DIR, PLUGIN_PAC_FILE, PLUGIN_HTTP_PROXY, PLUGIN_WEB_SERVER,
@@ -58,6 +59,23 @@ def test_on_client_connection_called_on_teardown(mocker: MockerFixture) -> None:
     assert _conn.closed
 
 
+def test_serve_static_file_negotiates_encoding(tmp_path: Any) -> None:
+    path = os.path.join(str(tmp_path), 'index.html')
+    with open(path, 'wb') as f:
+        f.write(b'<html>' * 100)
+    gzipped = HttpParser(httpParserTypes.RESPONSE_PARSER)
+    gzipped.parse(HttpWebServerBasePlugin.serve_static_file(path, 20))
+    assert gzipped.header(b'content-encoding') == b'gzip'
+    identity = HttpParser(httpParserTypes.RESPONSE_PARSER)
+    identity.parse(
+        HttpWebServerBasePlugin.serve_static_file(
+            path, 20, accept_encoding=b'identity',
+        ),
+    )
+    assert not identity.has_header(b'content-encoding')
+    assert identity.body == b'<html>' * 100
+
+
 def mock_selector_for_client_read(self: Any) -> None:
     self.mock_selector.return_value.select.return_value = [
         (
@@ -230,6 +248,16 @@ class TestStaticWebServerPlugin(Assertions):
         self._conn.recv.return_value = build_http_request(
             b'GET', b'/index.html',
         )
+        self._conn.send.side_effect = lambda data: len(data)
+        write_ready = [(
+            selectors.SelectorKey(
+                fileobj=self._conn.fileno(),
+                fd=self._conn.fileno(),
+                events=selectors.EVENT_WRITE,
+                data=None,
+            ),
+            selectors.EVENT_WRITE,
+        )]
         self.mock_selector.return_value.select.side_effect = [
             [(
                 selectors.SelectorKey(
@@ -240,40 +268,99 @@ class TestStaticWebServerPlugin(Assertions):
                 ),
                 selectors.EVENT_READ,
             )],
+            write_ready,
+            write_ready,
+        ]
+        await self.protocol_handler._run_once()
+        await self.protocol_handler._run_once()
+        await self.protocol_handler._run_once()
+
+        self.assertEqual(self.mock_selector.return_value.select.call_count, 3)
+        # Response head followed by file contents
+        self.assertEqual(self._conn.send.call_count, 2)
+
+        # parse response and verify
+        response = HttpParser(httpParserTypes.RESPONSE_PARSER)
+        response.parse(
+            memoryview(
+                b''.join(
+                    bytes(c[0][0]) for c in self._conn.send.call_args_list
+                ),
+            ),
+        )
+        self.assertEqual(response.code, b'200')
+        self.assertEqual(response.header(b'content-type'), b'text/html')
+        self.assertEqual(response.header(b'cache-control'), b'max-age=86400')
+        self.assertEqual(response.header(b'accept-ranges'), b'bytes')
+        self.assertTrue(response.has_header(b'etag'))
+        self.assertTrue(response.has_header(b'last-modified'))
+        # Static files are served uncompressed over keep-alive connections
+        self.assertFalse(response.has_header(b'content-encoding'))
+        self.assertFalse(response.has_header(b'connection'))
+        self.assertEqual(
+            response.header(b'content-length'),
+            bytes_(len(self.html_file_content)),
+        )
+        self.assertEqual(response.body, self.html_file_content)
+        self.assertFalse(self.protocol_handler.plugin.static_responses)     # type: ignore
+
+    @pytest.mark.asyncio    # type: ignore[misc]
+    async def test_static_web_server_flushes_body_before_close(self) -> None:
+        # Compressed body is queued in memory instead of using sendfile
+        self._conn.recv.return_value = build_http_request(
+            b'GET', b'/index.html',
+            headers={
+                b'Accept-Encoding': b'gzip',
+                b'Connection': b'close',
+            },
+        )
+        self._conn.send.side_effect = lambda data: len(data)
+        write_ready = [(
+            selectors.SelectorKey(
+                fileobj=self._conn.fileno(),
+                fd=self._conn.fileno(),
+                events=selectors.EVENT_WRITE,
+                data=None,
+            ),
+            selectors.EVENT_WRITE,
+        )]
+        self.mock_selector.return_value.select.side_effect = [
             [(
                 selectors.SelectorKey(
                     fileobj=self._conn.fileno(),
                     fd=self._conn.fileno(),
-                    events=selectors.EVENT_WRITE,
+                    events=selectors.EVENT_READ,
                     data=None,
                 ),
-                selectors.EVENT_WRITE,
+                selectors.EVENT_READ,
             )],
+            write_ready,
+            write_ready,
         ]
-        await self.protocol_handler._run_once()
-        await self.protocol_handler._run_once()
+        self.assertFalse(await self.protocol_handler._run_once())
+        # Connection must not be closed while body is still buffered
+        self.assertFalse(await self.protocol_handler._run_once())
+        self.assertTrue(self.protocol_handler.work.has_buffer())
+        self.assertTrue(await self.protocol_handler._run_once())
+        self.assertFalse(self.protocol_handler.work.has_buffer())
 
-        self.assertEqual(self.mock_selector.return_value.select.call_count, 2)
-        self.assertEqual(self._conn.send.call_count, 1)
-        encoded_html_file_content = gzip.compress(self.html_file_content)
-
-        # parse response and verify
         response = HttpParser(httpParserTypes.RESPONSE_PARSER)
-        response.parse(self._conn.send.call_args[0][0])
+        response.parse(
+            memoryview(
+                b''.join(
+                    bytes(c[0][0]) for c in self._conn.send.call_args_list
+                ),
+            ),
+        )
         self.assertEqual(response.code, b'200')
-        self.assertEqual(response.header(b'content-type'), b'text/html')
-        self.assertEqual(response.header(b'cache-control'), b'max-age=86400')
         self.assertEqual(response.header(b'content-encoding'), b'gzip')
         self.assertEqual(response.header(b'connection'), b'close')
+        assert response.body is not None
         self.assertEqual(
             response.header(b'content-length'),
-            bytes_(len(encoded_html_file_content)),
-        )
-        assert response.body
-        self.assertEqual(
-            gzip.decompress(response.body),
-            self.html_file_content,
+            bytes_(len(response.body)),
         )
+        self.assertEqual(gzip.decompress(response.body), self.html_file_content)
 
     @pytest.mark.asyncio    # type: ignore[misc]
     async def test_static_web_server_serves_404(self) -> None:
@@ -12,6 +12,7 @@ import ssl
 import gzip
 import socket
 import selectors
+from pathlib import Path
 from typing import Any, cast
 
 import pytest
@@ -34,9 +35,13 @@ from ..test_assertions import Assertions
 class TestHttpProxyPluginExamplesWithTlsInterception(Assertions):
 
     @pytest.fixture(autouse=True)   # type: ignore[misc]
-    def _setUp(self, request: Any, mocker: MockerFixture) -> None:
+    def _setUp(
+            self, request: Any, mocker: MockerFixture, tmp_path: Path,
+    ) -> None:
         self.mock_fromfd = mocker.patch('socket.fromfd')
         self.mock_selector = mocker.patch('selectors.DefaultSelector')
+        # Exercise openssl based certificate generation
+        mocker.patch('proxy.http.proxy.server.HAS_CRYPTOGRAPHY', False)
         self.mock_sign_csr = mocker.patch('proxy.http.proxy.server.sign_csr')
         self.mock_gen_csr = mocker.patch('proxy.http.proxy.server.gen_csr')
         self.mock_gen_public_key = mocker.patch(
@@ -45,10 +50,17 @@ class TestHttpProxyPluginExamplesWithTlsInterception(Assertions):
         self.mock_server_conn = mocker.patch(
             'proxy.http.proxy.server.TcpServerConnection',
         )
+        # Contexts are cached process wide
+        mocker.patch.dict('proxy.common.utils._ssl_contexts', clear=True)
+        mocker.patch.object(HttpProxyPlugin, 'contexts', None)
+        mocker.patch('os.path.getsize', return_value=1024)
         self.mock_ssl_context = mocker.patch('ssl.create_default_context')
-        self.mock_ssl_wrap = mocker.patch('ssl.wrap_socket')
 
-        self.mock_sign_csr.return_value = True
+        def sign_csr(**kwargs: Any) -> bool:
+            with open(kwargs['crt_path'], 'wb'):
+                pass
+            return True
+        self.mock_sign_csr.side_effect = sign_csr
         self.mock_gen_csr.return_value = True
         self.mock_gen_public_key.return_value = True
 
@@ -58,6 +70,7 @@ class TestHttpProxyPluginExamplesWithTlsInterception(Assertions):
             ca_cert_file='ca-cert.pem',
             ca_key_file='ca-key.pem',
             ca_signing_key_file='ca-signing-key.pem',
+            ca_cert_dir=str(tmp_path),
             threaded=True,
         )
         self.plugin = mocker.MagicMock()
@@ -78,9 +91,26 @@ class TestHttpProxyPluginExamplesWithTlsInterception(Assertions):
         self.server = self.mock_server_conn.return_value
 
         self.server_ssl_connection = mocker.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_context.return_value.wrap_socket.return_value = self.server_ssl_connection
         self.client_ssl_connection = mocker.MagicMock(spec=ssl.SSLSocket)
-        self.mock_ssl_wrap.return_value = self.client_ssl_connection
+        self.mock_ssl_context.return_value.wrap_socket.side_effect = \
+            lambda sock, server_side=False, **kwargs: \
+            self.client_ssl_connection if server_side else self.server_ssl_connection
+
+        # Connections receive using recv_into, serve
+        # them from mocked recv return values.
+        def recv_into_using_recv(sock: Any) -> None:
+            def recv_into(buffer: memoryview, nbytes: int = 0) -> int:
+                data = sock.recv(nbytes or len(buffer))
+                buffer[:len(data)] = data
+                return len(data)
+            sock.recv_into.side_effect = recv_into
+
+        for sock in (
+                self._conn,
+                self.server_ssl_connection,
+                self.client_ssl_connection,
+        ):
+            recv_into_using_recv(sock)
 
         def has_buffer() -> bool:
             return cast(bool, self.server.queue.called)
@@ -34,7 +34,8 @@ from proxy.common.constants import (  # noqa: WPS450
     DEFAULT_DISABLE_HTTP_PROXY, PLUGIN_WEBSOCKET_TRANSPORT,
     DEFAULT_CA_SIGNING_KEY_FILE, DEFAULT_CLIENT_RECVBUF_SIZE,
     DEFAULT_SERVER_RECVBUF_SIZE, DEFAULT_CACHE_DIRECTORY_PATH,
-    DEFAULT_ENABLE_REVERSE_PROXY, DEFAULT_ENABLE_STATIC_SERVER,
+    DEFAULT_ENABLE_REUSEPORT, DEFAULT_ENABLE_REVERSE_PROXY,
+    DEFAULT_ENABLE_STATIC_SERVER, DEFAULT_MAX_ACCEPTS_PER_WAKEUP,
     _env_threadless_compliant,
 )
 
@@ -82,6 +83,8 @@ class TestMain(unittest.TestCase):
         mock_args.port_file = DEFAULT_PORT_FILE
         mock_args.enable_ssh_tunnel = DEFAULT_ENABLE_SSH_TUNNEL
         mock_args.enable_reverse_proxy = DEFAULT_ENABLE_REVERSE_PROXY
+        mock_args.enable_reuseport = DEFAULT_ENABLE_REUSEPORT
+        mock_args.max_accepts_per_wakeup = DEFAULT_MAX_ACCEPTS_PER_WAKEUP
         mock_args.unix_socket_path = None
         mock_args.cache_dir = DEFAULT_CACHE_DIRECTORY_PATH
 
@@ -114,10 +117,12 @@ class TestMain(unittest.TestCase):
         mock_initialize.return_value.pid_file = pid_file
         mock_initialize.return_value.port_file = None
         mock_initialize.return_value.enable_ssh_tunnel = False
+        mock_initialize.return_value.enable_reuseport = False
         entry_point()
         mock_event_manager.assert_not_called()
         mock_listener_pool.assert_called_once_with(
             flags=mock_initialize.return_value,
+            bind_only=False,
         )
         mock_executor_pool.assert_called_once_with(
             flags=mock_initialize.return_value,
@@ -131,6 +136,7 @@ class TestMain(unittest.TestCase):
             executor_pids=mock_executor_pool.return_value.work_pids,
             executor_locks=mock_executor_pool.return_value.work_locks,
             event_queue=None,
+            executor_loads=mock_executor_pool.return_value.work_loads,
         )
         mock_acceptor_pool.return_value.setup.assert_called_once()
         mock_acceptor_pool.return_value.shutdown.assert_called_once()
@@ -165,10 +171,12 @@ class TestMain(unittest.TestCase):
         mock_initialize.return_value.enable_events = False
         mock_initialize.return_value.port_file = None
         mock_initialize.return_value.enable_ssh_tunnel = False
+        mock_initialize.return_value.enable_reuseport = False
         main()
         mock_event_manager.assert_not_called()
         mock_listener_pool.assert_called_once_with(
             flags=mock_initialize.return_value,
+            bind_only=False,
         )
         mock_executor_pool.assert_called_once_with(
             flags=mock_initialize.return_value,
@@ -182,6 +190,7 @@ class TestMain(unittest.TestCase):
             executor_pids=mock_executor_pool.return_value.work_pids,
             executor_locks=mock_executor_pool.return_value.work_locks,
             event_queue=None,
+            executor_loads=mock_executor_pool.return_value.work_loads,
         )
         mock_acceptor_pool.return_value.setup.assert_called_once()
         mock_acceptor_pool.return_value.shutdown.assert_called_once()
@@ -209,12 +218,14 @@ class TestMain(unittest.TestCase):
         mock_initialize.return_value.enable_events = True
         mock_initialize.return_value.port_file = None
         mock_initialize.return_value.enable_ssh_tunnel = False
+        mock_initialize.return_value.enable_reuseport = False
         main()
         mock_event_manager.assert_called_once()
         mock_event_manager.return_value.setup.assert_called_once()
         mock_event_manager.return_value.shutdown.assert_called_once()
         mock_listener_pool.assert_called_once_with(
             flags=mock_initialize.return_value,
+            bind_only=False,
         )
         mock_executor_pool.assert_called_once_with(
             flags=mock_initialize.return_value,
@@ -228,6 +239,7 @@ class TestMain(unittest.TestCase):
             executor_queues=mock_executor_pool.return_value.work_queues,
             executor_pids=mock_executor_pool.return_value.work_pids,
             executor_locks=mock_executor_pool.return_value.work_locks,
+            executor_loads=mock_executor_pool.return_value.work_loads,
         )
         mock_acceptor_pool.return_value.setup.assert_called_once()
         mock_acceptor_pool.return_value.shutdown.assert_called_once()